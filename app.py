@@ -1,11 +1,38 @@
+import io
 import streamlit as st
 import plotly.graph_objects as go
 import pandas as pd
 from survey_logic import generate_full_survey_analysis
-from sector_analysis import sector_analysis
-from ml_model import predict_sector
-from bias_rules import get_dominant_bias
-from portfolio_logic import analyse_portfolio, validate_upload, REQUIRED_COLS
+from bias_rules import SURVEY_AGE_MAP, record_survey
+from insights import quick_analysis
+from ml_model import model_version
+from percentiles import current_population, record_respondent, MIN_POPULATION, BFS_FIELD
+from holdings_io import read_holdings, UPLOAD_TYPES
+from sector_returns import sector_returns, TIERS
+from holdings_table import filter_sort, page_count, page_rows, render_table, PAGE_SIZE, SORT_OPTIONS, STATUSES
+from portfolio_logic import (
+    analyse_portfolio_cached, holdings_fingerprint, validate_upload, ingest_holdings, build_bias_insight,
+    memory_footprint, REQUIRED_COLS, BIAS_PORTFOLIO_INSIGHTS, KNOWN_SECTORS
+)
+from instrumentation import timed, instrument, diagnostics_allowed
+import instrumentation
+
+# Whole-rerun timer; stopped after the router at the end of the file (no-op unless BRA_INSTRUMENT is set)
+_rerun_span = timed("rerun")
+
+# Compute entry points, timed as "call/<name>" when instrumentation is on
+generate_full_survey_analysis = instrument(generate_full_survey_analysis)
+record_survey                 = instrument(record_survey)
+record_respondent             = instrument(record_respondent)
+quick_analysis                = instrument(quick_analysis)
+read_holdings                 = instrument(read_holdings)
+sector_returns                = instrument(sector_returns)
+filter_sort                   = instrument(filter_sort)
+render_table                  = instrument(render_table)
+analyse_portfolio_cached      = instrument(analyse_portfolio_cached)
+validate_upload               = instrument(validate_upload)
+ingest_holdings               = instrument(ingest_holdings)
+build_bias_insight            = instrument(build_bias_insight)
 
 # --------------------------------------------------
 # PAGE CONFIG
@@ -31,12 +58,44 @@ if "survey_step" not in st.session_state:
     st.session_state.survey_step = "demographics"
 if "portfolio_result" not in st.session_state:
     st.session_state.portfolio_result = None
-if "portfolio_raw_df" not in st.session_state:
-    st.session_state.portfolio_raw_df = None
+if "portfolio_upload_name" not in st.session_state:
+    st.session_state.portfolio_upload_name = None
+
+# --------------------------------------------------
+# CACHED UPLOAD PARSING
+# Keyed on the file bytes, so reruns and identical uploads
+# skip CSV / Excel parsing entirely
+# --------------------------------------------------
+@st.cache_data(max_entries=32, show_spinner=False)
+def _read_upload(name: str, data: bytes) -> pd.DataFrame:
+    return read_holdings(data, name)
+
+
+# Holdings table controls: any filter / sort change starts again at page 1
+def _reset_holdings_page():
+    st.session_state.ht_page = 1
+
+
+# The portfolio result outlives the uploader, which comes back empty after a
+# section switch; it goes when the user removes the file or presses Clear
+def _clear_portfolio():
+    st.session_state.portfolio_result      = None
+    st.session_state.portfolio_upload_name = None
+
+
+def _on_portfolio_upload():
+    if st.session_state.portfolio_upload is None:
+        _clear_portfolio()
+
+
+# Picking a section in the nav closes the hidden diagnostics page
+def _leave_diagnostics():
+    st.query_params.pop("diagnostics", None)
 
 # --------------------------------------------------
 # STYLES
 # --------------------------------------------------
+_styles_span = timed("styles")
 st.markdown("""
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Instrument+Serif:ital@0;1&family=DM+Sans:opsz,wght@9..40,300;9..40,400;9..40,500&display=swap');
@@ -51,45 +110,41 @@ html, body, [data-testid="stAppViewContainer"], [data-testid="stMain"] {
 .block-container { padding-top: 0 !important; padding-bottom: 2rem !important; max-width: 860px !important; }
 #MainMenu, footer, header { visibility: hidden; }
 
-/* ── NATIVE TABS STYLING — sits right of logo ── */
-[data-testid="stTabs"] [role="tablist"] {
+/* ── SECTION NAV — radio styled as a tab bar, sits right of logo ── */
+.st-key-bra_nav [role="radiogroup"] {
     border-bottom: 1px solid #e0ddd7 !important;
     gap: 0 !important;
-    background: transparent !important;
+    flex-wrap: nowrap !important;
     padding-left: 220px !important;
     position: relative !important;
+    margin-bottom: 24px !important;
+}
+.st-key-bra_nav [role="radiogroup"] label {
+    margin: 0 !important;
+    padding: 8px 14px !important;
+    border-bottom: 2px solid transparent !important;
+    cursor: pointer !important;
+    white-space: nowrap !important;
 }
-/* Fix Streamlit's default red/orange active tab indicator to black */
-[data-testid="stTabs"] button[role="tab"] {
+/* Hide the radio dot — the underline marks the active section */
+.st-key-bra_nav [role="radiogroup"] label > div:first-child {
+    display: none !important;
+}
+.st-key-bra_nav [role="radiogroup"] label p {
     font-family: 'DM Sans', sans-serif !important;
     font-size: 13px !important;
     font-weight: 400 !important;
     color: #6b6860 !important;
-    background: transparent !important;
-    border: none !important;
-    border-bottom: 2px solid transparent !important;
-    border-radius: 0 !important;
-    padding: 8px 14px !important;
-    white-space: nowrap !important;
 }
-[data-testid="stTabs"] button[role="tab"]:hover {
+.st-key-bra_nav [role="radiogroup"] label:hover p {
     color: #1a1a18 !important;
-    background: transparent !important;
 }
-[data-testid="stTabs"] button[role="tab"][aria-selected="true"] {
-    color: #1a1a18 !important;
-    font-weight: 500 !important;
+.st-key-bra_nav [role="radiogroup"] label:has(input:checked) {
     border-bottom: 2px solid #1a1a18 !important;
-    background: transparent !important;
-}
-/* Override Streamlit's injected red ink bar */
-[data-testid="stTabs"] [role="tablist"]::after,
-[data-testid="stTabs"] [role="tablist"] > div:last-child {
-    background-color: #1a1a18 !important;
-    background: #1a1a18 !important;
 }
-[data-testid="stTabs"] [data-testid="stTabContent"] {
-    padding-top: 24px !important;
+.st-key-bra_nav [role="radiogroup"] label:has(input:checked) p {
+    color: #1a1a18 !important;
+    font-weight: 500 !important;
 }
 
 /* ── BUTTONS — cream box, black border, black text ── */
@@ -384,7 +439,7 @@ hr { border-color: #e0ddd7 !important; }
 # --------------------------------------------------
 st.markdown("""
 <style>
-/* Position logo inline with the tab bar */
+/* Position logo inline with the section nav */
 .bra-inline-logo {
     font-family: 'Instrument Serif', serif;
     font-size: 16px;
@@ -398,27 +453,47 @@ st.markdown("""
     white-space: nowrap;
     z-index: 10;
 }
-/* Push tabs to the right to make room for logo */
-[data-testid="stTabs"] [role="tablist"] {
+/* Push the section nav to the right to make room for logo */
+.st-key-bra_nav [role="radiogroup"] {
     padding-left: 220px !important;
 }
 </style>
 <div class="bra-inline-logo">Behavioural Robo Advisor</div>
 """, unsafe_allow_html=True)
+_styles_span.stop()
 
 # ==================================================
-# TABS — Streamlit native tabs = zero page reloads
-# Session state is FULLY preserved between tab clicks
+# NAVIGATION — only the active section runs
+# st.tabs executes every tab body on every rerun, so one
+# survey click used to rebuild every chart in the app.
+# Each section is a render_*() function; the nav bar picks
+# one and only that one is called (see the end of the file).
+# Results live in session state, so nothing is lost on switch.
 # ==================================================
-tab_home, tab_manual, tab_results, tab_portfolio, tab_method, tab_biases, tab_about = st.tabs(
-    ["Home", "Manual Assessment", "Results", "Portfolio", "Method", "Biases", "About"]
-)
+SECTIONS = ["Home", "Manual Assessment", "Results", "Portfolio", "Method", "Biases", "About"]
+
+# Streamlit drops a widget's value on any run where it is not drawn;
+# re-assigning the inputs of hidden sections keeps half-finished answers
+SECTION_INPUTS = {
+    "Home":              ("qa_age", "qa_gender"),
+    "Manual Assessment": ("s_age", "s_gender", "b_Q", "r_Q"),
+    "Portfolio":         ("ht_",),
+}
+
+with st.container(key="bra_nav"):
+    page = st.radio("Section", SECTIONS, horizontal=True, key="page", label_visibility="collapsed",
+                    on_change=_leave_diagnostics)
+
+for _section, _inputs in SECTION_INPUTS.items():
+    if _section != page:
+        for _key in [k for k in st.session_state if k.startswith(_inputs)]:
+            st.session_state[_key] = st.session_state[_key]
 
 
 # ══════════════════════════════════════════════════
-# TAB 1: HOME + QUICK ANALYSIS
+# SECTION 1: HOME + QUICK ANALYSIS
 # ══════════════════════════════════════════════════
-with tab_home:
+def render_home():
 
     st.markdown("""
     <p class="bra-h1">Invest smarter.</p>
@@ -454,17 +529,10 @@ with tab_home:
         if qa_age == "Choose" or qa_gender == "Choose":
             st.warning("Please select both age group and gender.")
         else:
-            with st.spinner("Analysing demographic patterns..."):
-                most_sector, least_sector, sector_avg = sector_analysis(qa_age, qa_gender)
-                ml_sector   = predict_sector(qa_age, qa_gender)
-                bias_result = get_dominant_bias(qa_age, qa_gender)
-                bias        = bias_result.get("dominant", "Insufficient data")
+            # Precomputed per (age, gender); see insights.py
+            insight = quick_analysis(qa_age, qa_gender)
             # Store in session state — persists across all tab clicks
-            st.session_state.robo_result = {
-                "age": qa_age, "gender": qa_gender, "bias": bias,
-                "sector": most_sector, "least_sector": least_sector,
-                "ml_sector": ml_sector, "sector_avg": sector_avg
-            }
+            st.session_state.robo_result = {"age": qa_age, "gender": qa_gender, **insight}
             st.success("Analysis complete! View full results in the Results tab.")
 
     # Show inline preview if QA already done
@@ -567,9 +635,9 @@ with tab_home:
 
 
 # ══════════════════════════════════════════════════
-# TAB 2: MANUAL ASSESSMENT (multi-step inside one tab)
+# SECTION 2: MANUAL ASSESSMENT (multi-step inside one section)
 # ══════════════════════════════════════════════════
-with tab_manual:
+def render_manual():
 
     if st.session_state.survey_completed:
         st.markdown("""
@@ -595,7 +663,7 @@ with tab_manual:
             st.header("Basic Information")
 
             st.markdown("<p style='font-size:11px;color:#c5a35a;letter-spacing:0.08em;text-transform:uppercase;font-weight:500;margin-bottom:4px;'>Q1 — Age Group</p>", unsafe_allow_html=True)
-            s_age = st.selectbox("Age group", ["18–25", "26–35", "36–50", "50+"], index=None, key="s_age", label_visibility="collapsed")
+            s_age = st.selectbox("Age group", list(SURVEY_AGE_MAP), index=None, key="s_age", label_visibility="collapsed")
 
             st.markdown("<div style='height:12px'></div>", unsafe_allow_html=True)
             st.markdown("<hr style='border-color:#e0ddd7;margin:0 0 12px;'>", unsafe_allow_html=True)
@@ -735,6 +803,9 @@ with tab_manual:
                     for q, ans in st.session_state.responses["risk"].items():
                         responses_numeric[q] = ["A","B","C","D","E"].index(ans[0]) + 1
                     st.session_state.analysis_result = generate_full_survey_analysis(responses_numeric)
+                    demographics = st.session_state.responses["demographics"]
+                    record_survey(demographics.get("Q1"), demographics.get("Q2"), responses_numeric)
+                    record_respondent(st.session_state.analysis_result)
                     st.session_state.survey_completed = True
                     st.session_state.survey_step = "demographics"
                     st.success("Assessment complete! View your results in the Results tab.")
@@ -742,9 +813,9 @@ with tab_manual:
 
 
 # ══════════════════════════════════════════════════
-# TAB 3: RESULTS
+# SECTION 3: RESULTS
 # ══════════════════════════════════════════════════
-with tab_results:
+def render_results():
 
     has_robo   = st.session_state.robo_result is not None
     has_survey = st.session_state.survey_completed
@@ -807,22 +878,46 @@ with tab_results:
             with col_a: st.metric("Most Preferred Sector", robo["sector"])
             with col_b: st.metric("ML Predicted Sector", robo["ml_sector"])
             st.caption(f"Least preferred: **{robo['least_sector']}**")
+            st.caption(f"ML sector model: {model_version()}")
 
             sector_data = robo["sector_avg"]
-            fig_s = go.Figure(go.Bar(
-                x=list(sector_data.index), y=list(sector_data.values),
-                marker=dict(color=list(sector_data.values), colorscale=[[0,"#d4c4a0"],[1,"#c5a35a"]], showscale=False),
-                text=[f"{v:.1f}%" for v in sector_data.values],
-                textposition="outside", textfont=dict(color="#1a1a18", size=10)
-            ))
-            fig_s.update_layout(
-                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-                font=dict(color="#1a1a18", family="DM Sans"),
-                xaxis=dict(tickangle=-35, gridcolor="#e0ddd7", tickfont=dict(size=11, color="#6b6860")),
-                yaxis=dict(gridcolor="#e0ddd7", title="Avg Allocation (%)", tickfont=dict(color="#6b6860")),
-                margin=dict(t=20, b=80, l=40, r=20), height=340
-            )
-            st.plotly_chart(fig_s, use_container_width=True)
+            with timed("chart/demographic_sectors"):
+                fig_s = go.Figure(go.Bar(
+                    x=list(sector_data.index), y=list(sector_data.values),
+                    marker=dict(color=list(sector_data.values), colorscale=[[0,"#d4c4a0"],[1,"#c5a35a"]], showscale=False),
+                    text=[f"{v:.1f}%" for v in sector_data.values],
+                    textposition="outside", textfont=dict(color="#1a1a18", size=10)
+                ))
+                fig_s.update_layout(
+                    paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+                    font=dict(color="#1a1a18", family="DM Sans"),
+                    xaxis=dict(tickangle=-35, gridcolor="#e0ddd7", tickfont=dict(size=11, color="#6b6860")),
+                    yaxis=dict(gridcolor="#e0ddd7", title="Avg Allocation (%)", tickfont=dict(color="#6b6860")),
+                    margin=dict(t=20, b=80, l=40, r=20), height=340
+                )
+                st.plotly_chart(fig_s, use_container_width=True)
+
+            # ML probability ranking — precomputed per demographic in the insight table
+            ml_ranking = robo.get("ml_ranking")
+            if ml_ranking:
+                st.markdown("<p style='font-size:13px;font-weight:500;color:#1a1a18;margin:16px 0 8px;'>ML Sector Probabilities</p>", unsafe_allow_html=True)
+                ml_names = [s for s, _ in ml_ranking][::-1]
+                ml_probs = [p * 100 for _, p in ml_ranking][::-1]
+                with timed("chart/ml_sector_probabilities"):
+                    fig_ml = go.Figure(go.Bar(
+                        x=ml_probs, y=ml_names, orientation="h",
+                        marker=dict(color="#c5a35a"),
+                        text=[f"{p:.1f}%" for p in ml_probs],
+                        textposition="outside", textfont=dict(color="#1a1a18", size=10)
+                    ))
+                    fig_ml.update_layout(
+                        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+                        font=dict(color="#1a1a18", family="DM Sans"),
+                        xaxis=dict(range=[0, 115], gridcolor="#e0ddd7", title="Probability (%)", tickfont=dict(color="#6b6860")),
+                        yaxis=dict(tickfont=dict(size=11, color="#1a1a18")),
+                        margin=dict(t=10, b=30, l=140, r=40), height=320
+                    )
+                    st.plotly_chart(fig_ml, use_container_width=True)
 
         if has_survey:
             st.divider()
@@ -838,6 +933,15 @@ with tab_results:
         st.metric("BFS", f"{bfs['bfs_score']} / {bfs['max_score']}", bfs["category"])
         st.caption("Out of 60 across 12 behavioural biases. Higher = greater susceptibility.")
 
+        # Stored respondent base (seeded from bulk-scored surveys), re-read if it changed on disk
+        stored      = current_population()
+        population  = stored.population
+        percentiles = stored.rank(an) if population >= MIN_POPULATION else {}
+        if percentiles:
+            st.caption(f"Higher than **{percentiles[BFS_FIELD]:.0f}%** of {population:,} respondents.")
+        else:
+            st.caption(f"Population percentiles appear once {MIN_POPULATION} respondents have completed the assessment.")
+
         st.markdown("<p style='font-size:13px;font-weight:500;color:#1a1a18;margin:24px 0 8px;'>Bias Intensity Profile</p>", unsafe_allow_html=True)
 
         bias_names  = list(bias_profile.keys())
@@ -846,24 +950,26 @@ with tab_results:
         cmap        = {"High": "#c0392b", "Moderate": "#c5a35a", "Low": "#7aab8a"}
         bcolors     = [cmap.get(l, "#9a9690") for l in bias_levels]
 
-        fig_b = go.Figure(go.Bar(
-            x=bias_scores, y=bias_names, orientation="h",
-            marker=dict(color=bcolors),
-            text=[f"{s:.2f} — {l}" for s, l in zip(bias_scores, bias_levels)],
-            textposition="outside", textfont=dict(color="#1a1a18", size=11)
-        ))
-        fig_b.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#1a1a18", family="DM Sans"),
-            xaxis=dict(range=[0,1.3], gridcolor="#e0ddd7", title="Intensity (0–1)", tickfont=dict(color="#6b6860")),
-            yaxis=dict(gridcolor="#e0ddd7", tickfont=dict(size=11, color="#1a1a18")),
-            margin=dict(t=10, b=30, l=180, r=110), height=400,
-            shapes=[
-                dict(type="line", x0=0.33, x1=0.33, y0=-0.5, y1=len(bias_names)-0.5, line=dict(color="#c5c0b8", width=1, dash="dot")),
-                dict(type="line", x0=0.66, x1=0.66, y0=-0.5, y1=len(bias_names)-0.5, line=dict(color="#c5c0b8", width=1, dash="dot")),
-            ]
-        )
-        st.plotly_chart(fig_b, use_container_width=True)
+        with timed("chart/bias_profile"):
+            fig_b = go.Figure(go.Bar(
+                x=bias_scores, y=bias_names, orientation="h",
+                marker=dict(color=bcolors),
+                text=[f"{s:.2f} — {l}" + (f" · P{percentiles[b]:.0f}" if b in percentiles else "")
+                      for b, s, l in zip(bias_names, bias_scores, bias_levels)],
+                textposition="outside", textfont=dict(color="#1a1a18", size=11)
+            ))
+            fig_b.update_layout(
+                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+                font=dict(color="#1a1a18", family="DM Sans"),
+                xaxis=dict(range=[0,1.3], gridcolor="#e0ddd7", title="Intensity (0–1)", tickfont=dict(color="#6b6860")),
+                yaxis=dict(gridcolor="#e0ddd7", tickfont=dict(size=11, color="#1a1a18")),
+                margin=dict(t=10, b=30, l=180, r=110), height=400,
+                shapes=[
+                    dict(type="line", x0=0.33, x1=0.33, y0=-0.5, y1=len(bias_names)-0.5, line=dict(color="#c5c0b8", width=1, dash="dot")),
+                    dict(type="line", x0=0.66, x1=0.66, y0=-0.5, y1=len(bias_names)-0.5, line=dict(color="#c5c0b8", width=1, dash="dot")),
+                ]
+            )
+            st.plotly_chart(fig_b, use_container_width=True)
         st.caption("Dotted lines mark Low / Moderate / High thresholds at 0.33 and 0.66.")
 
         avg_risk = risk["average_score"]
@@ -881,16 +987,15 @@ with tab_results:
 
 
 # ══════════════════════════════════════════════════
-# TAB 4: PORTFOLIO ANALYSIS
+# SECTION 4: PORTFOLIO ANALYSIS
 # ══════════════════════════════════════════════════
-with tab_portfolio:
+def render_portfolio():
 
     st.header("Portfolio Analysis")
     st.markdown("<p style='color:#6b6860;font-size:14px;margin-top:-8px;'>Upload your holdings to get allocation analysis, return metrics, and bias-aware insights.</p>", unsafe_allow_html=True)
     st.markdown("<div style='height:8px'></div>", unsafe_allow_html=True)
 
     # ── Template download ──────────────────────────────────────────────────
-    import io
     sample = pd.DataFrame({
         "Stock":               ["Reliance Industries", "Infosys", "HDFC Bank", "TCS", "Tata Motors"],
         "Sector":              ["Energy", "Technology", "Finance", "Technology", "Consumer Goods"],
@@ -972,28 +1077,58 @@ with tab_portfolio:
 
     # ── File uploader ──────────────────────────────────────────────────────
     uploaded = st.file_uploader(
-        "Upload your portfolio (CSV or Excel)",
-        type=["csv", "xlsx"],
-        key="portfolio_upload"
+        "Upload your portfolio (CSV, Excel, Parquet or Feather / Arrow)",
+        type=UPLOAD_TYPES,
+        key="portfolio_upload",
+        on_change=_on_portfolio_upload
     )
 
     if uploaded:
         try:
-            if uploaded.name.endswith(".csv"):
-                raw_df = pd.read_csv(uploaded)
-            else:
-                raw_df = pd.read_excel(uploaded)
+            raw_df = _read_upload(uploaded.name, uploaded.getvalue())
 
-            valid, err = validate_upload(raw_df)
+            # No holdings cap: analysis is vectorised and the holdings table
+            # renders one page at a time, so large books are fine here
+            valid, err = validate_upload(raw_df, max_rows=None)
             if not valid:
+                _clear_portfolio()
                 st.error(f"File error: {err}")
             else:
-                result = analyse_portfolio(raw_df, dominant_bias=None)
-                st.session_state.portfolio_result = result
-                # Store raw df too so we can re-run bias insight at display time
-                st.session_state.portfolio_raw_df = raw_df
+                clean_df, rejected = ingest_holdings(raw_df)
+                if rejected:
+                    st.warning(f"{len(rejected)} row(s) skipped because of invalid values.")
+                    with st.expander("See skipped rows"):
+                        st.dataframe(pd.DataFrame([
+                            {"Row": r["row"], "Column": e["column"], "Value": str(e["value"]), "Problem": e["reason"]}
+                            for r in rejected[:500] for e in r["errors"]
+                        ]), hide_index=True, use_container_width=True)
+                        if any(e["column"] == "Sector" for r in rejected for e in r["errors"]):
+                            st.caption(f"Sector must be one of: {', '.join(KNOWN_SECTORS)}.")
+                if clean_df.empty:
+                    _clear_portfolio()
+                    st.error("File error: no valid holdings rows after validation.")
+                else:
+                    # Memoised on holdings content — reruns and repeat uploads are free.
+                    # The content fingerprint is computed once per uploaded file, not per rerun.
+                    # Only the compact result is kept in session state, not the raw upload.
+                    upload_id = (uploaded.file_id, uploaded.size)
+                    if st.session_state.get("portfolio_fingerprint", (None, None))[0] != upload_id:
+                        st.session_state.portfolio_fingerprint = (upload_id, holdings_fingerprint(clean_df))
+                    st.session_state.portfolio_result = analyse_portfolio_cached(
+                        clean_df, st.session_state.portfolio_fingerprint[1]
+                    )
+                    st.session_state.portfolio_upload_name = uploaded.name
         except Exception as e:
+            _clear_portfolio()
             st.error(f"Could not read file: {e}")
+    elif st.session_state.portfolio_result:
+        # Back from another section: the uploader is empty but the result was kept
+        note_col, clear_col = st.columns([5, 1])
+        with note_col:
+            st.caption(f"Showing results for {st.session_state.portfolio_upload_name or 'an earlier upload'} "
+                       "(uploaded earlier). Upload a file to replace it.")
+        with clear_col:
+            st.button("Clear", key="portfolio_clear", on_click=_clear_portfolio)
 
     # ── Display results ────────────────────────────────────────────────────
     if st.session_state.portfolio_result:
@@ -1010,18 +1145,9 @@ with tab_portfolio:
             bp = st.session_state.analysis_result["behavioral_bias_analysis"]["bias_profile"]
             dominant_bias = max(bp, key=lambda b: bp[b]["score"])
 
-        # Re-compute bias insight live using current dominant bias
-        if dominant_bias and hasattr(st.session_state, "portfolio_raw_df"):
-            try:
-                live_result = analyse_portfolio(
-                    st.session_state.portfolio_raw_df,
-                    dominant_bias=dominant_bias
-                )
-                bi = live_result["bias_insight"]
-            except Exception:
-                bi = res["bias_insight"]
-        else:
-            bi = res["bias_insight"]
+        # Bias insight comes straight from the precomputed bias matrix —
+        # every rule was already evaluated once in analyse_portfolio
+        bi = build_bias_insight(dominant_bias, res["bias_matrix"]) or res["bias_insight"]
 
         st.markdown("<div style='height:16px'></div>", unsafe_allow_html=True)
 
@@ -1051,180 +1177,127 @@ with tab_portfolio:
         # ── Sector allocation chart ──
         st.markdown("<span class='results-title'>Sector Allocation</span>", unsafe_allow_html=True)
 
-        fig_sa = go.Figure(go.Bar(
-            x=list(sa.index),
-            y=list(sa.values),
-            marker=dict(
-                color=list(sa.values),
-                colorscale=[[0, "#e8dfc8"], [1, "#c5a35a"]],
-                showscale=False
-            ),
-            text=[f"{v:.1f}%" for v in sa.values],
-            textposition="outside",
-            textfont=dict(color="#1a1a18", size=11)
-        ))
-        fig_sa.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#1a1a18", family="DM Sans"),
-            xaxis=dict(tickangle=-30, gridcolor="#e0ddd7", tickfont=dict(size=11, color="#6b6860")),
-            yaxis=dict(gridcolor="#e0ddd7", title="Allocation (%)", tickfont=dict(color="#6b6860")),
-            margin=dict(t=20, b=70, l=40, r=20), height=320
-        )
-        st.plotly_chart(fig_sa, use_container_width=True)
-
-        # ── Historical performance insight for top sector ──
-        top_sector = sa.index[0]
-        top_pct    = sa.iloc[0]
-
-        # Load sector return data from Excel
-        # Mapping: app sector name → row name in Sectorwise_Return_Data.xlsx
-        SECTOR_NAME_MAP = {
-            "Finance":       "Nifty financial services",
-            "Consumer Goods":"BSE Consumer discretionary",
-            "Healthcare":    "Nifty healthcare",
-            "Technology":    "Nifty it",
-            "Materials":     "Nifty metal",
-            "Energy":        "Nifty oil and Gas",
-            "Real Estate":   "Nifty realty",
-            "Utilities":     "bse utilities",
-            "Telecom":       "bse telecom",
-            "Industrials":   "BSE industrials",
-        }
+        with timed("chart/portfolio_sectors"):
+            fig_sa = go.Figure(go.Bar(
+                x=list(sa.index),
+                y=list(sa.values),
+                marker=dict(
+                    color=list(sa.values),
+                    colorscale=[[0, "#e8dfc8"], [1, "#c5a35a"]],
+                    showscale=False
+                ),
+                text=[f"{v:.1f}%" for v in sa.values],
+                textposition="outside",
+                textfont=dict(color="#1a1a18", size=11)
+            ))
+            fig_sa.update_layout(
+                paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+                font=dict(color="#1a1a18", family="DM Sans"),
+                xaxis=dict(tickangle=-30, gridcolor="#e0ddd7", tickfont=dict(size=11, color="#6b6860")),
+                yaxis=dict(gridcolor="#e0ddd7", title="Allocation (%)", tickfont=dict(color="#6b6860")),
+                margin=dict(t=20, b=70, l=40, r=20), height=320
+            )
+            st.plotly_chart(fig_sa, use_container_width=True)
 
-        try:
-            sr_df = pd.read_excel(
-                "Sectorwise Return Data.xlsx",
-                header=None,
-                usecols=[1, 2, 3],
-                names=["index_name", "start_val", "end_val"]
-            ).dropna()
-            sr_df["index_name"] = sr_df["index_name"].astype(str).str.strip()
-            sr_lookup = {
-                row["index_name"].lower(): (row["index_name"], row["start_val"], row["end_val"])
-                for _, row in sr_df.iterrows()
-            }
-
-            raw_name = SECTOR_NAME_MAP.get(top_sector, "")
-            match    = sr_lookup.get(raw_name.strip().lower())
-
-            if match:
-                idx_name, start_val, end_val = match
-                start_val  = float(start_val)
-                end_val    = float(end_val)
-                cagr       = ((end_val / start_val) ** (1/11) - 1) * 100
-                total_ret  = ((end_val - start_val) / start_val) * 100
-
-                if cagr >= 12:
-                    perf_label = "strong long-term performer"
-                    perf_color = "#2e7d32"
-                elif cagr >= 7:
-                    perf_label = "moderate long-term performer"
-                    perf_color = "#c5a35a"
-                else:
-                    perf_label = "below-average long-term performer"
-                    perf_color = "#c62828"
-
-                st.markdown(f"""
-                <div style="border:1px solid #c5a35a;border-left:4px solid #c5a35a;
-                            padding:18px 22px;background:#f5f3ef;margin:8px 0 0;">
-                  <div style="font-size:11px;color:#9a9690;text-transform:uppercase;
-                              letter-spacing:0.05em;margin-bottom:8px;">
-                    Historical performance — your top sector
-                  </div>
-                  <div style="font-family:'Instrument Serif',serif;font-size:1.05rem;
-                              color:#1a1a18;margin-bottom:10px;">
-                    {top_sector} ({idx_name.title()}) · {top_pct:.1f}% of your portfolio
-                  </div>
-                  <div style="font-size:13px;color:#1a1a18;line-height:1.7;">
-                    Over the past 11 years, the {idx_name.title()} index grew from
-                    <strong>{start_val:,.1f}</strong> to <strong>{end_val:,.1f}</strong>,
-                    delivering a total return of <strong>{total_ret:.1f}%</strong> and a
-                    <strong style="color:{perf_color};">CAGR of {cagr:.1f}%</strong> per year —
-                    making it a <strong style="color:{perf_color};">{perf_label}</strong>
-                    among Indian market sectors.
-                  </div>
-                </div>
-                """, unsafe_allow_html=True)
+        # ── Historical performance of held sectors ──
+        # Total return / CAGR for every sector is precomputed once in sector_returns
+        TIER_COLORS = {"strong": "#2e7d32", "moderate": "#c5a35a", "below-average": "#c62828"}
 
+        try:
+            held = sector_returns(sa.index)
         except Exception:
-            pass  # silently skip if file not found or unreadable
+            held = []   # silently skip if the workbook is unreadable
 
-        # ── Holdings table ──
-        st.markdown("<span class='results-title'>Holdings Detail</span>", unsafe_allow_html=True)
-        st.caption("Green = profit · Red = loss · Values in INR")
+        # The card is for the largest holding only; sectors without index data are skipped
+        if held and held[0]["sector"] == sa.index[0]:
+            top        = held[0]
+            top_sector = top["sector"]
+            top_pct    = sa[top_sector]
+            perf_color = TIER_COLORS[top["tier"]]
 
-        holdings = res["holdings"].copy()
-
-        # Column background colours
-        COL_INVESTED_BG  = "#f0ede6"   # warm cream  — invested group
-        COL_CURRENT_BG   = "#e8f0e8"   # soft green  — current value group
-        COL_GAINLOSS_BG  = "#fdf6ec"   # light amber — gain/loss group
-
-        rows_html = ""
-        for _, row in holdings.iterrows():
-            ret = row["Return (%)"]
-            gl  = row["Gain / Loss (INR)"]
-
-            if ret > 0:
-                ret_color = "#2e7d32"
-                gl_color  = "#2e7d32"
-                pl_badge  = '<span style="background:#e8f5e9;color:#2e7d32;padding:3px 10px;font-size:11px;font-weight:600;border-radius:3px;letter-spacing:0.03em;">▲ PROFIT</span>'
-            elif ret < 0:
-                ret_color = "#c62828"
-                gl_color  = "#c62828"
-                pl_badge  = '<span style="background:#ffebee;color:#c62828;padding:3px 10px;font-size:11px;font-weight:600;border-radius:3px;letter-spacing:0.03em;">▼ LOSS</span>'
-            else:
-                ret_color = "#6b6860"
-                gl_color  = "#6b6860"
-                pl_badge  = '<span style="background:#f5f3ef;color:#6b6860;padding:3px 10px;font-size:11px;border-radius:3px;">— FLAT</span>'
+            st.markdown(f"""
+            <div style="border:1px solid #c5a35a;border-left:4px solid #c5a35a;
+                        padding:18px 22px;background:#f5f3ef;margin:8px 0 0;">
+              <div style="font-size:11px;color:#9a9690;text-transform:uppercase;
+                          letter-spacing:0.05em;margin-bottom:8px;">
+                Historical performance — your top sector
+              </div>
+              <div style="font-family:'Instrument Serif',serif;font-size:1.05rem;
+                          color:#1a1a18;margin-bottom:10px;">
+                {top_sector} ({top['index_name']}) · {top_pct:.1f}% of your portfolio
+              </div>
+              <div style="font-size:13px;color:#1a1a18;line-height:1.7;">
+                Over the past {top['years']} years, the {top['index_name']} index grew from
+                <strong>{top['start']:,.1f}</strong> to <strong>{top['end']:,.1f}</strong>,
+                delivering a total return of <strong>{top['total_return']:.1f}%</strong> and a
+                <strong style="color:{perf_color};">CAGR of {top['cagr']:.1f}%</strong> per year —
+                making it a <strong style="color:{perf_color};">{TIERS[top['tier']]}</strong>
+                among Indian market sectors.
+              </div>
+            </div>
+            """, unsafe_allow_html=True)
 
-            rows_html += f"""
+        if len(held) > 1:
+            perf_rows = "".join(f"""
             <tr style="border-bottom:1px solid #e0ddd7;">
-              <td style="padding:10px 12px;font-weight:500;color:#1a1a18;">{row['Stock']}</td>
-              <td style="padding:10px 12px;color:#6b6860;">{row['Sector']}</td>
-              <td style="padding:10px 12px;color:#1a1a18;text-align:right;">{int(row['Quantity'])}</td>
-              <td style="padding:10px 12px;color:#1a1a18;text-align:right;">₹{row['Buy Price (INR)']:,.0f}</td>
-              <td style="padding:10px 12px;color:#1a1a18;text-align:right;">₹{row['Current Price (INR)']:,.0f}</td>
-              <td style="padding:10px 12px;color:#1a1a18;text-align:right;background:{COL_INVESTED_BG};">₹{row['Invested Value (INR)']:,.0f}</td>
-              <td style="padding:10px 12px;color:#1a1a18;text-align:right;background:{COL_CURRENT_BG};">₹{row['Current Value (INR)']:,.0f}</td>
-              <td style="padding:10px 12px;font-weight:500;color:{gl_color};text-align:right;background:{COL_GAINLOSS_BG};">₹{gl:+,.0f}</td>
-              <td style="padding:10px 12px;font-weight:500;color:{ret_color};text-align:right;background:{COL_GAINLOSS_BG};">{ret:+.2f}%</td>
-              <td style="padding:10px 12px;text-align:center;">{pl_badge}</td>
-            </tr>"""
+              <td style="padding:8px 12px;font-weight:500;color:#1a1a18;">{h['sector']}</td>
+              <td style="padding:8px 12px;color:#6b6860;">{h['index_name']}</td>
+              <td style="padding:8px 12px;color:#1a1a18;text-align:right;">{sa[h['sector']]:.1f}%</td>
+              <td style="padding:8px 12px;color:#1a1a18;text-align:right;">{h['total_return']:.1f}%</td>
+              <td style="padding:8px 12px;font-weight:500;color:{TIER_COLORS[h['tier']]};text-align:right;">{h['cagr']:.1f}%</td>
+            </tr>""" for h in held)
+            st.markdown(f"""
+            <div style="overflow-x:auto;margin-top:12px;">
+            <table style="width:100%;border-collapse:collapse;font-family:'DM Sans',sans-serif;font-size:13px;">
+              <thead>
+                <tr style="border-bottom:2px solid #1a1a18;">
+                  <th style="padding:8px 12px;text-align:left;font-weight:500;color:#1a1a18;">Sector</th>
+                  <th style="padding:8px 12px;text-align:left;font-weight:500;color:#1a1a18;">Index</th>
+                  <th style="padding:8px 12px;text-align:right;font-weight:500;color:#1a1a18;white-space:nowrap;">Your Allocation</th>
+                  <th style="padding:8px 12px;text-align:right;font-weight:500;color:#1a1a18;white-space:nowrap;">{held[0]['years']}-yr Return</th>
+                  <th style="padding:8px 12px;text-align:right;font-weight:500;color:#1a1a18;">CAGR</th>
+                </tr>
+              </thead>
+              <tbody>{perf_rows}</tbody>
+            </table>
+            </div>
+            """, unsafe_allow_html=True)
 
-        table_html = f"""
-        <div style="overflow-x:auto;margin-top:8px;">
-        <table style="width:100%;border-collapse:collapse;font-family:'DM Sans',sans-serif;font-size:13px;">
-          <thead>
-            <tr style="border-bottom:2px solid #1a1a18;">
-              <th style="padding:8px 12px;text-align:left;font-weight:500;color:#1a1a18;white-space:nowrap;">Stock</th>
-              <th style="padding:8px 12px;text-align:left;font-weight:500;color:#1a1a18;white-space:nowrap;">Sector</th>
-              <th style="padding:8px 12px;text-align:right;font-weight:500;color:#1a1a18;">Qty</th>
-              <th style="padding:8px 12px;text-align:right;font-weight:500;color:#1a1a18;white-space:nowrap;">Buy Price</th>
-              <th style="padding:8px 12px;text-align:right;font-weight:500;color:#1a1a18;white-space:nowrap;">Curr Price</th>
-              <th style="padding:8px 12px;text-align:right;font-weight:500;color:#1a1a18;white-space:nowrap;background:{COL_INVESTED_BG};">Invested</th>
-              <th style="padding:8px 12px;text-align:right;font-weight:500;color:#1a1a18;white-space:nowrap;background:{COL_CURRENT_BG};">Curr Value</th>
-              <th style="padding:8px 12px;text-align:right;font-weight:500;color:#1a1a18;white-space:nowrap;background:{COL_GAINLOSS_BG};">Gain / Loss</th>
-              <th style="padding:8px 12px;text-align:right;font-weight:500;color:#1a1a18;background:{COL_GAINLOSS_BG};">Return</th>
-              <th style="padding:8px 12px;text-align:center;font-weight:500;color:#1a1a18;">Status</th>
-            </tr>
-          </thead>
-          <tbody>{rows_html}</tbody>
-        </table>
-        <div style="display:flex;gap:20px;margin-top:8px;font-size:11px;color:#9a9690;">
-          <span style="display:inline-flex;align-items:center;gap:5px;">
-            <span style="width:12px;height:12px;background:{COL_INVESTED_BG};border:1px solid #d4d0c9;display:inline-block;"></span>Invested amount
-          </span>
-          <span style="display:inline-flex;align-items:center;gap:5px;">
-            <span style="width:12px;height:12px;background:{COL_CURRENT_BG};border:1px solid #d4d0c9;display:inline-block;"></span>Current value
-          </span>
-          <span style="display:inline-flex;align-items:center;gap:5px;">
-            <span style="width:12px;height:12px;background:{COL_GAINLOSS_BG};border:1px solid #d4d0c9;display:inline-block;"></span>Gain / Loss &amp; Return
-          </span>
-        </div>
-        </div>"""
+        # ── Holdings table ──
+        st.markdown("<span class='results-title'>Holdings Detail</span>", unsafe_allow_html=True)
+        st.caption("Green = profit · Red = loss · Values in INR")
 
-        st.markdown(table_html, unsafe_allow_html=True)
+        # Sorted / filtered server-side; only the visible page is rendered (see holdings_table.py)
+        holdings = res["holdings"]
+        hc1, hc2, hc3, hc4 = st.columns([2, 1.2, 1.5, 1])
+        with hc1:
+            search = st.text_input("Search stock", key="ht_search", on_change=_reset_holdings_page)
+        with hc2:
+            status = st.selectbox("Status", STATUSES, key="ht_status", on_change=_reset_holdings_page)
+        with hc3:
+            sort_label = st.selectbox("Sort by", list(SORT_OPTIONS), key="ht_sort", on_change=_reset_holdings_page)
+        with hc4:
+            st.markdown("<div style='height:28px'></div>", unsafe_allow_html=True)
+            descending = st.toggle("Descending", value=True, key="ht_desc", on_change=_reset_holdings_page)
+        view = filter_sort(holdings, search, status, sort_by=SORT_OPTIONS[sort_label], descending=descending)
+
+        pages = page_count(len(view))
+        if pages > 1:
+            # A new upload can leave a stored page number past the end
+            if st.session_state.get("ht_page", 1) > pages:
+                st.session_state.ht_page = pages
+            page = st.number_input("Page", min_value=1, max_value=pages, step=1, key="ht_page")
+        else:
+            page = 1
+        rows, page, pages = page_rows(view, page)
+
+        st.markdown(render_table(rows), unsafe_allow_html=True)
+        if len(view) == 0:
+            st.caption("No holdings match the current filters.")
+        elif pages > 1 or len(view) < len(holdings):
+            first = (page - 1) * PAGE_SIZE + 1
+            st.caption(f"Showing {first}–{first + len(rows) - 1} of {len(view):,} matching holdings "
+                       f"({len(holdings):,} total) · page {page} of {pages}")
 
         # ── Bias-portfolio insight — detailed ──
         if bi:
@@ -1287,9 +1360,46 @@ with tab_portfolio:
             if not (st.session_state.robo_result or st.session_state.survey_completed):
                 st.info("Complete the Quick Analysis or Manual Assessment to get a personalised bias-portfolio connection.")
 
+        # ── Full bias → portfolio matrix ──
+        matrix = res["bias_matrix"]
+        st.markdown("<span class='results-title'>All Bias Patterns in Your Portfolio</span>", unsafe_allow_html=True)
+        st.caption(f"{sum(matrix.values())} of {len(matrix)} behavioural patterns are visible in your current holdings.")
+
+        matrix_rows = ""
+        for bias_name, hit in matrix.items():
+            is_dominant = bias_name == dominant_bias
+            status      = (
+                '<span style="color:#c0392b;font-weight:500;">▲ Detected</span>' if hit else
+                '<span style="color:#9a9690;">— Not evident</span>'
+            )
+            matrix_rows += f"""
+            <tr style="border-bottom:1px solid #e0ddd7;{'background:#efecea;' if is_dominant else ''}">
+              <td style="padding:8px 12px;color:#1a1a18;font-weight:{'600' if is_dominant else '400'};">{bias_name}{' (your dominant bias)' if is_dominant else ''}</td>
+              <td style="padding:8px 12px;color:#6b6860;font-style:italic;">{BIAS_PORTFOLIO_INSIGHTS[bias_name]['pattern']}</td>
+              <td style="padding:8px 12px;text-align:right;white-space:nowrap;">{status}</td>
+            </tr>"""
+
+        st.markdown(f"""
+        <div style="overflow-x:auto;margin-top:8px;">
+        <table style="width:100%;border-collapse:collapse;font-family:'DM Sans',sans-serif;font-size:13px;">
+          <thead>
+            <tr style="border-bottom:2px solid #1a1a18;">
+              <th style="padding:8px 12px;text-align:left;font-weight:500;color:#1a1a18;">Bias</th>
+              <th style="padding:8px 12px;text-align:left;font-weight:500;color:#1a1a18;">Typical portfolio pattern</th>
+              <th style="padding:8px 12px;text-align:right;font-weight:500;color:#1a1a18;">In your portfolio</th>
+            </tr>
+          </thead>
+          <tbody>{matrix_rows}</tbody>
+        </table>
+        </div>
+        """, unsafe_allow_html=True)
+
+        st.caption(f"Session memory footprint: {memory_footprint(dict(st.session_state)) / 1024:,.1f} KB")
+
     elif not uploaded:
         # ── Empty state with column guide ──
-        st.markdown("""
+        sector_names = ", ".join(KNOWN_SECTORS)
+        st.markdown(f"""
         <div style="border:1px solid #e0ddd7;background:#efecea;padding:24px 28px;margin-top:8px;">
           <div style="font-family:'Instrument Serif',serif;font-size:1.1rem;color:#1a1a18;margin-bottom:12px;">
             Expected file format
@@ -1307,7 +1417,7 @@ with tab_portfolio:
             </tr>
             <tr style="border-bottom:1px solid #e0ddd7;">
               <td style="padding:6px 12px 6px 0;color:#c5a35a;font-weight:500;">Sector</td>
-              <td style="padding:6px 12px;color:#6b6860;">Market sector</td>
+              <td style="padding:6px 12px;color:#6b6860;">Market sector, one of: {sector_names}</td>
               <td style="padding:6px 0;color:#6b6860;">Energy</td>
             </tr>
             <tr style="border-bottom:1px solid #e0ddd7;">
@@ -1334,9 +1444,9 @@ with tab_portfolio:
 
 
 # ══════════════════════════════════════════════════
-# TAB 5: METHOD
+# SECTION 5: METHOD
 # ══════════════════════════════════════════════════
-with tab_method:
+def render_method():
     st.header("Method")
     st.write("Theoretical foundations and scoring mechanisms used in this assessment.")
     st.divider()
@@ -1377,9 +1487,9 @@ with tab_method:
 
 
 # ══════════════════════════════════════════════════
-# TAB 6: BIASES
+# SECTION 6: BIASES
 # ══════════════════════════════════════════════════
-with tab_biases:
+def render_biases():
     st.header("Behavioural Biases")
     st.write("Psychological patterns that commonly influence real-world investment behaviour.")
     st.divider()
@@ -1427,9 +1537,9 @@ with tab_biases:
 
 
 # ══════════════════════════════════════════════════
-# TAB 7: ABOUT
+# SECTION 7: ABOUT
 # ══════════════════════════════════════════════════
-with tab_about:
+def render_about():
 
     st.markdown("""
     <!-- ── HERO STRIP ── -->
@@ -1633,3 +1743,66 @@ with tab_about:
       </div>
     </div>
     """, unsafe_allow_html=True)
+
+
+# ══════════════════════════════════════════════════
+# DIAGNOSTICS (hidden — open with ?diagnostics)
+# ══════════════════════════════════════════════════
+def render_diagnostics():
+    st.header("Diagnostics")
+    st.caption("Rerun and compute timings aggregated in this server process across all sessions. "
+               "Not linked from the navigation.")
+
+    # Collection and reset are process-wide, so they need the configured token
+    controls = instrumentation.diagnostics_controls_allowed()
+    dc1, dc2, dc3 = st.columns([1.4, 1, 1])
+    with dc1:
+        if controls:
+            st.toggle("Collect timings", value=instrumentation.enabled(), key="diag_collect",
+                      on_change=lambda: instrumentation.enable(st.session_state.diag_collect))
+        else:
+            st.caption(f"Collection is {'on' if instrumentation.enabled() else 'off'}. "
+                       f"Set {instrumentation.TOKEN_ENV_VAR} to control it from here.")
+    with dc2:
+        if controls and st.button("Reset metrics"):
+            instrumentation.reset()
+    with dc3:
+        if st.button("Close diagnostics"):
+            st.query_params.pop("diagnostics", None)
+            st.rerun()
+
+    metrics = instrumentation.snapshot()
+    if not metrics:
+        st.info(f"No timings recorded yet. Start the app with {instrumentation.ENV_VAR}=1"
+                f"{' or switch collection on above' if controls else ''}, then use the app.")
+        return
+
+    table = pd.DataFrame.from_dict(metrics, orient="index")
+    table.index.name = "name"
+    st.dataframe(table, use_container_width=True)
+    st.download_button("Download JSON", data=instrumentation.dump(),
+                       file_name="bra_timings.json", mime="application/json")
+
+
+# ==================================================
+# ROUTER
+# ==================================================
+SECTION_RENDERERS = {
+    "Home":              render_home,
+    "Manual Assessment": render_manual,
+    "Results":           render_results,
+    "Portfolio":         render_portfolio,
+    "Method":            render_method,
+    "Biases":            render_biases,
+    "About":             render_about,
+}
+
+try:
+    if diagnostics_allowed(st.query_params.get("diagnostics")):
+        render_diagnostics()
+    else:
+        with timed(f"section/{page}"):
+            SECTION_RENDERERS[page]()
+finally:
+    # st.rerun() inside a section raises; the rerun still counts
+    _rerun_span.stop()
@@ -0,0 +1,223 @@
+"""
+benchmarks/app_reruns.py
+
+Server-side rerun latency of app.py per user interaction, measured with
+Streamlit's AppTest (no browser, no server). Every widget interaction
+reruns the script, so this is the time a click spends in Python before
+the page can update.
+
+The session is primed the way a returning user's would be — a Quick
+Analysis result and an analysed portfolio in session state — so the
+sections that render charts have something to draw. Interactions:
+
+    first_load      new session, first script run
+    qa_select       change the Quick Analysis age group
+    qa_run          click "Analyse →"
+    survey_radio    answer a scenario question mid-survey
+    results_rerun   rerun while the Results section is open
+    portfolio_rerun rerun while the Portfolio section is open
+    switch_section  move between two sections (a rerun only with the
+                    section router; st.tabs switch in the browser)
+
+Run from the repo root:
+    python -m benchmarks.app_reruns                    # app.py as it is on disk
+    python -m benchmarks.app_reruns --ref HEAD~1       # app.py at another revision
+    python -m benchmarks.app_reruns --compare HEAD~1   # both, side by side
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+warnings.filterwarnings("ignore")
+logging.disable(logging.WARNING)
+
+from benchmarks.suite import RESULTS_DIR
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QA_AGES = ["18-25 years", "41-55 years"]
+SURVEY_ANSWERS = ["A. Assume it is temporary noise", "D. Re-examine the entire thesis"]
+
+
+# ── Session set-up ────────────────────────────────────────────────────────────
+def _new_session(app_path: str):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_path, default_timeout=120)
+    at.run()
+    return at
+
+
+def _prime(at):
+    from benchmarks.synthetic import make_holdings
+    from insights import quick_analysis
+    from portfolio_logic import analyse_portfolio
+
+    at.session_state["robo_result"] = {"age": "26-40 years", "gender": "Male", **quick_analysis("26-40 years", "Male")}
+    at.session_state["portfolio_result"] = analyse_portfolio(make_holdings(50, seed=1))
+    at.run()
+
+
+def _has_router(at) -> bool:
+    return any(r.key == "page" for r in at.radio)
+
+
+def _goto(at, section: str):
+    # With st.tabs every section is already on the page
+    if _has_router(at):
+        at.radio(key="page").set_value(section).run()
+
+
+def _timed(action) -> float:
+    start = time.perf_counter()
+    action()
+    return (time.perf_counter() - start) * 1e3
+
+
+# ── Interactions ──────────────────────────────────────────────────────────────
+# name → fn(app_path, repeat) returning per-sample ms (empty when not applicable)
+
+def _first_load(app_path, repeat):
+    return [_timed(lambda: _new_session(app_path)) for _ in range(repeat)]
+
+
+def _qa_select(app_path, repeat):
+    at = _new_session(app_path)
+    _prime(at)
+    _goto(at, "Home")
+    return [_timed(at.selectbox(key="qa_age").set_value(QA_AGES[i % 2]).run) for i in range(repeat)]
+
+
+def _qa_run(app_path, repeat):
+    at = _new_session(app_path)
+    _prime(at)
+    _goto(at, "Home")
+    at.selectbox(key="qa_age").set_value(QA_AGES[0])
+    at.selectbox(key="qa_gender").set_value("Female").run()
+    return [_timed(at.button(key="qa_run").click().run) for _ in range(repeat)]
+
+
+def _survey_radio(app_path, repeat):
+    at = _new_session(app_path)
+    at.session_state["survey_step"] = "bias"
+    _prime(at)
+    _goto(at, "Manual Assessment")
+    return [_timed(at.radio(key="b_Q3").set_value(SURVEY_ANSWERS[i % 2]).run) for i in range(repeat)]
+
+
+def _section_rerun(section):
+    def run(app_path, repeat):
+        at = _new_session(app_path)
+        _prime(at)
+        _goto(at, section)
+        return [_timed(at.run) for _ in range(repeat)]
+    return run
+
+
+def _switch_section(app_path, repeat):
+    at = _new_session(app_path)
+    _prime(at)
+    if not _has_router(at):
+        return []
+    sections = ["Results", "Portfolio"]
+    return [_timed(lambda: _goto(at, sections[i % 2])) for i in range(repeat)]
+
+
+INTERACTIONS = {
+    "first_load":      _first_load,
+    "qa_select":       _qa_select,
+    "qa_run":          _qa_run,
+    "survey_radio":    _survey_radio,
+    "results_rerun":   _section_rerun("Results"),
+    "portfolio_rerun": _section_rerun("Portfolio"),
+    "switch_section":  _switch_section,
+}
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+def measure(app_path: str, repeat: int, only: list = None) -> dict:
+    """
+    Returns
+    -------
+    {interaction: {"p50_ms", "p90_ms", "samples"} or None when not applicable}
+    """
+    out = {}
+    for name, interaction in INTERACTIONS.items():
+        if only and name not in only:
+            continue
+        samples = interaction(app_path, repeat)
+        if not samples:
+            out[name] = None
+            continue
+        samples.sort()
+        out[name] = {
+            "p50_ms":  round(statistics.median(samples), 2),
+            "p90_ms":  round(samples[min(len(samples) - 1, int(0.9 * len(samples)))], 2),
+            "samples": len(samples),
+        }
+    return out
+
+
+def measure_revision(ref: str, repeat: int, only: list = None) -> dict:
+    """measure() on app.py as of a git revision (checked out to a temporary file)."""
+    source = subprocess.run(["git", "show", f"{ref}:app.py"], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    # Next to app.py so its relative imports and data files resolve the same way
+    fd, path = tempfile.mkstemp(prefix=".app_", suffix=".py", dir=ROOT)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(source)
+        return measure(path, repeat, only)
+    finally:
+        os.remove(path)
+
+
+def _fmt(entry) -> str:
+    return f"{entry['p50_ms']:>9.1f}" if entry else f"{'n/a':>9}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ref", help="measure app.py at this git revision instead of the working tree")
+    parser.add_argument("--compare", metavar="REF", help="also measure app.py at REF and show both")
+    parser.add_argument("--only", nargs="+", choices=list(INTERACTIONS))
+    parser.add_argument("--repeat", type=int, default=15, help="samples per interaction")
+    parser.add_argument("--output", help="JSON file (default: results/app_reruns_<stamp>.json)")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    current = (measure_revision(args.ref, args.repeat, args.only) if args.ref
+               else measure(os.path.join(ROOT, "app.py"), args.repeat, args.only))
+    label   = args.ref or "current"
+    report  = {label: current}
+
+    if args.compare:
+        before = measure_revision(args.compare, args.repeat, args.only)
+        report = {args.compare: before, label: current}
+        print(f"{'interaction':<18} {args.compare[:9]:>9} {label[:9]:>9}  p50 ms")
+        for name in current:
+            b, a = before.get(name), current[name]
+            ratio = f"  {b['p50_ms'] / a['p50_ms']:.1f}× faster" if a and b and a["p50_ms"] else ""
+            print(f"{name:<18} {_fmt(b)} {_fmt(a)}{ratio}")
+    else:
+        print(f"{'interaction':<18} {'p50 ms':>9} {'p90 ms':>9}")
+        for name, entry in current.items():
+            print(f"{name:<18} {_fmt(entry)} {entry['p90_ms'] if entry else 'n/a':>9}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = args.output or os.path.join(RESULTS_DIR, f"app_reruns_{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}.json")
+    with open(path, "w") as f:
+        json.dump({"python": sys.version.split()[0], "repeat": args.repeat, "runs": report}, f, indent=2)
+    print(f"\nwrote {path}")
+
+
+if __name__ == "__main__":
+    main()
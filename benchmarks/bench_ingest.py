@@ -0,0 +1,65 @@
+"""
+benchmarks/bench_ingest.py
+
+Ingest time of read_holdings per file format, on the same synthetic holdings.
+
+Run from the repo root:
+    python -m benchmarks.bench_ingest
+    python -m benchmarks.bench_ingest --sizes 1000 100000 --xlsx-limit 10000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pyarrow.feather as feather
+
+from holdings_io import read_holdings
+from benchmarks.synthetic import make_holdings
+
+WRITERS = {
+    "csv":     lambda df, path: df.to_csv(path, index=False),
+    "xlsx":    lambda df, path: df.to_excel(path, index=False),
+    "parquet": lambda df, path: df.to_parquet(path, index=False),
+    "feather": lambda df, path: feather.write_feather(df, path, compression="uncompressed"),
+}
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--xlsx-limit", type=int, default=100_000, help="skip XLSX above this many rows")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}  " + "  ".join(f"{fmt:>13}" for fmt in WRITERS) + "   (best-of seconds, path/bytes)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            df    = make_holdings(n)
+            cells = []
+            for fmt, write in WRITERS.items():
+                if fmt == "xlsx" and n > args.xlsx_limit:
+                    cells.append(f"{'-':>13}")
+                    continue
+                path = os.path.join(tmp, f"holdings_{n}.{fmt}")
+                write(df, path)
+                with open(path, "rb") as fh:
+                    data = fh.read()
+                from_path  = _best_of(lambda: read_holdings(path), args.repeat)
+                from_bytes = _best_of(lambda: read_holdings(data, path), args.repeat)
+                cells.append(f"{f'{from_path:.3f}/{from_bytes:.3f}':>13}")
+            print(f"{n:>10,}  " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
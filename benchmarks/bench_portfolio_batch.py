@@ -0,0 +1,50 @@
+"""
+benchmarks/bench_portfolio_batch.py
+
+Throughput of analyse_portfolios_batch vs. looping analyse_portfolio.
+
+Run from the repo root:
+    python -m benchmarks.bench_portfolio_batch
+    python -m benchmarks.bench_portfolio_batch --sizes 1000 10000 --loop-limit 1000
+"""
+
+import argparse
+import time
+
+from portfolio_logic import PORTFOLIO_ID_COL, analyse_portfolio, analyse_portfolios_batch
+from benchmarks.synthetic import make_book
+
+
+def _time(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def _loop(book):
+    for _, portfolio in book.groupby(PORTFOLIO_ID_COL, sort=False):
+        analyse_portfolio(portfolio.drop(columns=PORTFOLIO_ID_COL))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--holdings", type=int, default=10, help="mean holdings per portfolio")
+    parser.add_argument("--loop-limit", type=int, default=10_000,
+                        help="skip the per-portfolio loop above this many portfolios")
+    args = parser.parse_args()
+
+    print(f"{'portfolios':>10}  {'rows':>9}  {'batch s':>8}  {'batch pf/s':>11}  {'loop s':>8}  {'loop pf/s':>10}")
+    for n in args.sizes:
+        book = make_book(n, args.holdings)
+        batch_s = _time(analyse_portfolios_batch, book)
+        if n <= args.loop_limit:
+            loop_s = _time(_loop, book)
+            loop_cols = f"{loop_s:8.3f}  {n / loop_s:10,.0f}"
+        else:
+            loop_cols = f"{'-':>8}  {'-':>10}"
+        print(f"{n:>10,}  {len(book):>9,}  {batch_s:8.3f}  {n / batch_s:11,.0f}  {loop_cols}")
+
+
+if __name__ == "__main__":
+    main()
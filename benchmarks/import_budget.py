@@ -0,0 +1,114 @@
+"""
+benchmarks/import_budget.py
+
+Cold-import check for the compute modules. Each module is imported in a
+fresh interpreter (so nothing is already in sys.modules) and must:
+
+    • stay under its time budget (median of --repeat runs), and
+    • not pull in any module on its forbidden list (streamlit, plotly,
+      scikit-learn everywhere; pandas where the module has no need for it).
+
+Exits 1 if any module is over budget or imports something forbidden,
+so it can gate CI next to the benchmark suite.
+
+Run from the repo root:
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --repeat 9 --scale 2     # slow CI machine
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+UI_ONLY = ["streamlit", "plotly", "sklearn"]
+
+# module → (budget ms, forbidden top-level packages)
+BUDGETS = {
+    "survey_logic":    (150, UI_ONLY + ["pandas"]),
+    "cohort_stats":    (150, UI_ONLY + ["pandas"]),
+    "bias_rules":      (150, UI_ONLY + ["pandas"]),
+    "percentiles":     (150, UI_ONLY + ["pandas"]),
+    "reference_data":  (50,  UI_ONLY + ["pandas"]),
+    "sector_analysis": (50,  UI_ONLY + ["pandas"]),
+    "sector_returns":  (50,  UI_ONLY + ["pandas"]),
+    "ml_model":        (50,  UI_ONLY + ["pandas"]),
+    "insights":        (200, UI_ONLY + ["pandas"]),
+    "instrumentation": (150, UI_ONLY + ["pandas"]),
+    "portfolio_logic": (800, UI_ONLY),
+    "holdings_io":     (800, UI_ONLY),
+    "holdings_table":  (800, UI_ONLY),
+    "bulk_score":      (800, UI_ONLY + ["openpyxl"]),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.partition(".")[0] for name in sys.modules}})
+print(json.dumps({{"ms": elapsed * 1e3, "loaded": loaded}}))
+"""
+
+
+def probe(module: str) -> dict:
+    """Imports `module` in a fresh interpreter; returns its import time and loaded packages."""
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def check(modules: list, repeat: int, scale: float) -> list:
+    """
+    Returns
+    -------
+    list of dicts: module, median_ms, budget_ms, forbidden (list), ok.
+    """
+    rows = []
+    for module in modules:
+        budget, forbidden = BUDGETS[module]
+        runs    = [probe(module) for _ in range(repeat)]
+        median  = statistics.median(r["ms"] for r in runs)
+        leaked  = sorted(set(forbidden) & set(runs[0]["loaded"]))
+        limit   = budget * scale
+        rows.append({
+            "module":    module,
+            "median_ms": round(median, 1),
+            "budget_ms": limit,
+            "forbidden": leaked,
+            "ok":        median <= limit and not leaked,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", help="modules to check (default: all in BUDGETS)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh-interpreter imports per module")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (slow machines)")
+    args = parser.parse_args()
+
+    unknown = [m for m in args.modules if m not in BUDGETS]
+    if unknown:
+        parser.error(f"no budget for {', '.join(unknown)}")
+
+    rows = check(args.modules or list(BUDGETS), args.repeat, args.scale)
+    print(f"{'module':<18} {'median ms':>10} {'budget ms':>10}  result")
+    for r in rows:
+        result = "ok" if r["ok"] else "FAIL"
+        if r["forbidden"]:
+            result += f"  imports {', '.join(r['forbidden'])}"
+        print(f"{r['module']:<18} {r['median_ms']:>10.1f} {r['budget_ms']:>10.0f}  {result}")
+
+    if not all(r["ok"] for r in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+benchmarks/parity.py
+
+Checks that the fast serving paths agree with the reference computations:
+LivePortfolio against analyse_portfolio, and the exported sector lookup
+table against the model it was exported from.
+
+LivePortfolio is seeded from an upload that holds some stocks in more
+than one lot (repeated Stock rows), checked against analyse_portfolio on
+that upload, then driven through a seeded random session of holding
+removals, re-additions, extra lots, quantity changes (including to zero)
+and price ticks. After every step its result() is compared with
+analyse_portfolio(to_frame()): summary, sector allocation,
+diversification, flags, bias rules and rule features. The session ends
+by zeroing and then removing every holding, the cases where add /
+subtract drift used to show.
+
+The lookup table predict_sector serves is then checked with
+ml_model.verify_lookup: every label and probability against the model,
+and that the table came from the artifact on disk.
+
+Exits 1 on the first mismatch, so it can gate CI next to the suite.
+
+Run from the repo root:
+    python -m benchmarks.parity
+    python -m benchmarks.parity --holdings 500 --steps 5000 --seed 7
+"""
+
+import argparse
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_holdings
+from ml_model import model_version, verify_lookup
+from portfolio_logic import LivePortfolio, analyse_portfolio
+
+# Summary and allocation figures are rounded to 2 dp on both paths
+ROUNDED_ATOL = 0.011
+FEATURE_RTOL = 1e-6
+
+
+def _close(a, b, atol=0.0, rtol=0.0) -> bool:
+    if isinstance(a, str) or isinstance(b, str) or a is None or b is None:
+        return a == b
+    return bool(np.isclose(float(a), float(b), atol=atol, rtol=rtol, equal_nan=True))
+
+
+def compare(live: dict, batch: dict) -> list:
+    """Differences between two analysis results, as readable strings."""
+    diffs = []
+    for key, value in batch["summary"].items():
+        if not _close(live["summary"][key], value, atol=ROUNDED_ATOL):
+            diffs.append(f"summary[{key}]: {live['summary'][key]!r} != {value!r}")
+
+    a, b = live["sector_alloc"].sort_index(), batch["sector_alloc"].sort_index()
+    if list(a.index) != list(map(str, b.index)):
+        diffs.append(f"sector_alloc sectors: {list(a.index)} != {list(b.index)}")
+    elif not np.allclose(a.to_numpy(float), b.to_numpy(float), atol=ROUNDED_ATOL, equal_nan=True):
+        diffs.append(f"sector_alloc: {a.to_dict()} != {b.to_dict()}")
+
+    for key in ("diversification", "flags", "bias_matrix"):
+        if live[key] != batch[key]:
+            diffs.append(f"{key}: {live[key]!r} != {batch[key]!r}")
+    for key, value in batch["features"].items():
+        if not _close(live["features"][key], value, rtol=FEATURE_RTOL):
+            diffs.append(f"features[{key}]: {live['features'][key]!r} != {value!r}")
+    return diffs
+
+
+def upload_with_lots(n_holdings: int, seed: int) -> pd.DataFrame:
+    """Synthetic upload where about one stock in ten appears again as a second lot."""
+    rng   = np.random.default_rng(seed)
+    df    = make_holdings(n_holdings, seed=seed)
+    extra = df.sample(frac=0.1, random_state=seed).assign(
+        **{"Quantity": lambda d: rng.integers(1, 200, len(d)).astype(float),
+           "Buy Price (INR)": lambda d: d["Buy Price (INR)"] * rng.uniform(0.7, 1.3, len(d))}
+    )
+    return pd.concat([df, extra], ignore_index=True)
+
+
+def live_session(df: pd.DataFrame, steps: int, seed: int):
+    """Yields (step description, LivePortfolio) after every change."""
+    rng  = np.random.default_rng(seed)
+    live = LivePortfolio.from_frame(df)
+    rows = {stock: (sector, qty, buy, cur) for stock, sector, qty, buy, cur in df.itertuples(index=False)}
+    yield "from_frame", live
+
+    for step in range(steps):
+        held  = list(dict.fromkeys(live.to_frame()["Stock"]))
+        stock = held[rng.integers(len(held))] if held else None
+        lots  = live.lots(stock) if stock else []
+        lot   = lots[rng.integers(len(lots))] if lots else None
+        op    = rng.choice(["remove", "remove lot", "add", "add lot", "quantity", "zero", "price"],
+                           p=[0.15, 0.1, 0.2, 0.1, 0.2, 0.1, 0.15])
+        if op == "remove" and len(held) > 1:
+            live.remove_holding(stock)
+        elif op == "remove lot" and len(lots) > 1:
+            live.remove_holding(stock, lot=lot)
+        elif op == "add" and len(held) < len(rows):
+            stock = next(s for s in rows if s not in live)
+            live.add_holding(stock, *rows[stock])
+        elif op == "add lot" and stock:
+            live.add_holding(stock, *rows[stock])
+        elif op == "quantity" and stock:
+            live.update_quantity(stock, float(rng.integers(1, 500)), lot=lot)
+        elif op == "zero" and stock:
+            live.update_quantity(stock, 0, lot=lot)
+        elif op == "price" and stock:
+            live.set_price(stock, float(rng.uniform(10, 5000)))
+        else:
+            continue
+        yield f"step {step}: {op} {stock}", live
+
+    for stock in set(live.to_frame()["Stock"]):
+        for lot in live.lots(stock):
+            live.update_quantity(stock, 0, lot=lot)
+    yield "every quantity zero", live
+
+    remaining = list(dict.fromkeys(live.to_frame()["Stock"]))
+    for stock in remaining[:-1]:
+        live.remove_holding(stock)
+    yield "one stock left, zero quantity", live
+
+    live.remove_holding(remaining[-1])
+    for stock in list(rows)[:3]:
+        live.add_holding(stock, *rows[stock])
+    yield "emptied and refilled", live
+
+
+def _report(label: str, diffs: list, n: int):
+    print(f"LivePortfolio mismatch after {label} ({n} holdings):")
+    for diff in diffs:
+        print(f"  {diff}")
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--holdings", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # analyse_portfolio divides by a zero total on an all-zero portfolio; NaN is the expected answer
+    warnings.filterwarnings("ignore", category=RuntimeWarning)
+
+    upload = upload_with_lots(args.holdings, args.seed)
+    diffs  = compare(LivePortfolio.from_frame(upload).result(), analyse_portfolio(upload))
+    if diffs:
+        _report("loading the upload", diffs, len(upload))
+
+    checked = 1
+    for label, live in live_session(upload, args.steps, args.seed):
+        diffs = compare(live.result(), analyse_portfolio(live.to_frame()))
+        checked += 1
+        if diffs:
+            _report(label, diffs, len(live))
+    print(f"LivePortfolio matches analyse_portfolio at {checked:,} checkpoints")
+
+    mismatches = verify_lookup()
+    if mismatches:
+        print(f"Sector lookup table disagrees with {model_version()}:")
+        for age, gender, actual, expected in mismatches:
+            print(f"  {age} / {gender}: table {actual!r}, model {expected!r}")
+        sys.exit(1)
+    print(f"Sector lookup table matches {model_version()}")
+
+
+if __name__ == "__main__":
+    main()
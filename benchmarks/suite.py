@@ -0,0 +1,371 @@
+"""
+benchmarks/suite.py
+
+Reproducible benchmark suite for every compute entry point, runnable
+without a Streamlit server.
+
+Each case builds seeded synthetic input at a given size and times one
+call (one "sample") repeatedly. For the per-user entry points that take
+scalar inputs (survey scoring, sector lookup, prediction, dominant bias)
+the size is the number of users scored per sample.
+
+Reported per (case, size):
+    first_ms              — first call in the process (cold caches, file loads)
+    p50 / p90 / p99 / max — steady-state latency per sample, ms
+    per_item_us           — p50 divided by size
+    peak_kib              — tracemalloc peak for one sample
+
+Results are written as JSON so runs can be compared.
+
+Run from the repo root:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --quick --only portfolio
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --compare before.json --fail-above 1.25
+"""
+
+import argparse
+import datetime as dt
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_book, make_demographics, make_holdings, make_survey_responses
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# ── Case registry ─────────────────────────────────────────────────────────────
+# name → (sizes, quick sizes, unit, setup); setup(size) returns a zero-arg callable
+CASES = {}
+
+
+def case(name: str, sizes: list, quick: list, unit: str):
+    def register(setup):
+        CASES[name] = (sizes, quick, unit, setup)
+        return setup
+    return register
+
+
+@case("analyse_portfolio", [10, 100, 1_000, 10_000, 100_000], [10, 1_000], "holdings")
+def _analyse_portfolio(n):
+    from portfolio_logic import analyse_portfolio
+    df = make_holdings(n)
+    return lambda: analyse_portfolio(df)
+
+
+@case("analyse_portfolio_cached", [10, 1_000, 100_000], [10, 1_000], "holdings")
+def _analyse_portfolio_cached(n):
+    # Steady state is a cache hit: fingerprint + lookup
+    from portfolio_logic import analyse_portfolio_cached
+    df = make_holdings(n)
+    return lambda: analyse_portfolio_cached(df)
+
+
+@case("analyse_portfolios_batch", [100, 1_000, 10_000], [100], "portfolios")
+def _analyse_portfolios_batch(n):
+    from portfolio_logic import analyse_portfolios_batch
+    book = make_book(n)
+    return lambda: analyse_portfolios_batch(book)
+
+
+@case("analyse_portfolio_stream", [10_000, 100_000], [10_000], "holdings")
+def _analyse_portfolio_stream(n):
+    from portfolio_logic import analyse_portfolio_stream
+    data = make_holdings(n).to_csv(index=False).encode()
+    return lambda: analyse_portfolio_stream(io.BytesIO(data))
+
+
+@case("ingest_holdings", [100, 10_000, 100_000], [100, 10_000], "rows")
+def _ingest_holdings(n):
+    from portfolio_logic import ingest_holdings
+    df = make_holdings(n).astype(str)       # uploads arrive as text
+    return lambda: ingest_holdings(df)
+
+
+@case("live_portfolio_tick", [100, 10_000], [100], "holdings")
+def _live_portfolio_tick(n):
+    # One price update followed by a re-read of the result
+    from portfolio_logic import LivePortfolio
+    df    = make_holdings(n)
+    live  = LivePortfolio.from_frame(df)
+    rng   = np.random.default_rng(0)
+    ticks = iter(zip(rng.choice(df["Stock"].to_numpy(), 1_000_000), rng.uniform(50, 5000, 1_000_000)))
+
+    def tick():
+        stock, price = next(ticks)
+        live.set_price(stock, float(price))
+        return live.result()
+    return tick
+
+
+@case("holdings_table_page", [100, 10_000, 100_000], [100, 10_000], "holdings")
+def _holdings_table_page(n):
+    # One Portfolio rerun of the holdings table: filter + sort + render one page
+    from holdings_table import filter_sort, page_rows, render_table
+    from portfolio_logic import analyse_portfolio
+    holdings = analyse_portfolio(make_holdings(n))["holdings"]
+    return lambda: render_table(page_rows(filter_sort(holdings, status="Profit", sort_by="Return (%)"), 2)[0])
+
+
+@case("generate_full_survey_analysis", [1, 100, 1_000], [1, 100], "responses")
+def _generate_full_survey_analysis(n):
+    from survey_logic import generate_full_survey_analysis
+    responses = make_survey_responses(n)
+    return lambda: [generate_full_survey_analysis(r) for r in responses]
+
+
+@case("score_survey_batch", [100, 10_000, 100_000], [100, 10_000], "responses")
+def _score_survey_batch(n):
+    from survey_logic import SURVEY_QUESTIONS, score_survey_batch
+    answers = pd.DataFrame(make_survey_responses(n), columns=SURVEY_QUESTIONS)
+    return lambda: score_survey_batch(answers)
+
+
+@case("get_dominant_bias", [1, 100, 1_000], [1, 100], "users")
+def _get_dominant_bias(n):
+    from bias_rules import get_dominant_bias
+    users = make_demographics(n)
+    return lambda: [get_dominant_bias(age, gender) for age, gender in users]
+
+
+@case("record_survey", [1, 100, 1_000], [1, 100], "responses")
+def _record_survey(n):
+    # Folds scored surveys into a private copy of the cohort statistics
+    from bias_rules import BIAS_AVERAGE_COUNTS, BIAS_AVERAGES, BIASES, survey_bias_values
+    from cohort_stats import CohortStats
+    cohorts = CohortStats(BIASES, {age: (BIAS_AVERAGES[age], BIAS_AVERAGE_COUNTS[age]) for age in BIAS_AVERAGES})
+    rows    = [(age.removesuffix(" years"), survey_bias_values(r))
+               for (age, _), r in zip(make_demographics(n), make_survey_responses(n))]
+    return lambda: [cohorts.update(age, values) for age, values in rows]
+
+
+@case("percentile_rank", [1_000, 1_000_000], [1_000], "population")
+def _percentile_rank(n):
+    # One respondent ranked against a population of n
+    from percentiles import PercentileService
+    from survey_logic import SURVEY_QUESTIONS, score_survey_batch, survey_analysis_records
+    scored  = score_survey_batch(pd.DataFrame(make_survey_responses(n), columns=SURVEY_QUESTIONS))
+    service = PercentileService()
+    service.update_scored(scored)
+    analysis = survey_analysis_records(scored.iloc[:1])[0]
+    return lambda: service.rank(analysis)
+
+
+@case("parse_sector_workbook", [1], [1], "loads")
+def _parse_sector_workbook(n):
+    # Cold start without the Parquet cache: openpyxl parse + normalisation
+    from reference_data import parse_workbook
+    return lambda: [parse_workbook() for _ in range(n)]
+
+
+@case("load_sector_cache", [1], [1], "loads")
+def _load_sector_cache(n):
+    # Cold start with a current Parquet cache (reference_data.load after the first run)
+    from reference_data import load
+    load()
+    return lambda: [load() for _ in range(n)]
+
+
+@case("sector_analysis", [1, 100], [1], "users")
+def _sector_analysis(n):
+    from sector_analysis import sector_analysis
+    users = make_demographics(n)
+    return lambda: [sector_analysis(age, gender) for age, gender in users]
+
+
+@case("sector_cohort_vectors", [1, 100], [1], "queries")
+def _sector_cohort_vectors(n):
+    # Every cohort's mean allocation in one array slice (the multi-key path)
+    from sector_analysis import sector_index
+    sector_index()
+    return lambda: [sector_index().vectors() for _ in range(n)]
+
+
+@case("sector_returns", [1, 10], [10], "sectors")
+def _sector_returns(n):
+    # Historical context for every held sector on a Portfolio rerun
+    from sector_returns import SECTOR_NAME_MAP, sector_returns
+    sectors = list(SECTOR_NAME_MAP)[:n]
+    sector_returns(sectors)
+    return lambda: sector_returns(sectors)
+
+
+@case("predict_sector", [1, 100], [1], "users")
+def _predict_sector(n):
+    from ml_model import predict_sector
+    users = make_demographics(n)
+    return lambda: [predict_sector(age, gender) for age, gender in users]
+
+
+@case("predict_sector_proba", [1, 100], [1], "users")
+def _predict_sector_proba(n):
+    from ml_model import predict_sector_proba
+    users = make_demographics(n)
+    return lambda: [predict_sector_proba(age, gender, top_k=3) for age, gender in users]
+
+
+@case("quick_analysis", [1, 100], [1], "users")
+def _quick_analysis(n):
+    # Insight-table lookup that replaces the three calls above on submit
+    from insights import quick_analysis
+    users = make_demographics(n)
+    return lambda: [quick_analysis(age, gender) for age, gender in users]
+
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+def _peak_kib(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def measure(fn, size: int, min_samples: int, max_samples: int, budget_s: float) -> dict:
+    """
+    Time `fn` until `max_samples` samples or `budget_s` seconds have been
+    spent (but always at least `min_samples`).
+    """
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+
+    samples = []
+    spent   = 0.0
+    while len(samples) < max_samples and (len(samples) < min_samples or spent < budget_s):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        spent += elapsed
+
+    ms = np.array(samples) * 1e3
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {
+        "size":        size,
+        "samples":     len(samples),
+        "first_ms":    round(first * 1e3, 4),
+        "p50_ms":      round(float(p50), 4),
+        "p90_ms":      round(float(p90), 4),
+        "p99_ms":      round(float(p99), 4),
+        "max_ms":      round(float(ms.max()), 4),
+        "per_item_us": round(float(p50) * 1e3 / size, 4),
+        "peak_kib":    round(_peak_kib(fn), 1),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _environment() -> dict:
+    versions = {}
+    for pkg in ("numpy", "pandas", "sklearn", "pyarrow", "streamlit"):
+        try:
+            versions[pkg] = __import__(pkg).__version__
+        except ImportError:
+            versions[pkg] = None
+    return {
+        "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "git":       _git_revision(),
+        "python":    platform.python_version(),
+        "platform":  platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages":  versions,
+    }
+
+
+def run(names: list, quick: bool, min_samples: int, max_samples: int, budget_s: float) -> dict:
+    results = []
+    for name in names:
+        sizes, quick_sizes, unit, setup = CASES[name]
+        for size in (quick_sizes if quick else sizes):
+            row = {"case": name, "unit": unit, **measure(setup(size), size, min_samples, max_samples, budget_s)}
+            results.append(row)
+            print(f"{name:<30} {size:>8,} {unit:<10} p50 {row['p50_ms']:>10.3f} ms  "
+                  f"p99 {row['p99_ms']:>10.3f} ms  first {row['first_ms']:>10.3f} ms  "
+                  f"peak {row['peak_kib']:>10,.0f} KiB", flush=True)
+    return {"environment": _environment(), "results": results}
+
+
+# ── Comparison ────────────────────────────────────────────────────────────────
+def compare(baseline: dict, current: dict, metric: str = "p50_ms") -> list:
+    """
+    Rows of (case, size, baseline, current, ratio) for every (case, size)
+    present in both runs; ratio > 1 means the current run is slower.
+    """
+    before = {(r["case"], r["size"]): r[metric] for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        key = (r["case"], r["size"])
+        if key in before and before[key] > 0:
+            rows.append((*key, before[key], r[metric], r[metric] / before[key]))
+    return rows
+
+
+def _print_comparison(rows: list, metric: str):
+    print(f"\n{'case':<30} {'size':>8}  {'before ' + metric:>16}  {'after ' + metric:>16}  {'ratio':>7}")
+    for name, size, old, new, ratio in rows:
+        print(f"{name:<30} {size:>8,}  {old:>16.3f}  {new:>16.3f}  {ratio:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", default=[], help="run cases whose name contains any of these")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a fast sanity run")
+    parser.add_argument("--min-samples", type=int, default=5)
+    parser.add_argument("--max-samples", type=int, default=200)
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds of sampling per (case, size)")
+    parser.add_argument("--output", help="JSON results path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="baseline JSON to compare this run against")
+    parser.add_argument("--metric", default="p50_ms", help="metric used by --compare")
+    parser.add_argument("--fail-above", type=float,
+                        help="with --compare, exit 1 if any ratio exceeds this (e.g. 1.25)")
+    parser.add_argument("--list", action="store_true", help="list cases and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (sizes, quick, unit, _) in CASES.items():
+            print(f"{name:<30} {unit:<10} sizes={sizes} quick={quick}")
+        return
+
+    names = [n for n in CASES if not args.only or any(s in n for s in args.only)]
+    if not names:
+        parser.error(f"no case matches {args.only}")
+
+    report = run(names, args.quick, args.min_samples, args.max_samples, args.budget)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp  = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, report, args.metric)
+        _print_comparison(rows, args.metric)
+        if args.fail_above and any(ratio > args.fail_above for *_, ratio in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
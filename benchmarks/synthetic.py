@@ -0,0 +1,57 @@
+"""
+benchmarks/synthetic.py
+
+Deterministic synthetic inputs for the benchmark scripts.
+Everything is seeded so two runs on the same machine see the same data.
+"""
+
+import numpy as np
+import pandas as pd
+
+from portfolio_logic import PORTFOLIO_ID_COL
+
+SECTORS = [
+    "Technology", "Healthcare", "Finance", "Energy", "Consumer Goods",
+    "Real Estate", "Utilities", "Industrials", "Materials", "Telecom",
+]
+
+
+def make_holdings(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Single portfolio with `n_rows` holdings in the upload format."""
+    rng = np.random.default_rng(seed)
+    buy = rng.uniform(50, 5000, n_rows).round(2)
+    return pd.DataFrame({
+        "Stock":               [f"STOCK{i}" for i in range(n_rows)],
+        "Sector":              rng.choice(SECTORS, n_rows),
+        "Quantity":            rng.integers(1, 500, n_rows),
+        "Buy Price (INR)":     buy,
+        "Current Price (INR)": (buy * rng.uniform(0.5, 1.8, n_rows)).round(2),
+    })
+
+
+def make_book(n_portfolios: int, holdings_per_portfolio: int = 10, seed: int = 0) -> pd.DataFrame:
+    """Long holdings table for `n_portfolios` portfolios, keyed by PORTFOLIO_ID_COL."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(1, 2 * holdings_per_portfolio, n_portfolios)
+    n_rows = int(sizes.sum())
+    book = make_holdings(n_rows, seed=seed)
+    book.insert(0, PORTFOLIO_ID_COL, np.repeat(np.arange(n_portfolios), sizes))
+    return book
+
+
+AGE_GROUPS = ["18-25 years", "26-40 years", "41-55 years", "56-70 years", "70+ years"]
+GENDERS    = ["Female", "Male"]
+SURVEY_QUESTIONS = [f"Q{i}" for i in range(3, 23)]
+
+
+def make_survey_responses(n: int, seed: int = 0) -> list[dict]:
+    """`n` complete numeric survey responses (Q3–Q22, scores 1–5)."""
+    rng = np.random.default_rng(seed)
+    answers = rng.integers(1, 6, (n, len(SURVEY_QUESTIONS)))
+    return [dict(zip(SURVEY_QUESTIONS, map(int, row))) for row in answers]
+
+
+def make_demographics(n: int, seed: int = 0) -> list[tuple[str, str]]:
+    """`n` (age label, gender) pairs as the Quick Analysis widget produces them."""
+    rng = np.random.default_rng(seed)
+    return [(AGE_GROUPS[a], GENDERS[g]) for a, g in zip(rng.integers(0, 5, n), rng.integers(0, 2, n))]
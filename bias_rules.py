@@ -1,5 +1,6 @@
 # Bias–portfolio mapping rules will go here
-import streamlit as st
+from cohort_stats import CohortStats
+from survey_logic import QUESTION_BIAS_MAP
 
 # --------------------------------------------------
 # PRE-COMPUTED BIAS AVERAGES BY AGE GROUP
@@ -85,6 +86,16 @@ BIAS_AVERAGES = {
     },
 }
 
+# Respondents behind each age group's averages in that sheet
+# (every average above is a whole-number total over these counts)
+BIAS_AVERAGE_COUNTS = {
+    "18-25": 94,
+    "26-40": 20,
+    "41-55": 15,
+    "56-70": 2,
+    "70+":   2,
+}
+
 # --------------------------------------------------
 # AGE LABEL MAPPING
 # App selectbox uses "18-25 years" format
@@ -98,16 +109,67 @@ AGE_MAP = {
     "70+ years":   "70+",
 }
 
+# Manual Assessment survey offers the same bands as BIAS_AVERAGES
+# (en-dash labels, as the survey shows them), so every answer lands
+# in exactly its own cohort
+SURVEY_AGE_MAP = {
+    "18–25": "18-25",
+    "26–40": "26-40",
+    "41–55": "41-55",
+    "56–70": "56-70",
+    "70+":   "70+",
+}
+
+# --------------------------------------------------
+# LIVE COHORT STATISTICS
+# Seeded with the sheet averages above; every submitted
+# survey is folded into its age group
+# --------------------------------------------------
+BIASES = list(next(iter(BIAS_AVERAGES.values())))
+
+COHORTS = CohortStats(
+    BIASES,
+    priors={age: (BIAS_AVERAGES[age], BIAS_AVERAGE_COUNTS[age]) for age in BIAS_AVERAGES},
+)
+
+
+def survey_bias_values(responses: dict) -> dict:
+    """
+    Raw 1–5 bias values for one respondent (Q3–Q14), on the same
+    scale as BIAS_AVERAGES — Q4 and Q5 are averaged into Anchoring.
+    """
+    totals, counts = {}, {}
+    for q, bias in QUESTION_BIAS_MAP.items():
+        totals[bias] = totals.get(bias, 0) + responses[q]
+        counts[bias] = counts.get(bias, 0) + 1
+    return {bias: totals[bias] / counts[bias] for bias in BIASES}
+
+
+def record_survey(age: str, gender: str, responses: dict):
+    """
+    Folds one completed survey (numeric Q3–Q14 answers) into the
+    cohort statistics. Age may be a survey, app or short label; one
+    that is not a BIAS_AVERAGES age group (e.g. a band from an older
+    survey that straddles two groups) is not recorded.
+    Gender is accepted like get_dominant_bias's but not used: cohorts
+    are per age group only, which is what the lookup reads.
+    """
+    age_key = SURVEY_AGE_MAP.get(age, AGE_MAP.get(age, age))
+    if age_key not in BIAS_AVERAGES:
+        return
+    COHORTS.update(age_key, survey_bias_values(responses))
+
+
 # --------------------------------------------------
 # DOMINANT BIAS FUNCTION
 # gender param accepted for future use / extensibility
-# but currently age-level data is used (no gender split
-# in the Excel BFS average sheet)
+# but currently age-level statistics are used (the seed
+# sheet has no gender split)
 # --------------------------------------------------
 def get_dominant_bias(age: str, gender: str = None) -> dict:
     age_key = AGE_MAP.get(age, age)
 
-    scores = BIAS_AVERAGES.get(age_key)
+    scores = COHORTS.means(age_key)
 
     if not scores:
         return {
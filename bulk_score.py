@@ -0,0 +1,285 @@
+"""
+bulk_score.py
+
+Bulk Survey Scoring
+-------------------
+Scores a survey export (one respondent per row, numeric Q3–Q22 answers)
+outside the app, with survey_logic.score_survey_batch:
+
+    python bulk_score.py responses.csv scored.csv
+    python bulk_score.py responses.parquet scored.csv --workers 8 --chunksize 100000
+    python bulk_score.py responses.xlsx scored.csv --id-column "Respondent ID"
+
+Input is streamed in chunks (CSV via pandas, XLSX via openpyxl read-only,
+Parquet via pyarrow record batches) and chunks are scored across a process
+pool. Results are appended to the output CSV in input order; rows whose
+answers are not whole numbers 1–5 are kept with empty scores and an Error.
+
+After every chunk is flushed, <output>.checkpoint.json records how many
+input rows are done and how long the output is. Re-running the same
+command after a crash truncates any half-written chunk and resumes from
+there; --restart starts over.
+
+With --population the finished output is also folded into the stored
+respondent population the app ranks BFS and bias scores against (see
+percentiles.py); a file is only ever counted once.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from survey_logic import BIASES, SURVEY_QUESTIONS, score_survey_batch
+
+DEFAULT_CHUNKSIZE = 50_000
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+INVALID_ANSWERS   = "answers must be whole numbers 1–5"
+
+SCORE_COLUMNS = (
+    [f"{bias} {kind}" for bias in BIASES for kind in ("Score", "Level")]
+    + ["BFS Score", "BFS Max Score", "BFS %", "BFS Category", "Risk Average Score", "Risk Category"]
+)
+
+
+# ── Chunked readers ───────────────────────────────────────────────────────────
+# Each yields DataFrames of at most `chunksize` rows, starting `skip` data rows in.
+
+def _read_csv(path, columns, chunksize, skip):
+    yield from pd.read_csv(path, usecols=columns, chunksize=chunksize, skiprows=range(1, skip + 1))
+
+
+def _read_xlsx(path, columns, chunksize, skip, sheet=None):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws     = wb[sheet] if sheet else wb.active
+        rows   = ws.iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        keep   = [header.index(c) for c in columns if c in header]
+        names  = [header[i] for i in keep]
+
+        buffer = []
+        for n, row in enumerate(rows):
+            if n < skip:
+                continue
+            buffer.append([row[i] if i < len(row) else None for i in keep])
+            if len(buffer) == chunksize:
+                yield pd.DataFrame(buffer, columns=names)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=names)
+    finally:
+        wb.close()
+
+
+def _read_parquet(path, columns, chunksize, skip):
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    columns = [c for c in columns if c in parquet.schema_arrow.names]
+
+    # Whole row groups before `skip` are never read
+    first, seen = 0, 0
+    while first < parquet.num_row_groups and seen + parquet.metadata.row_group(first).num_rows <= skip:
+        seen  += parquet.metadata.row_group(first).num_rows
+        first += 1
+    groups = list(range(first, parquet.num_row_groups))
+
+    drop = skip - seen
+    for batch in parquet.iter_batches(batch_size=chunksize, row_groups=groups, columns=columns):
+        if drop:
+            cut   = min(drop, batch.num_rows)
+            batch = batch.slice(cut)
+            drop -= cut
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+READERS = {".csv": _read_csv, ".xlsx": _read_xlsx, ".parquet": _read_parquet, ".pq": _read_parquet}
+
+
+def read_chunks(path, columns, chunksize=DEFAULT_CHUNKSIZE, skip=0, sheet=None):
+    ext = os.path.splitext(path.lower())[1]
+    if ext not in READERS:
+        raise ValueError(f"Unsupported input type '{ext}'. Expected one of: {', '.join(READERS)}")
+    if ext == ".xlsx":
+        return _read_xlsx(path, columns, chunksize, skip, sheet)
+    return READERS[ext](path, columns, chunksize, skip)
+
+
+# ── Scoring (runs in worker processes) ────────────────────────────────────────
+def score_chunk(frame: pd.DataFrame, first_row: int, id_column: str = None) -> str:
+    """
+    Scores one chunk and returns it as header-less CSV text, so formatting
+    happens in the worker too. `first_row` is the 1-based input row number
+    of the chunk's first respondent.
+    """
+    missing = [q for q in SURVEY_QUESTIONS if q not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing answer columns: {', '.join(missing)}")
+
+    frame   = frame.reset_index(drop=True)
+    answers = frame[SURVEY_QUESTIONS].apply(pd.to_numeric, errors="coerce")
+    valid   = answers.isin([1, 2, 3, 4, 5]).all(axis=1)
+
+    out = score_survey_batch(answers[valid]).reindex(frame.index)
+    for col in ("BFS Score", "BFS Max Score"):
+        out[col] = out[col].astype("Int64")
+    out.insert(0, "Row", np.arange(first_row, first_row + len(frame)))
+    if id_column:
+        out.insert(1, id_column, frame[id_column])
+    out["Error"] = np.where(valid, "", INVALID_ANSWERS)
+    return out.to_csv(index=False, header=False, lineterminator="\n")
+
+
+# ── Checkpointing ─────────────────────────────────────────────────────────────
+def _input_signature(path) -> dict:
+    st = os.stat(path)
+    return {"input": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_checkpoint(path, state: dict):
+    # Write-then-rename so a crash never leaves a torn checkpoint
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ── Job ───────────────────────────────────────────────────────────────────────
+def _scored_chunks(chunks, first_row, id_column, workers):
+    """
+    Yields (n_rows, csv_text) in input order. At most 2 × workers chunks are
+    in flight, so memory stays bounded however large the input is.
+    """
+    if workers <= 1:
+        for frame in chunks:
+            yield len(frame), score_chunk(frame, first_row, id_column)
+            first_row += len(frame)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for frame in chunks:
+            pending.append((len(frame), pool.submit(score_chunk, frame, first_row, id_column)))
+            first_row += len(frame)
+            if len(pending) >= 2 * workers:
+                n, future = pending.pop(0)
+                yield n, future.result()
+        for n, future in pending:
+            yield n, future.result()
+
+
+def run_job(input_path, output_path, chunksize=DEFAULT_CHUNKSIZE, workers=None,
+            id_column=None, sheet=None, restart=False, log=print) -> dict:
+    """
+    Parameters
+    ----------
+    input_path : str
+        .csv, .xlsx or .parquet survey export with columns Q3–Q22.
+    output_path : str
+        CSV written with Row, [id_column], SCORE_COLUMNS, Error.
+    chunksize : int
+        Respondents per chunk (and per checkpoint).
+    workers : int, optional
+        Scoring processes; defaults to os.cpu_count(). 1 scores in-process.
+    restart : bool
+        Ignore an existing checkpoint and overwrite the output.
+
+    Returns
+    -------
+    Final checkpoint state: rows_done, chunks_done, output_bytes, complete …
+    Raises ValueError when the checkpoint belongs to a different input or
+    settings, or when the output exists without a checkpoint.
+    """
+    workers    = workers or os.cpu_count() or 1
+    checkpoint = output_path + CHECKPOINT_SUFFIX
+    signature  = {**_input_signature(input_path), "chunksize": chunksize, "id_column": id_column, "sheet": sheet}
+
+    state = None if restart else _load_checkpoint(checkpoint)
+    if state is not None:
+        if {k: state.get(k) for k in signature} != signature:
+            raise ValueError(f"{checkpoint} was written for a different input or settings; use --restart")
+        if state.get("complete"):
+            log(f"Already complete: {state['rows_done']:,} rows in {output_path}")
+            return state
+    elif os.path.exists(output_path) and not restart:
+        raise ValueError(f"{output_path} exists but has no checkpoint; use --restart to overwrite it")
+
+    if state is None:
+        state = {**signature, "rows_done": 0, "chunks_done": 0, "output_bytes": 0, "complete": False}
+        header = ["Row"] + ([id_column] if id_column else []) + SCORE_COLUMNS + ["Error"]
+        with open(output_path, "w", newline="") as out:
+            out.write(pd.DataFrame(columns=header).to_csv(index=False, lineterminator="\n"))
+            state["output_bytes"] = out.tell()
+        _save_checkpoint(checkpoint, state)
+    else:
+        log(f"Resuming after {state['rows_done']:,} rows ({state['chunks_done']} chunks)")
+
+    columns = SURVEY_QUESTIONS + ([id_column] if id_column else [])
+    chunks  = read_chunks(input_path, columns, chunksize, skip=state["rows_done"], sheet=sheet)
+
+    with open(output_path, "r+b") as out:
+        # Drop anything written after the last checkpoint (a chunk cut short by a crash)
+        out.truncate(state["output_bytes"])
+        out.seek(state["output_bytes"])
+
+        for n, text in _scored_chunks(chunks, state["rows_done"] + 1, id_column, workers):
+            out.write(text.encode())
+            out.flush()
+            os.fsync(out.fileno())
+            state["rows_done"]    += n
+            state["chunks_done"]  += 1
+            state["output_bytes"]  = out.tell()
+            _save_checkpoint(checkpoint, state)
+            log(f"  {state['rows_done']:,} rows scored")
+
+    state["complete"] = True
+    _save_checkpoint(checkpoint, state)
+    log(f"Done: {state['rows_done']:,} rows → {output_path}")
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help=".csv, .xlsx or .parquet survey export")
+    parser.add_argument("output", help="scored CSV")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (default: CPU count)")
+    parser.add_argument("--id-column", help="respondent ID column copied to the output")
+    parser.add_argument("--sheet", help="worksheet name for .xlsx input (default: active sheet)")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    parser.add_argument("--population", action="store_true",
+                        help="add the scored respondents to the app's stored percentile population")
+    args = parser.parse_args(argv)
+
+    try:
+        run_job(args.input, args.output, args.chunksize, args.workers, args.id_column, args.sheet, args.restart)
+        if args.population:
+            from percentiles import POPULATION_PATH, add_to_stored_population
+
+            service = add_to_stored_population([args.output])
+            print(f"Population: {service.population:,} respondents → {POPULATION_PATH}")
+    except (ValueError, FileNotFoundError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
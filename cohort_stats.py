@@ -0,0 +1,214 @@
+"""
+cohort_stats.py
+
+Incremental Cohort Statistics
+-----------------------------
+Running per-cohort statistics for a fixed set of fields (the behavioural
+biases), updated online in O(1) per observation:
+
+    count, mean, variance   — Welford's algorithm, one vector per cohort
+    quantiles (optional)    — P² sketch (Jain & Chlamtac), 5 markers each
+
+A cohort can start from a prior: a mean vector and the number of
+respondents behind it (e.g. the spreadsheet averages in bias_rules).
+Served means pool the prior with live observations; variance and
+quantiles describe live observations only, since the prior carries no
+spread information.
+
+Cohort keys are any hashable (bias_rules uses age groups such as "18-25").
+All methods are thread-safe; `version` increments on every update so
+callers can invalidate anything derived from the statistics.
+"""
+
+import threading
+
+import numpy as np
+
+
+# ── P² streaming quantile ─────────────────────────────────────────────────────
+class P2Quantile:
+    """
+    Streaming estimate of the p-quantile in constant memory.
+    Exact for the first five observations.
+    """
+
+    __slots__ = ("p", "heights", "positions", "desired", "increments", "_initial")
+
+    def __init__(self, p: float):
+        if not 0 < p < 1:
+            raise ValueError("p must be between 0 and 1")
+        self.p        = p
+        self._initial = []
+
+    def add(self, x: float):
+        x = float(x)
+        if self._initial is not None:
+            self._initial.append(x)
+            if len(self._initial) == 5:
+                p = self.p
+                self.heights    = sorted(self._initial)
+                self.positions  = [1, 2, 3, 4, 5]
+                self.desired    = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+                self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+                self._initial   = None
+            return
+
+        q, n = self.heights, self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                h = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < h < q[i + 1]:
+                    h = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                q[i]  = h
+                n[i] += s
+
+    def value(self) -> float:
+        if self._initial is None:
+            return self.heights[2]
+        if not self._initial:
+            return float("nan")
+        return float(np.quantile(self._initial, self.p))
+
+
+# ── Running statistics ────────────────────────────────────────────────────────
+class RunningStats:
+    """
+    Welford mean / variance over fixed-length vectors, plus an optional
+    prior mean worth `prior_count` observations.
+    """
+
+    __slots__ = ("count", "mean", "m2", "prior_mean", "prior_count", "sketches")
+
+    def __init__(self, n_fields: int, prior_mean=None, prior_count: int = 0, quantiles=()):
+        self.count       = 0
+        self.mean        = np.zeros(n_fields)
+        self.m2          = np.zeros(n_fields)
+        self.prior_mean  = np.zeros(n_fields) if prior_mean is None else np.asarray(prior_mean, dtype=float)
+        self.prior_count = prior_count if prior_mean is not None else 0
+        self.sketches    = {p: [P2Quantile(p) for _ in range(n_fields)] for p in quantiles}
+
+    def update(self, x: np.ndarray):
+        self.count += 1
+        delta       = x - self.mean
+        self.mean  += delta / self.count
+        self.m2    += delta * (x - self.mean)
+        for sketches in self.sketches.values():
+            for sketch, value in zip(sketches, x):
+                sketch.add(value)
+
+    @property
+    def total(self) -> int:
+        return self.prior_count + self.count
+
+    def pooled_mean(self) -> np.ndarray:
+        if self.count == 0:
+            return self.prior_mean.copy() if self.prior_count else np.full(len(self.mean), np.nan)
+        return (self.prior_count * self.prior_mean + self.count * self.mean) / self.total
+
+    def variance(self) -> np.ndarray:
+        # Sample variance of live observations
+        if self.count < 2:
+            return np.full(len(self.mean), np.nan)
+        return self.m2 / (self.count - 1)
+
+
+class CohortStats:
+    """
+    Parameters
+    ----------
+    fields : list of str
+        Names of the tracked values, in the order of every update vector.
+    priors : dict, optional
+        cohort → ({field: mean}, respondent count) used to seed the cohort.
+    quantiles : tuple of float
+        Quantiles to sketch per cohort and field (empty to disable).
+    """
+
+    def __init__(self, fields: list, priors: dict = None, quantiles=(0.5,)):
+        self.fields    = list(fields)
+        self.quantiles = tuple(quantiles)
+        self._cohorts  = {}
+        self._lock     = threading.Lock()
+        self._version  = 0
+        for cohort, (means, count) in (priors or {}).items():
+            self._cohorts[cohort] = RunningStats(
+                len(self.fields), [means[f] for f in self.fields], count, self.quantiles
+            )
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def cohorts(self) -> list:
+        with self._lock:
+            return list(self._cohorts)
+
+    def __contains__(self, cohort) -> bool:
+        return cohort in self._cohorts
+
+    def update(self, cohort, values: dict):
+        """
+        Adds one observation ({field: value}, every field required) to `cohort`,
+        creating the cohort if needed.
+        """
+        x = np.array([values[f] for f in self.fields], dtype=float)
+        with self._lock:
+            stats = self._cohorts.get(cohort)
+            if stats is None:
+                stats = self._cohorts[cohort] = RunningStats(len(self.fields), quantiles=self.quantiles)
+            stats.update(x)
+            self._version += 1
+
+    def means(self, cohort) -> dict | None:
+        """Pooled (prior + live) mean per field, or None for an unknown cohort."""
+        with self._lock:
+            stats = self._cohorts.get(cohort)
+            if stats is None:
+                return None
+            return dict(zip(self.fields, stats.pooled_mean().tolist()))
+
+    def summary(self, cohort) -> dict | None:
+        """
+        Returns
+        -------
+        {field: {"mean", "n", "live_n", "live_mean", "std", "q50", …}} or None.
+        """
+        with self._lock:
+            stats = self._cohorts.get(cohort)
+            if stats is None:
+                return None
+            pooled = stats.pooled_mean()
+            std    = np.sqrt(stats.variance())
+            out = {}
+            for i, field in enumerate(self.fields):
+                row = {
+                    "mean":      float(pooled[i]),
+                    "n":         stats.total,
+                    "live_n":    stats.count,
+                    "live_mean": float(stats.mean[i]) if stats.count else float("nan"),
+                    "std":       float(std[i]),
+                }
+                for p, sketches in stats.sketches.items():
+                    row[f"q{round(p * 100):02d}"] = sketches[i].value()
+                out[field] = row
+            return out
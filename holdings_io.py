@@ -0,0 +1,121 @@
+"""
+holdings_io.py
+
+Holdings File Readers
+---------------------
+Turns an uploaded or on-disk holdings file into a DataFrame for
+validate_upload / ingest_holdings, whatever the format:
+
+    .csv                       — pandas CSV parser
+    .xlsx                      — pandas / openpyxl (slowest; small files only)
+    .parquet / .pq             — pyarrow, memory-mapped, column-projected
+    .feather / .arrow / .ipc   — Arrow IPC, memory-mapped, zero-copy where possible
+
+Only REQUIRED_COLS (plus PORTFOLIO_ID_COL when present) are read, so extra
+back-office columns never leave the file. pyarrow is imported lazily
+and is only needed for the columnar formats.
+"""
+
+import io
+import os
+
+import pandas as pd
+
+from portfolio_logic import PORTFOLIO_ID_COL, REQUIRED_COLS
+
+# extension → reader kind
+SUPPORTED_FORMATS = {
+    ".csv":     "csv",
+    ".xlsx":    "excel",
+    ".parquet": "parquet",
+    ".pq":      "parquet",
+    ".feather": "arrow",
+    ".arrow":   "arrow",
+    ".ipc":     "arrow",
+}
+UPLOAD_TYPES = [ext.lstrip(".") for ext in SUPPORTED_FORMATS]
+
+_WANTED_COLS = REQUIRED_COLS + [PORTFOLIO_ID_COL]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather    # noqa: F401 — registers pyarrow.feather
+        import pyarrow.parquet    # noqa: F401 — registers pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Reading Parquet / Arrow files requires pyarrow (pip install pyarrow).") from e
+    return pyarrow
+
+
+def _arrow_source(source, pa):
+    """
+    Path → memory-mapped file; bytes → zero-copy buffer; file-like → its bytes.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return pa.memory_map(os.fspath(source), "r")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pa.BufferReader(pa.py_buffer(source))
+    return pa.BufferReader(pa.py_buffer(source.read()))
+
+
+def _projection(names) -> list:
+    # Keep only the columns the analysis needs; missing ones are reported by validate_upload
+    return [c for c in names if c in _WANTED_COLS]
+
+
+def _table_to_frame(table) -> pd.DataFrame:
+    # split_blocks avoids consolidating columns into one 2-D block (an extra copy)
+    return table.to_pandas(split_blocks=True)
+
+
+def _read_parquet(source) -> pd.DataFrame:
+    pa = _pyarrow()
+    with _arrow_source(source, pa) as handle:
+        parquet = pa.parquet.ParquetFile(handle)
+        columns = _projection(parquet.schema_arrow.names)
+        return _table_to_frame(parquet.read(columns=columns))
+
+
+def _read_arrow(source) -> pd.DataFrame:
+    pa = _pyarrow()
+    with _arrow_source(source, pa) as handle:
+        try:
+            reader = pa.ipc.open_file(handle)          # Feather v2 / Arrow IPC file
+            table  = reader.read_all()
+        except pa.ArrowInvalid:
+            handle.seek(0)
+            table = pa.ipc.open_stream(handle).read_all()   # Arrow IPC stream
+        return _table_to_frame(table.select(_projection(table.column_names)))
+
+
+def read_holdings(source, name: str = None) -> pd.DataFrame:
+    """
+    Parameters
+    ----------
+    source : str, path, bytes or file-like
+        The holdings file or its raw contents.
+    name : str, optional
+        File name used to pick the format; defaults to `source` when it is a path.
+
+    Returns
+    -------
+    pd.DataFrame in upload format (not yet validated).
+    Raises ValueError for unsupported extensions.
+    """
+    name = name or (os.fspath(source) if isinstance(source, (str, os.PathLike)) else "")
+    ext  = os.path.splitext(name.lower())[1]
+    kind = SUPPORTED_FORMATS.get(ext)
+
+    if kind == "parquet":
+        return _read_parquet(source)
+    if kind == "arrow":
+        return _read_arrow(source)
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    if kind == "csv":
+        return pd.read_csv(source, usecols=lambda c: c in _WANTED_COLS)
+    if kind == "excel":
+        return pd.read_excel(source, usecols=lambda c: c in _WANTED_COLS)
+    raise ValueError(f"Unsupported file type '{ext or name}'. Expected one of: {', '.join(UPLOAD_TYPES)}")
@@ -0,0 +1,204 @@
+"""
+holdings_table.py
+
+Holdings Table Renderer
+-----------------------
+HTML for the Portfolio section's Holdings Detail table, one page at a time.
+
+    view = filter_sort(res["holdings"], search="info", status="Loss", sort_by="Return (%)")
+    rows, page, pages = page_rows(view, page=2)
+    html = render_table(rows)
+
+Filtering and sorting run on the full holdings frame as column operations
+(no per-row Python). Only the rows of the requested page are formatted,
+and the profit / loss / flat styling is one CSS class per row picked with
+an array lookup, so the HTML sent to the browser is the visible slice
+plus a fixed stylesheet — the cost of a rerun no longer grows with the
+portfolio, only with the page size.
+"""
+
+import html
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZE = 25
+
+STATUSES = ["All", "Profit", "Loss", "Flat"]
+
+# Sort menu label → holdings column (None keeps the upload order)
+SORT_OPTIONS = {
+    "Upload order":  None,
+    "Return":        "Return (%)",
+    "Gain / Loss":   "Gain / Loss (INR)",
+    "Current Value": "Current Value (INR)",
+    "Invested":      "Invested Value (INR)",
+    "Quantity":      "Quantity",
+    "Stock":         "Stock",
+    "Sector":        "Sector",
+}
+
+# Column group backgrounds
+COL_INVESTED_BG = "#f0ede6"   # warm cream  — invested group
+COL_CURRENT_BG  = "#e8f0e8"   # soft green  — current value group
+COL_GAINLOSS_BG = "#fdf6ec"   # light amber — gain/loss group
+
+# Row class and status badge by sign of the return: index 0 = loss, 1 = flat, 2 = profit
+ROW_CLASSES = np.array(["loss", "flat", "gain"], dtype=object)
+BADGES = np.array([
+    '<span class="badge">▼ LOSS</span>',
+    '<span class="badge">— FLAT</span>',
+    '<span class="badge">▲ PROFIT</span>',
+], dtype=object)
+
+STYLE = f"""
+<style>
+.bra-holdings {{ width:100%; border-collapse:collapse; font-family:'DM Sans',sans-serif; font-size:13px; }}
+.bra-holdings thead tr {{ border-bottom:2px solid #1a1a18; }}
+.bra-holdings th {{ padding:8px 12px; text-align:right; font-weight:500; color:#1a1a18; white-space:nowrap; }}
+.bra-holdings tbody tr {{ border-bottom:1px solid #e0ddd7; }}
+.bra-holdings td {{ padding:10px 12px; color:#1a1a18; text-align:right; }}
+.bra-holdings .txt {{ text-align:left; }}
+.bra-holdings td.stock {{ font-weight:500; }}
+.bra-holdings td.sector {{ color:#6b6860; }}
+.bra-holdings .status {{ text-align:center; }}
+.bra-holdings .inv {{ background:{COL_INVESTED_BG}; }}
+.bra-holdings .cur {{ background:{COL_CURRENT_BG}; }}
+.bra-holdings .gl {{ background:{COL_GAINLOSS_BG}; }}
+.bra-holdings td.pl {{ font-weight:500; }}
+.bra-holdings tr.gain td.pl {{ color:#2e7d32; }}
+.bra-holdings tr.loss td.pl {{ color:#c62828; }}
+.bra-holdings tr.flat td.pl {{ color:#6b6860; }}
+.bra-holdings .badge {{ padding:3px 10px; font-size:11px; font-weight:600; border-radius:3px; letter-spacing:0.03em; }}
+.bra-holdings tr.gain .badge {{ background:#e8f5e9; color:#2e7d32; }}
+.bra-holdings tr.loss .badge {{ background:#ffebee; color:#c62828; }}
+.bra-holdings tr.flat .badge {{ background:#f5f3ef; color:#6b6860; font-weight:400; letter-spacing:0; }}
+.bra-holdings-legend {{ display:flex; gap:20px; margin-top:8px; font-size:11px; color:#9a9690; }}
+.bra-holdings-legend span {{ display:inline-flex; align-items:center; gap:5px; }}
+.bra-holdings-legend i {{ width:12px; height:12px; border:1px solid #d4d0c9; display:inline-block; }}
+</style>
+"""
+
+HEADER = """
+<thead><tr>
+  <th class="txt">Stock</th><th class="txt">Sector</th><th>Qty</th>
+  <th>Buy Price</th><th>Curr Price</th>
+  <th class="inv">Invested</th><th class="cur">Curr Value</th>
+  <th class="gl">Gain / Loss</th><th class="gl">Return</th><th class="status">Status</th>
+</tr></thead>
+"""
+
+LEGEND = f"""
+<div class="bra-holdings-legend">
+  <span><i style="background:{COL_INVESTED_BG};"></i>Invested amount</span>
+  <span><i style="background:{COL_CURRENT_BG};"></i>Current value</span>
+  <span><i style="background:{COL_GAINLOSS_BG};"></i>Gain / Loss &amp; Return</span>
+</div>
+"""
+
+
+# ── Server-side filter / sort ─────────────────────────────────────────────────
+def _signs(holdings: pd.DataFrame) -> np.ndarray:
+    # -1 / 0 / 1 per row; a missing return counts as flat
+    return np.sign(np.nan_to_num(holdings["Return (%)"].to_numpy(dtype=float))).astype(np.int8)
+
+
+def filter_sort(
+    holdings: pd.DataFrame,
+    search: str = "",
+    status: str = "All",
+    sectors: list = None,
+    sort_by: str = None,
+    descending: bool = True,
+) -> pd.DataFrame:
+    """
+    Parameters
+    ----------
+    holdings : DataFrame
+        analyse_portfolio()["holdings"].
+    search : str
+        Case-insensitive substring of the stock name.
+    status : str
+        One of STATUSES.
+    sectors : list, optional
+        Keep only these sectors.
+    sort_by : str, optional
+        Holdings column (a SORT_OPTIONS value); None keeps the upload order.
+
+    Returns
+    -------
+    DataFrame — the matching rows in display order (a new frame; the input is not modified).
+    """
+    mask = np.ones(len(holdings), dtype=bool)
+    if search:
+        mask &= holdings["Stock"].astype(str).str.contains(search, case=False, regex=False).to_numpy()
+    if status != "All":
+        mask &= _signs(holdings) == {"Profit": 1, "Loss": -1, "Flat": 0}[status]
+    if sectors:
+        mask &= holdings["Sector"].isin(sectors).to_numpy()
+
+    view = holdings[mask] if not mask.all() else holdings
+    if sort_by:
+        view = view.sort_values(sort_by, ascending=not descending, kind="stable")
+    return view
+
+
+def page_count(n_rows: int, page_size: int = PAGE_SIZE) -> int:
+    return max(1, -(-n_rows // page_size))
+
+
+def page_rows(view: pd.DataFrame, page: int = 1, page_size: int = PAGE_SIZE) -> tuple:
+    """
+    Returns
+    -------
+    (rows on the page, page actually shown, number of pages) — out-of-range
+    pages are clamped, so a stale page number after a filter change is safe.
+    """
+    pages = page_count(len(view), page_size)
+    page  = min(max(1, int(page)), pages)
+    start = (page - 1) * page_size
+    return view.iloc[start:start + page_size], page, pages
+
+
+# ── HTML ──────────────────────────────────────────────────────────────────────
+def _fmt(values: pd.Series, spec: str, prefix: str = "", suffix: str = "") -> pd.Series:
+    return prefix + values.map(spec.format) + suffix
+
+
+def _td(values: pd.Series, cls: str = "") -> pd.Series:
+    return (f'<td class="{cls}">' if cls else "<td>") + values + "</td>"
+
+
+def render_rows(rows: pd.DataFrame) -> str:
+    """<tr> elements for the given holdings rows, built column-wise."""
+    if rows.empty:
+        return ""
+    sign = _signs(rows) + 1
+    text = lambda col: rows[col].astype(str).map(html.escape)
+
+    cells = (
+        _td(text("Stock"), "txt stock")
+        + _td(text("Sector"), "txt sector")
+        + _td(rows["Quantity"].astype(np.int64).astype(str))
+        + _td(_fmt(rows["Buy Price (INR)"], "{:,.0f}", "₹"))
+        + _td(_fmt(rows["Current Price (INR)"], "{:,.0f}", "₹"))
+        + _td(_fmt(rows["Invested Value (INR)"], "{:,.0f}", "₹"), "inv")
+        + _td(_fmt(rows["Current Value (INR)"], "{:,.0f}", "₹"), "cur")
+        + _td(_fmt(rows["Gain / Loss (INR)"], "{:+,.0f}", "₹"), "gl pl")
+        + _td(_fmt(rows["Return (%)"], "{:+.2f}", suffix="%"), "gl pl")
+        + _td(pd.Series(BADGES[sign], index=rows.index), "status")
+    )
+    classes = pd.Series(ROW_CLASSES[sign], index=rows.index)
+    return "".join('<tr class="' + classes + '">' + cells + "</tr>")
+
+
+def render_table(rows: pd.DataFrame, legend: bool = True) -> str:
+    """Complete table (stylesheet, header, rows, colour legend) for st.markdown."""
+    return (
+        STYLE
+        + '<div style="overflow-x:auto;margin-top:8px;"><table class="bra-holdings">'
+        + HEADER
+        + "<tbody>" + render_rows(rows) + "</tbody></table>"
+        + (LEGEND if legend else "")
+        + "</div>"
+    )
@@ -0,0 +1,111 @@
+"""
+insights.py
+
+Demographic Insight Table
+-------------------------
+Quick Analysis only ever sees a handful of (age group, gender) keys, so
+every result is computed once up front:
+
+    (age, gender) → {"bias", "sector", "least_sector", "ml_sector", "ml_ranking", "sector_avg"}
+
+and the submit path is one dictionary lookup.
+
+The table is built on first use and refreshed when its inputs change:
+    • sector / ML part — when Stock_Sector_Allocation.xlsx changes (mtime / size)
+    • dominant bias    — when the live cohort statistics change (COHORTS.version)
+Each part is rebuilt only when its own input changed.
+"""
+
+import threading
+
+import ml_model
+import reference_data
+from bias_rules import AGE_MAP, COHORTS, get_dominant_bias
+from ml_model import predict_sector, predict_sector_proba
+from sector_analysis import sector_analysis
+
+AGE_GROUPS = list(AGE_MAP)              # app labels, e.g. "18-25 years"
+GENDERS    = ["Female", "Male"]
+DEMOGRAPHIC_KEYS = [(age, gender) for age in AGE_GROUPS for gender in GENDERS]
+
+_lock    = threading.Lock()
+_sectors = {}       # (age, gender) → sector / ML fields
+_biases  = {}       # (age, gender) → dominant bias
+_table   = {}       # (age, gender) → merged result served to callers
+_tokens  = {"source": None, "cohorts": None}
+
+
+def _clear_source_caches():
+    # The loaders cache the parsed workbook / trained model; drop them so the new file is read
+    reference_data.clear_cache()
+    ml_model.clear_model_cache()
+
+
+def _sector_entry(age: str, gender: str) -> dict:
+    most_sector, least_sector, sector_avg = sector_analysis(age, gender)
+    return {
+        "sector":       most_sector,
+        "least_sector": least_sector,
+        "ml_sector":    predict_sector(age, gender),
+        "ml_ranking":   predict_sector_proba(age, gender)["ranking"],
+        "sector_avg":   sector_avg,
+    }
+
+
+def _bias_entry(age: str, gender: str) -> str:
+    return get_dominant_bias(age, gender).get("dominant", "Insufficient data")
+
+
+def _refresh():
+    """Rebuilds whichever part of the table is stale. Caller holds _lock."""
+    source  = reference_data.source_signature()
+    cohorts = COHORTS.version
+    changed = False
+
+    if source != _tokens["source"]:
+        if _tokens["source"] is not None:
+            _clear_source_caches()
+        _sectors.clear()
+        _sectors.update({key: _sector_entry(*key) for key in DEMOGRAPHIC_KEYS})
+        _tokens["source"] = source
+        changed = True
+
+    if cohorts != _tokens["cohorts"]:
+        _biases.clear()
+        _biases.update({key: _bias_entry(*key) for key in DEMOGRAPHIC_KEYS})
+        _tokens["cohorts"] = cohorts
+        changed = True
+
+    if changed:
+        _table.clear()
+        _table.update({key: {"bias": _biases[key], **_sectors[key]} for key in DEMOGRAPHIC_KEYS})
+
+
+def insight_table() -> dict:
+    """The full (age, gender) → result table, refreshed if its inputs changed."""
+    with _lock:
+        _refresh()
+        return dict(_table)
+
+
+def quick_analysis(age: str, gender: str) -> dict:
+    """
+    Parameters
+    ----------
+    age : str
+        App age label, e.g. "26-40 years".
+    gender : str
+        "Female" or "Male".
+
+    Returns
+    -------
+    dict — bias, sector, least_sector, ml_sector, ml_ranking, sector_avg (the shared
+    table entry; treat it as read-only). Keys outside the table are
+    computed directly.
+    """
+    with _lock:
+        _refresh()
+        entry = _table.get((age, gender))
+    if entry is None:
+        entry = {"bias": _bias_entry(age, gender), **_sector_entry(age, gender)}
+    return entry
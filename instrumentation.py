@@ -0,0 +1,222 @@
+"""
+instrumentation.py
+
+Rerun Instrumentation
+---------------------
+Opt-in wall-clock timing of named sections of an app rerun and of the
+compute calls it makes, aggregated in memory for the life of the process:
+
+    with timed("section/Portfolio"):
+        ...
+    span = timed("styles"); ...; span.stop()              # same thing, no block
+    analyse = instrument(analyse_portfolio_cached)          # "call/analyse_portfolio_cached"
+
+Per name: count, total, mean, max and streaming p50 / p90 / p99 (P²
+sketches from cohort_stats, so memory stays constant however long the
+process runs). All Streamlit sessions in the process feed the same
+metrics. snapshot() returns them; dump() renders them as JSON.
+
+Off by default. Set BRA_INSTRUMENT=1 (or call enable()); while off,
+timed() hands back a shared no-op and an instrumented function costs one
+flag check per call. With BRA_INSTRUMENT_DUMP=<path> the JSON is also
+written when the process exits.
+
+The app shows the metrics on a diagnostics page that is not in the nav.
+Without BRA_DIAGNOSTICS_TOKEN, ?diagnostics opens it read-only (table
+and JSON download). With the token set, only ?diagnostics=<token> opens
+it, and only then can collection be switched on / off or the metrics
+reset, since both act on every session in the process.
+"""
+
+import atexit
+import functools
+import hmac
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from cohort_stats import P2Quantile
+
+ENV_VAR       = "BRA_INSTRUMENT"
+DUMP_ENV_VAR  = "BRA_INSTRUMENT_DUMP"
+TOKEN_ENV_VAR = "BRA_DIAGNOSTICS_TOKEN"
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+_lock    = threading.Lock()
+_metrics = {}
+_state   = {
+    "enabled": os.environ.get(ENV_VAR, "").lower() not in ("", "0", "false", "no"),
+    "since":   time.time(),
+}
+
+
+# ── Aggregation ───────────────────────────────────────────────────────────────
+class Metric:
+    """Count / total / max plus P² quantile sketches for one name, in seconds."""
+
+    __slots__ = ("count", "total", "max", "sketches")
+
+    def __init__(self):
+        self.count    = 0
+        self.total    = 0.0
+        self.max      = 0.0
+        self.sketches = [P2Quantile(q) for q in QUANTILES]
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max    = max(self.max, seconds)
+        for sketch in self.sketches:
+            sketch.add(seconds)
+
+    def summary(self) -> dict:
+        out = {
+            "count":    self.count,
+            "total_ms": round(self.total * 1e3, 3),
+            "mean_ms":  round(self.total / self.count * 1e3, 3),
+            "max_ms":   round(self.max * 1e3, 3),
+        }
+        for q, sketch in zip(QUANTILES, self.sketches):
+            out[f"p{q * 100:g}_ms"] = round(sketch.value() * 1e3, 3)
+        return out
+
+
+def record(name: str, seconds: float):
+    """Adds one sample (seconds) under `name`, if collection is on."""
+    if not _state["enabled"]:
+        return
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Metric()
+        metric.add(seconds)
+
+
+# ── Timers ────────────────────────────────────────────────────────────────────
+class Span:
+    """Started on creation; stop() (or leaving the with-block) records it."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name  = name
+        self.start = time.perf_counter()
+
+    def stop(self) -> float:
+        elapsed = time.perf_counter() - self.start
+        record(self.name, elapsed)
+        return elapsed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def stop(self) -> float:
+        return 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def timed(name: str):
+    """A running Span for `name`, or a shared no-op while collection is off."""
+    return Span(name) if _state["enabled"] else _NO_SPAN
+
+
+def instrument(fn=None, name: str = None):
+    """
+    Wraps a function so each call is timed under "call/<function name>"
+    (or `name`). Usable as instrument(fn) or as a decorator. The check for
+    whether collection is on happens per call, so wrapping at import time
+    is fine.
+    """
+    if fn is None:
+        return lambda f: instrument(f, name)
+    label = name or f"call/{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _state["enabled"]:
+            return fn(*args, **kwargs)
+        with Span(label):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# ── Control / export ──────────────────────────────────────────────────────────
+def enabled() -> bool:
+    return _state["enabled"]
+
+
+def enable(on: bool = True):
+    _state["enabled"] = bool(on)
+
+
+def reset():
+    """Drops every metric; collection keeps its on / off state."""
+    with _lock:
+        _metrics.clear()
+        _state["since"] = time.time()
+
+
+def snapshot() -> dict:
+    """{name: summary} for every metric, largest total time first."""
+    with _lock:
+        rows = {name: metric.summary() for name, metric in _metrics.items()}
+    return dict(sorted(rows.items(), key=lambda kv: kv[1]["total_ms"], reverse=True))
+
+
+def dump(path: str = None) -> str:
+    """
+    Metrics as a JSON document; also written to `path` when given.
+    """
+    document = json.dumps({
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "since":        datetime.fromtimestamp(_state["since"], timezone.utc).isoformat(timespec="seconds"),
+        "pid":          os.getpid(),
+        "enabled":      _state["enabled"],
+        "metrics":      snapshot(),
+    }, indent=2)
+    if path:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(document)
+        os.replace(tmp, path)
+    return document
+
+
+def diagnostics_allowed(value) -> bool:
+    """Whether a ?diagnostics query value opens the diagnostics page."""
+    if value is None:
+        return False
+    token = os.environ.get(TOKEN_ENV_VAR)
+    return not token or hmac.compare_digest(str(value), token)
+
+
+def diagnostics_controls_allowed() -> bool:
+    """
+    Whether the diagnostics page may change process-wide state (collection
+    on / off, reset). Only with a configured token, which
+    diagnostics_allowed() has then already checked.
+    """
+    return bool(os.environ.get(TOKEN_ENV_VAR))
+
+
+if os.environ.get(DUMP_ENV_VAR):
+    atexit.register(dump, os.environ[DUMP_ENV_VAR])
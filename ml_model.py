@@ -1,7 +1,11 @@
-import pandas as pd
-import streamlit as st
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.preprocessing import LabelEncoder
+import json
+import os
+import pickle
+import sys
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from reference_data import SOURCE_FILE, load, load_sector_allocation, sector_columns, source_hash
 
 # --------------------------------------------------
 # AGE LABEL MAPPING
@@ -17,27 +21,72 @@ AGE_MAP = {
 }
 
 # --------------------------------------------------
-# LOAD, TRAIN & CACHE MODEL
+# MODEL ARTIFACT
+# The fitted tree + encoders are pickled to ARTIFACT_PATH,
+# tagged with a hash of the training workbook. Serving
+# processes load the pickle; they retrain (and rewrite it)
+# only when the workbook hash, MODEL_FORMAT or the
+# scikit-learn version or the selected candidate no
+# longer match.
+# Only load artifacts this module wrote — pickle runs code.
+# The tags (ARTIFACT_META) are pickled ahead of the bundle,
+# so they can be checked without unpickling the model.
 # --------------------------------------------------
-@st.cache_resource
-def _load_model():
-    df = pd.read_excel("Stock_Sector_Allocation.xlsx", header=2)
+ARTIFACT_DIR  = "artifacts"
+ARTIFACT_PATH = os.path.join(ARTIFACT_DIR, "sector_model.pkl")
+ARTIFACT_META = ("candidate", "source_hash", "model_format", "sklearn_version", "trained_at")
+
+# --------------------------------------------------
+# LOOKUP TABLE
+# The model's whole input space is age group × gender,
+# so its decisions are exported to a JSON table
+# {age: {gender: sector}} that predict_sector serves
+# from — no scikit-learn at runtime. Same tags as the
+# artifact, plus the artifact's trained_at / scikit-learn
+# version; rebuilt from the model when they go stale or
+# the artifact on disk is not the one it came from.
+# --------------------------------------------------
+LOOKUP_PATH = os.path.join(ARTIFACT_DIR, "sector_lookup.json")
+NO_PREDICTION = "No prediction available"
+
+# Pseudo-respondents drawn from the overall sector mix that every
+# probability estimate is shrunk towards (some cohorts have 2 rows)
+PROBA_SMOOTHING = 1.0
 
-    df.columns = df.columns.str.replace(" (%)", "", regex=False)
-    df.columns = df.columns.str.strip()
+# Bump when the training code changes in a way that alters the model,
+# or the artifact layout changes (4: tag header ahead of the bundle)
+MODEL_FORMAT = 4
 
-    df = df.rename(columns={
-        df.columns[1]: "Gender",
-        df.columns[2]: "Age"
-    })
+# Which model_selection candidate is trained; model_selection.py promotes
+# a new one by writing SELECTION_PATH
+SELECTION_PATH    = os.path.join(ARTIFACT_DIR, "model_selection.json")
+DEFAULT_CANDIDATE = "decision_tree"
 
-    non_sector_cols = ["Gender", "Age"]
-    sector_columns = [
-        col for col in df.columns
-        if col not in non_sector_cols and col != df.columns[0]
-    ]
 
-    df["Preferred Sector"] = df[sector_columns].idxmax(axis=1)
+def selected_candidate() -> str:
+    try:
+        with open(SELECTION_PATH) as f:
+            return json.load(f).get("promoted") or DEFAULT_CANDIDATE
+    except (FileNotFoundError, json.JSONDecodeError):
+        return DEFAULT_CANDIDATE
+
+
+# --------------------------------------------------
+# TRAINING
+# pandas / scikit-learn are imported on first use, not at module import
+# --------------------------------------------------
+def load_training_data(path: str = SOURCE_FILE) -> dict:
+    """
+    Returns
+    -------
+    dict: X (Age_encoded, Gender_encoded), y (encoded preferred sector),
+    le_age / le_gender / le_sector and key_counts ({age: {gender: rows}}).
+    """
+    from sklearn.preprocessing import LabelEncoder
+
+    # Same normalised frame sector_analysis reads; copied because columns are added below
+    df = (load_sector_allocation() if path == SOURCE_FILE else load(path)).copy()
+    df["Preferred Sector"] = df[sector_columns(df)].idxmax(axis=1)
 
     le_age    = LabelEncoder()
     le_gender = LabelEncoder()
@@ -47,27 +96,392 @@ def _load_model():
     df["Gender_encoded"] = le_gender.fit_transform(df["Gender"])
     df["Sector_encoded"] = le_sector.fit_transform(df["Preferred Sector"])
 
-    X = df[["Age_encoded", "Gender_encoded"]]
-    y = df["Sector_encoded"]
+    # Training respondents per (age, gender): the weight behind each predict_proba row
+    key_counts = {}
+    for (age, gender), n in df.groupby(["Age", "Gender"]).size().items():
+        key_counts.setdefault(str(age), {})[str(gender)] = int(n)
+
+    return {
+        "X":          df[["Age_encoded", "Gender_encoded"]],
+        "y":          df["Sector_encoded"],
+        "le_age":     le_age,
+        "le_gender":  le_gender,
+        "le_sector":  le_sector,
+        "key_counts": key_counts,
+    }
+
+
+def train_model(path: str = SOURCE_FILE, candidate: str = None) -> dict:
+    import sklearn
+    from model_selection import build_candidate
+
+    candidate = candidate or selected_candidate()
+    data      = load_training_data(path)
+
+    model = build_candidate(candidate)
+    model.fit(data["X"], data["y"])
+
+    return {
+        "model":           model,
+        "candidate":       candidate,
+        "le_age":          data["le_age"],
+        "le_gender":       data["le_gender"],
+        "le_sector":       data["le_sector"],
+        "key_counts":      data["key_counts"],
+        "source_hash":     source_hash(path),
+        "model_format":    MODEL_FORMAT,
+        "sklearn_version": sklearn.__version__,
+        "trained_at":      datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save_artifact(bundle: dict, path: str = ARTIFACT_PATH):
+    # Write-then-rename so a concurrent reader never sees a partial pickle
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump({key: bundle[key] for key in ARTIFACT_META}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_artifact(path: str = ARTIFACT_PATH) -> dict | None:
+    try:
+        with open(path, "rb") as f:
+            first = pickle.load(f)
+            # Format 3 and older hold just the bundle (and are stale)
+            return first if "model" in first else pickle.load(f)
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
 
-    model = DecisionTreeClassifier(random_state=42)
-    model.fit(X, y)
+def load_artifact_meta(path: str = ARTIFACT_PATH) -> dict | None:
+    """The artifact's ARTIFACT_META tags, read without unpickling the model."""
+    try:
+        with open(path, "rb") as f:
+            first = pickle.load(f)
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    return {key: first.get(key) for key in ARTIFACT_META}
+
+
+def _sklearn_version() -> str | None:
+    # From the package metadata, so checking tags does not import scikit-learn
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return version("scikit-learn")
+    except PackageNotFoundError:
+        return None
+
+
+def _artifact_is_current(bundle: dict | None, expected_hash: str | None) -> bool:
+    if not bundle or bundle.get("model_format") != MODEL_FORMAT:
+        return False
+    if bundle.get("candidate") != selected_candidate():
+        return False
+    if bundle.get("sklearn_version") != _sklearn_version():
+        return False
+    # Without the workbook (e.g. a slim deployment) the artifact is all there is
+    return expected_hash is None or bundle.get("source_hash") == expected_hash
 
-    return model, le_age, le_gender, le_sector
 
 # --------------------------------------------------
-# PREDICTION FUNCTION
+# LOAD & CACHE MODEL
 # --------------------------------------------------
-def predict_sector(age, gender):
-    model, le_age, le_gender, le_sector = _load_model()
+@lru_cache(maxsize=1)
+def _load_bundle() -> dict:
+    expected = source_hash()
+    bundle   = load_artifact()
+    if _artifact_is_current(bundle, expected):
+        return bundle
+
+    bundle = train_model()
+    try:
+        save_artifact(bundle)
+    except OSError:
+        pass    # read-only deployment: serve the freshly trained model from memory
+    return bundle
 
-    # Convert "18-25 years" → "18-25" to match training data
-    age_key = AGE_MAP.get(age, age)
 
+def _load_model():
+    bundle = _load_bundle()
+    return bundle["model"], bundle["le_age"], bundle["le_gender"], bundle["le_sector"]
+
+
+def _predict_with_model(loaded, age_key, gender):
+    # The fitted model itself (as returned by _load_model); used to verify the lookup table
+    import pandas as pd
+
+    model, le_age, le_gender, le_sector = loaded
     try:
         age_enc    = le_age.transform([age_key])[0]
         gender_enc = le_gender.transform([gender])[0]
-        pred       = model.predict([[age_enc, gender_enc]])[0]
-        return le_sector.inverse_transform([pred])[0]
     except ValueError:
-        return "No prediction available"
+        return NO_PREDICTION
+    X    = pd.DataFrame([[age_enc, gender_enc]], columns=["Age_encoded", "Gender_encoded"])
+    pred = model.predict(X)[0]
+    return le_sector.inverse_transform([pred])[0]
+
+
+def export_lookup(bundle: dict) -> dict:
+    """Enumerates every (age, gender) the encoders know into a lookup table."""
+    import pandas as pd
+
+    model, le_age, le_gender, le_sector = bundle["model"], bundle["le_age"], bundle["le_gender"], bundle["le_sector"]
+    grid = [(a, g) for a in range(len(le_age.classes_)) for g in range(len(le_gender.classes_))]
+    X    = pd.DataFrame(grid, columns=["Age_encoded", "Gender_encoded"])
+    sectors = le_sector.inverse_transform(model.predict(X))
+    probas  = model.predict_proba(X)
+
+    table, proba, counts = {}, {}, {}
+    for (a, g), sector, p in zip(grid, sectors, probas):
+        age, gender = str(le_age.classes_[a]), str(le_gender.classes_[g])
+        table.setdefault(age, {})[gender] = str(sector)
+        proba.setdefault(age, {})[gender] = [round(float(v), 6) for v in p]
+        counts.setdefault(age, {})[gender] = bundle["key_counts"].get(age, {}).get(gender, 0)
+    return {
+        "table":           table,
+        "sectors":         [str(s) for s in le_sector.classes_],
+        "proba":           proba,
+        "counts":          counts,
+        "candidate":       bundle["candidate"],
+        "source_hash":     bundle["source_hash"],
+        "model_format":    bundle["model_format"],
+        "trained_at":      bundle["trained_at"],
+        "sklearn_version": bundle.get("sklearn_version"),
+    }
+
+
+def save_lookup(lookup: dict, path: str = LOOKUP_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(lookup, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load_lookup(path: str = LOOKUP_PATH) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _lookup_is_current(lookup: dict | None, expected_hash: str | None, artifact: dict | None) -> bool:
+    if not lookup or lookup.get("model_format") != MODEL_FORMAT:
+        return False
+    if lookup.get("candidate") != selected_candidate():
+        return False
+    if expected_hash is not None and lookup.get("source_hash") != expected_hash:
+        return False
+    # Must come from the artifact on disk, and that artifact must still be
+    # current (else _load_bundle retrains it); a lookup-only deployment has no artifact
+    if artifact is None:
+        return True
+    return (_artifact_is_current(artifact, expected_hash)
+            and (lookup.get("trained_at"), lookup.get("sklearn_version"))
+            == (artifact["trained_at"], artifact["sklearn_version"]))
+
+
+@lru_cache(maxsize=1)
+def _load_lookup() -> dict:
+    expected = source_hash()
+    lookup   = load_lookup()
+    if _lookup_is_current(lookup, expected, load_artifact_meta()):
+        return lookup
+
+    lookup = export_lookup(_load_bundle())
+    try:
+        save_lookup(lookup)
+    except OSError:
+        pass
+    return lookup
+
+
+def clear_model_cache():
+    """Forget the loaded model and lookup table (e.g. after the workbook changed)."""
+    _load_bundle.cache_clear()
+    _load_lookup.cache_clear()
+    _sector_ranking.cache_clear()
+
+
+def verify_lookup(lookup: dict | None = None) -> list:
+    """
+    Checks the lookup table (labels and probabilities) against the live
+    model for every age group and gender it knows, plus the app labels in
+    AGE_MAP, and that it was exported from that model's artifact.
+
+    Returns
+    -------
+    list of (age, gender, table answer, model answer) mismatches; empty when
+    consistent. A table from another artifact is reported as ("*", "*", …)
+    with the two trained_at stamps.
+    """
+    import pandas as pd
+
+    lookup = lookup or _load_lookup()
+    loaded = _load_model()
+    model, le_age, le_gender, _ = loaded
+    ages    = [str(a) for a in le_age.classes_] + list(AGE_MAP)
+    genders = [str(g) for g in le_gender.classes_]
+
+    mismatches = []
+    trained_at = _load_bundle()["trained_at"]
+    if lookup.get("trained_at") != trained_at:
+        mismatches.append(("*", "*", f"trained {lookup.get('trained_at')}", f"trained {trained_at}"))
+    for age in ages:
+        for gender in genders:
+            expected = _predict_with_model(loaded, AGE_MAP.get(age, age), gender)
+            actual   = _lookup_table_predict(lookup["table"], age, gender)
+            if actual != expected:
+                mismatches.append((age, gender, actual, expected))
+
+    # Exported probabilities against predict_proba, cell by cell
+    for age, row in lookup.get("proba", {}).items():
+        for gender, stored in row.items():
+            X    = pd.DataFrame([[le_age.transform([age])[0], le_gender.transform([gender])[0]]],
+                                columns=["Age_encoded", "Gender_encoded"])
+            live = model.predict_proba(X)[0]
+            if max(abs(a - b) for a, b in zip(stored, live)) > 1e-6:
+                mismatches.append((age, gender, "proba", "predict_proba"))
+    return mismatches
+
+
+def version_tag(meta: dict) -> str:
+    """"<candidate>-v<format>-<workbook hash>" for an artifact or lookup table."""
+    return f"{meta.get('candidate', DEFAULT_CANDIDATE)}-v{meta['model_format']}-{meta['source_hash'] or 'unknown'}"
+
+
+def model_version() -> str:
+    """Identifier of the model being served, e.g. "decision_tree-v4-3f2a9c01b7de"."""
+    return version_tag(_load_lookup())
+
+# --------------------------------------------------
+# PREDICTION FUNCTION
+# --------------------------------------------------
+def _lookup_table_predict(table, age, gender):
+    # Convert "18-25 years" → "18-25" to match training data
+    age_key = AGE_MAP.get(age, age)
+    return table.get(age_key, {}).get(gender, NO_PREDICTION)
+
+
+def predict_sector(age, gender):
+    return _lookup_table_predict(_load_lookup()["table"], age, gender)
+
+
+@lru_cache(maxsize=256)
+def _sector_ranking(age_key, gender) -> tuple:
+    lookup  = _load_lookup()
+    sectors = lookup["sectors"]
+
+    # Expected respondents per sector for a set of (age, gender) cells: n × predict_proba
+    def expected(cells):
+        total = [0.0] * len(sectors)
+        n = 0
+        for age, g in cells:
+            weight = lookup["counts"][age][g]
+            for i, p in enumerate(lookup["proba"][age][g]):
+                total[i] += weight * p
+            n += weight
+        return total, n
+
+    every = [(a, g) for a in lookup["proba"] for g in lookup["proba"][a]]
+    prior_counts, prior_n = expected(every)
+    prior = [c / prior_n for c in prior_counts] if prior_n else [1 / len(sectors)] * len(sectors)
+
+    # Unseen demographics fall back to the cells that match on what is known
+    known_age    = age_key in lookup["proba"]
+    known_gender = any(gender in lookup["proba"][a] for a in lookup["proba"])
+    if known_age and gender in lookup["proba"][age_key]:
+        basis, cells = "model", [(age_key, gender)]
+    elif known_age:
+        basis, cells = "age group", [(age_key, g) for g in lookup["proba"][age_key]]
+    elif known_gender:
+        basis, cells = "gender", [(a, gender) for a in lookup["proba"] if gender in lookup["proba"][a]]
+    else:
+        basis, cells = "overall", every
+
+    counts, n = expected(cells)
+    smoothed  = [(c + PROBA_SMOOTHING * p) / (n + PROBA_SMOOTHING) for c, p in zip(counts, prior)]
+    ranking   = tuple(sorted(zip(sectors, smoothed), key=lambda sp: sp[1], reverse=True))
+    return ranking, basis, n
+
+
+def predict_sector_proba(age, gender, top_k: int = None) -> dict:
+    """
+    Ranked sector distribution for a demographic.
+
+    Parameters
+    ----------
+    age : str
+        App ("18-25 years") or short ("18-25") age label.
+    gender : str
+    top_k : int, optional
+        Keep only the k most likely sectors.
+
+    Returns
+    -------
+    dict:
+        ranking — [(sector, probability), …], most likely first
+        basis   — "model", or the fallback used for an unseen demographic:
+                  "age group", "gender" or "overall"
+        n       — training respondents behind the estimate
+    Probabilities are the model's predict_proba shrunk towards the overall
+    sector mix by PROBA_SMOOTHING pseudo-respondents. Cached per key.
+    """
+    ranking, basis, n = _sector_ranking(AGE_MAP.get(age, age), gender)
+    return {"ranking": list(ranking[:top_k] if top_k else ranking), "basis": basis, "n": n}
+
+# --------------------------------------------------
+# COMMAND LINE
+#   python ml_model.py train [--force]   fit and write the artifact + lookup table
+#   python ml_model.py version           show the artifact / workbook hashes
+#   python ml_model.py verify            check the lookup table against the model
+# --------------------------------------------------
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sector predictor model artifact")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="fit the model and write " + ARTIFACT_PATH)
+    train.add_argument("--force", action="store_true", help="retrain even if the artifact is current")
+    sub.add_parser("version", help="show the artifact and workbook hashes")
+    sub.add_parser("verify", help="check the lookup table against the live model")
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        mismatches = verify_lookup()
+        for age, gender, actual, expected in mismatches:
+            print(f"MISMATCH {age} / {gender}: table {actual!r}, model {expected!r}")
+        print(f"{model_version()}: {'consistent' if not mismatches else f'{len(mismatches)} mismatch(es)'}")
+        sys.exit(1 if mismatches else 0)
+
+    expected = source_hash()
+    bundle   = load_artifact()
+
+    if args.command == "version":
+        if bundle is None:
+            print(f"no artifact at {ARTIFACT_PATH}; workbook {expected}")
+            sys.exit(1)
+        state = "current" if _artifact_is_current(bundle, expected) else "STALE"
+        print(f"{version_tag(bundle)} ({state}; trained {bundle['trained_at']}, "
+              f"scikit-learn {bundle['sklearn_version']}); workbook {expected}")
+        if state != "current":
+            sys.exit(1)
+        return
+
+    if expected is None:
+        print(f"error: {SOURCE_FILE} not found", file=sys.stderr)
+        sys.exit(2)
+    if not args.force and _artifact_is_current(bundle, expected) and _lookup_is_current(load_lookup(), expected, bundle):
+        print(f"artifact is current: {version_tag(bundle)}")
+        return
+    bundle = train_model()
+    save_artifact(bundle)
+    save_lookup(export_lookup(bundle))
+    print(f"wrote {ARTIFACT_PATH} and {LOOKUP_PATH}: {version_tag(bundle)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+model_selection.py
+
+Sector Model Selection
+----------------------
+Cross-validates candidate sector predictors and promotes the best one
+that fits the serving latency budget:
+
+    python model_selection.py                          # evaluate, promote, retrain artifacts
+    python model_selection.py --dry-run                # evaluate only
+    python model_selection.py --latency-budget-ms 1 --workers 4
+
+Every candidate is an estimator (or pipeline) over the same two inputs
+ml_model trains on — [Age_encoded, Gender_encoded] — so the artifact,
+lookup-table export and verification work unchanged. A candidate is a
+model plus a feature set; names are "<model>" for both features and
+"<model>@<features>" otherwise (DEFAULT_CANDIDATE is "decision_tree",
+the original model).
+
+Each candidate is scored in its own worker process on the same shuffled
+folds, recording accuracy (mean / std) and fit time. Latency is measured
+afterwards, one candidate at a time in this process: single-row
+predict_proba on the model fitted to all the data, which is what the
+budget gates, and the time to export it to a lookup table (see
+measure_latency). Among the candidates within budget, those whose
+accuracy is tied with the best within a standard error are in the
+running; the one currently served stays if it is among them, otherwise
+the steadiest across folds is promoted (see choose): its name is written to
+ml_model.SELECTION_PATH and the model artifact and lookup table are
+rebuilt with it. The full comparison goes to REPORT_PATH either way.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import repeat
+
+import ml_model
+
+REPORT_PATH = os.path.join(ml_model.ARTIFACT_DIR, "model_selection_report.json")
+
+DEFAULT_LATENCY_BUDGET_MS = 5.0
+DEFAULT_FOLDS             = 5
+LATENCY_CALLS             = 200
+EXPORT_CALLS              = 20
+
+FEATURE_SETS = {
+    "age+gender": ["Age_encoded", "Gender_encoded"],
+    "age":        ["Age_encoded"],
+    "gender":     ["Gender_encoded"],
+}
+
+
+# ── Candidates ────────────────────────────────────────────────────────────────
+# model name → (factory, one-hot encode the inputs?)
+
+def _decision_tree():
+    from sklearn.tree import DecisionTreeClassifier
+    return DecisionTreeClassifier(random_state=42)
+
+
+def _decision_tree_depth3():
+    from sklearn.tree import DecisionTreeClassifier
+    return DecisionTreeClassifier(max_depth=3, random_state=42)
+
+
+def _random_forest():
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(n_estimators=100, random_state=42)
+
+
+def _logistic():
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(max_iter=1000)
+
+
+def _naive_bayes():
+    from sklearn.naive_bayes import MultinomialNB
+    return MultinomialNB()
+
+
+def _majority():
+    from sklearn.dummy import DummyClassifier
+    return DummyClassifier(strategy="prior")
+
+
+MODELS = {
+    "decision_tree":        (_decision_tree,        False),
+    "decision_tree_depth3": (_decision_tree_depth3, False),
+    "random_forest":        (_random_forest,        False),
+    "logistic_onehot":      (_logistic,             True),
+    "naive_bayes_onehot":   (_naive_bayes,          True),
+    "majority":             (_majority,             False),
+}
+
+
+def candidate_name(model: str, features: str) -> str:
+    return model if features == "age+gender" else f"{model}@{features}"
+
+
+CANDIDATES = [candidate_name(m, f) for m in MODELS for f in FEATURE_SETS]
+
+
+def build_candidate(name: str):
+    """
+    Unfitted estimator for a candidate name. Takes X with columns
+    Age_encoded, Gender_encoded; the full-feature, non-one-hot
+    candidates are bare estimators, the rest are pipelines.
+    """
+    model, _, features = name.partition("@")
+    features = features or "age+gender"
+    if model not in MODELS or features not in FEATURE_SETS:
+        raise ValueError(f"Unknown candidate '{name}'. Expected one of: {', '.join(CANDIDATES)}")
+
+    factory, one_hot = MODELS[model]
+    columns = FEATURE_SETS[features]
+    if not one_hot and features == "age+gender":
+        return factory()
+
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    encode = OneHotEncoder(handle_unknown="ignore") if one_hot else "passthrough"
+    return Pipeline([
+        ("features", ColumnTransformer([("inputs", encode, columns)])),
+        ("model",    factory()),
+    ])
+
+
+# ── Evaluation ────────────────────────────────────────────────────────────────
+def evaluate_candidate(name: str, X, y, n_folds: int = DEFAULT_FOLDS) -> dict:
+    """
+    Cross-validates one candidate; runs in a worker process.
+
+    Returns
+    -------
+    dict: candidate, accuracy_mean, accuracy_std, fit_ms (median per fold).
+    """
+    from sklearn.model_selection import KFold
+
+    folds = KFold(n_splits=n_folds, shuffle=True, random_state=0)
+    accuracies, fit_times = [], []
+    for train, test in folds.split(X):
+        model = build_candidate(name)
+        start = time.perf_counter()
+        model.fit(X.iloc[train], y.iloc[train])
+        fit_times.append(time.perf_counter() - start)
+        accuracies.append(float((model.predict(X.iloc[test]) == y.iloc[test].to_numpy()).mean()))
+
+    return {
+        "candidate":     name,
+        "accuracy_mean": round(statistics.mean(accuracies), 4),
+        "accuracy_std":  round(statistics.pstdev(accuracies), 4),
+        "fit_ms":        round(statistics.median(fit_times) * 1e3, 3),
+    }
+
+
+def measure_latency(name: str, data: dict) -> dict:
+    """
+    Fits a candidate on all the data and times what differs between
+    candidates at serving time. Requests are answered from the exported
+    lookup table, which costs the same whatever model built it; the
+    model's own cost is paid when the table is (re)built and verified.
+    Runs in the parent process after the pool has shut down, so the
+    timings are not inflated by workers competing for the CPU.
+
+    Returns
+    -------
+    dict: predict_ms (median single-row predict_proba), export_ms (median
+    time to build the lookup table from the fitted model).
+    """
+    model = build_candidate(name)
+    model.fit(data["X"], data["y"])
+    bundle = {
+        "model":        model,
+        "candidate":    name,
+        "le_age":       data["le_age"],
+        "le_gender":    data["le_gender"],
+        "le_sector":    data["le_sector"],
+        "key_counts":   data["key_counts"],
+        "source_hash":  None,
+        "model_format": ml_model.MODEL_FORMAT,
+        "trained_at":   None,
+    }
+
+    row = data["X"].iloc[[0]]
+    model.predict_proba(row)                # warm-up
+    latencies = []
+    for _ in range(LATENCY_CALLS):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        latencies.append(time.perf_counter() - start)
+
+    exports = []
+    for _ in range(EXPORT_CALLS):
+        start = time.perf_counter()
+        ml_model.export_lookup(bundle)
+        exports.append(time.perf_counter() - start)
+
+    return {
+        "predict_ms": round(statistics.median(latencies) * 1e3, 4),
+        "export_ms":  round(statistics.median(exports) * 1e3, 3),
+    }
+
+
+def evaluate(candidates: list, n_folds: int = DEFAULT_FOLDS, workers: int = None) -> list:
+    """
+    Cross-validates every candidate across a process pool, then measures
+    latency serially; returns rows in candidate order.
+    """
+    data = ml_model.load_training_data()
+    X, y = data["X"], data["y"]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        results = [evaluate_candidate(name, X, y, n_folds) for name in candidates]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(evaluate_candidate, candidates, repeat(X), repeat(y), repeat(n_folds)))
+    return [{**row, **measure_latency(row["candidate"], data)} for row in results]
+
+
+def _tied(a: dict, b: dict, n_folds: int) -> bool:
+    # Mean accuracies within one standard error of their difference
+    margin = ((a["accuracy_std"] ** 2 + b["accuracy_std"] ** 2) / n_folds) ** 0.5
+    return abs(a["accuracy_mean"] - b["accuracy_mean"]) <= margin
+
+
+def choose(results: list, latency_budget_ms: float, n_folds: int = DEFAULT_FOLDS,
+           incumbent: str = None) -> dict | None:
+    """
+    Candidate to serve among those within the latency budget, or None.
+
+    Every eligible candidate whose accuracy is statistically tied with the
+    most accurate one is in the running. The incumbent (the model being
+    served) keeps its place if it is among them, so fold noise never
+    swaps the served model; otherwise the steadiest (lowest accuracy std)
+    wins, then the fastest.
+    """
+    eligible = [r for r in results if r["predict_ms"] <= latency_budget_ms]
+    if not eligible:
+        return None
+    best = max(eligible, key=lambda r: r["accuracy_mean"])
+    tied = [r for r in eligible if _tied(r, best, n_folds)]
+    for r in tied:
+        if r["candidate"] == incumbent:
+            return r
+    return min(tied, key=lambda r: (r["accuracy_std"], r["predict_ms"]))
+
+
+def _write_json(path: str, payload: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+
+def promote(winner: dict, report: dict):
+    """Records the winner as the selected candidate and rebuilds the artifacts with it."""
+    _write_json(ml_model.SELECTION_PATH, {"promoted": winner["candidate"], **report})
+    bundle = ml_model.train_model()
+    ml_model.save_artifact(bundle)
+    ml_model.save_lookup(ml_model.export_lookup(bundle))
+    ml_model.clear_model_cache()
+    return bundle
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", nargs="+", default=CANDIDATES, metavar="NAME")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--workers", type=int, default=None, help="evaluation processes (default: CPU count)")
+    parser.add_argument("--latency-budget-ms", type=float, default=DEFAULT_LATENCY_BUDGET_MS,
+                        help="max median single-row predict_proba time for promotion")
+    parser.add_argument("--dry-run", action="store_true", help="evaluate and report without promoting")
+    args = parser.parse_args(argv)
+
+    unknown = [c for c in args.candidates if c not in CANDIDATES]
+    if unknown:
+        parser.error(f"unknown candidate(s): {', '.join(unknown)}")
+
+    results = evaluate(args.candidates, args.folds, args.workers)
+    winner  = choose(results, args.latency_budget_ms, args.folds, ml_model.selected_candidate())
+
+    print(f"{'candidate':<34} {'accuracy':>9} {'± std':>7} {'fit ms':>8} {'export ms':>10} {'predict ms':>11}")
+    for r in sorted(results, key=lambda r: -r["accuracy_mean"]):
+        over = "  over budget" if r["predict_ms"] > args.latency_budget_ms else ""
+        mark = "  ← chosen" if winner and r["candidate"] == winner["candidate"] else ""
+        print(f"{r['candidate']:<34} {r['accuracy_mean']:>9.3f} {r['accuracy_std']:>7.3f} "
+              f"{r['fit_ms']:>8.2f} {r['export_ms']:>10.2f} {r['predict_ms']:>11.3f}{over}{mark}")
+
+    report = {
+        "evaluated_at":      datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "source_hash":       ml_model.source_hash(),
+        "folds":             args.folds,
+        "latency_budget_ms": args.latency_budget_ms,
+        "incumbent":         ml_model.selected_candidate(),
+        "winner":            winner["candidate"] if winner else None,
+        "results":           results,
+    }
+    _write_json(REPORT_PATH, report)
+
+    if winner is None:
+        print(f"\nNo candidate within {args.latency_budget_ms} ms; keeping {ml_model.selected_candidate()}.")
+        sys.exit(1)
+    if args.dry_run:
+        print(f"\nChosen: {winner['candidate']} (dry run, not promoted). Report: {REPORT_PATH}")
+        return
+
+    bundle = promote(winner, report)
+    mismatches = ml_model.verify_lookup()
+    print(f"\nPromoted {ml_model.version_tag(bundle)}; lookup table "
+          f"{'consistent' if not mismatches else f'has {len(mismatches)} mismatch(es)'}.")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+percentiles.py
+
+Population Percentiles
+----------------------
+Where a respondent's BFS and bias scores sit among everyone scored so far.
+
+Every survey score lives on a small fixed grid — BFS is a whole number
+0–60 and each bias score is a multiple of 1 / (4 × questions per bias) —
+so the population is kept as one fixed-bin histogram per field. Adding a
+respondent is one counter increment; a percentile lookup sums at most
+61 bins, independent of population size. Millions of respondents cost
+the same few hundred bytes.
+
+Percentiles are mid-rank: share of the population below the value plus
+half of those equal to it, in percent.
+
+The app's population is stored in POPULATION_PATH: read at start-up,
+written back after every completed assessment, and re-read when another
+process has changed it. Every read-modify-write of the file holds an
+exclusive lock on POPULATION_PATH + ".lock", so concurrent sessions and
+processes never drop each other's respondents. Historical respondents
+are folded in from bulk_score output:
+
+    python percentiles.py add scored.csv [more.csv …]   # each file counted once
+    python percentiles.py show
+    python bulk_score.py responses.csv scored.csv --population
+"""
+
+import json
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:     # Windows: threads in one process are still serialised by _persist
+    fcntl = None
+
+import numpy as np
+
+from survey_logic import BFS_MAX_SCORE, BIAS_PROJECTION, BIASES
+
+BFS_FIELD = "BFS"
+
+# Percentiles are not shown until the population is at least this large
+MIN_POPULATION = 30
+
+POPULATION_PATH   = os.path.join("artifacts", "population.json")
+POPULATION_FORMAT = 1
+
+# Rows per chunk when folding in a scored CSV
+SCORED_CHUNKSIZE = 200_000
+
+
+class ScoreHistogram:
+    """
+    Counts of values on the grid lo, lo + step, …, hi. Values are snapped
+    to the nearest grid point and clipped to [lo, hi].
+    """
+
+    __slots__ = ("lo", "step", "counts")
+
+    def __init__(self, lo: float, hi: float, step: float):
+        self.lo     = lo
+        self.step   = step
+        self.counts = np.zeros(int(round((hi - lo) / step)) + 1, dtype=np.int64)
+
+    def _bins(self, values) -> np.ndarray:
+        bins = np.rint((np.asarray(values, dtype=float) - self.lo) / self.step).astype(np.int64)
+        return np.clip(bins, 0, len(self.counts) - 1)
+
+    def add(self, value: float):
+        self.counts[self._bins(value)] += 1
+
+    def add_many(self, values):
+        self.counts += np.bincount(self._bins(values), minlength=len(self.counts))
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def percentile(self, value: float) -> float:
+        total = self.total
+        if total == 0:
+            return float("nan")
+        i = int(self._bins(value))
+        return float(100.0 * (self.counts[:i].sum() + 0.5 * self.counts[i]) / total)
+
+
+def _bias_step(n_questions: int) -> float:
+    # Mean of n normalised answers (multiples of 1/4) → multiples of 1/(4n)
+    return 1 / (4 * n_questions)
+
+
+class PercentileService:
+    """
+    One ScoreHistogram per field (BFS_FIELD plus every bias), fed with
+    generate_full_survey_analysis results, score_survey_batch frames or
+    bulk_score output files. Thread-safe; `version` increments on every
+    update. state() / load_state() round-trip it through JSON.
+    """
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._version = 0
+        self._sources = {}      # scored file → {"size", "mtime_ns", "rows"} already counted
+        self._fields  = {BFS_FIELD: ScoreHistogram(0, BFS_MAX_SCORE, 1)}
+        for bias, n in zip(BIASES, BIAS_PROJECTION.sum(axis=0)):
+            self._fields[bias] = ScoreHistogram(0, 1, _bias_step(int(n)))
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def population(self) -> int:
+        with self._lock:
+            return self._fields[BFS_FIELD].total
+
+    def update(self, analysis: dict):
+        """Adds one generate_full_survey_analysis result."""
+        behaviour = analysis["behavioral_bias_analysis"]
+        with self._lock:
+            self._fields[BFS_FIELD].add(behaviour["bfs_summary"]["bfs_score"])
+            for bias, entry in behaviour["bias_profile"].items():
+                if bias in self._fields:
+                    self._fields[bias].add(entry["score"])
+            self._version += 1
+
+    def update_scored(self, scored):
+        """Adds every row of a score_survey_batch frame (or a bulk_score output CSV)."""
+        scored = scored.dropna(subset=["BFS Score"])
+        with self._lock:
+            self._fields[BFS_FIELD].add_many(scored["BFS Score"].to_numpy(dtype=float))
+            for bias in BIASES:
+                self._fields[bias].add_many(scored[f"{bias} Score"].to_numpy(dtype=float))
+            self._version += 1
+
+    def add_scored_file(self, path: str, chunksize: int = SCORED_CHUNKSIZE) -> int:
+        """
+        Folds a bulk_score output CSV in, a chunk at a time. Returns the rows
+        added, or None if this exact file was added before. Raises ValueError if
+        a different file was added from the same path (counting it again
+        would double-count; rebuild with percentiles.py add --reset).
+        """
+        import pandas as pd
+
+        key  = os.path.abspath(path)
+        st   = os.stat(path)
+        seen = self._sources.get(key)
+        if seen is not None:
+            if (seen["size"], seen["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+                return None
+            raise ValueError(f"{path} changed since it was added to the population; rebuild with --reset")
+
+        rows    = 0
+        columns = ["BFS Score"] + [f"{bias} Score" for bias in BIASES]
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+            self.update_scored(chunk)
+            rows += int(chunk["BFS Score"].notna().sum())
+        with self._lock:
+            self._sources[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "rows": rows}
+        return rows
+
+    def percentile(self, field: str, value: float) -> float:
+        with self._lock:
+            return self._fields[field].percentile(value)
+
+    def rank(self, analysis: dict) -> dict:
+        """
+        Returns
+        -------
+        {BFS_FIELD: pct, bias: pct, …} for one generate_full_survey_analysis
+        result; NaN while the population is empty.
+        """
+        behaviour = analysis["behavioral_bias_analysis"]
+        with self._lock:
+            out = {BFS_FIELD: self._fields[BFS_FIELD].percentile(behaviour["bfs_summary"]["bfs_score"])}
+            for bias, entry in behaviour["bias_profile"].items():
+                if bias in self._fields:
+                    out[bias] = self._fields[bias].percentile(entry["score"])
+            return out
+
+    def state(self) -> dict:
+        with self._lock:
+            return {
+                "format":  POPULATION_FORMAT,
+                "fields":  {field: hist.counts.tolist() for field, hist in self._fields.items()},
+                "sources": dict(self._sources),
+            }
+
+    def load_state(self, state: dict):
+        """
+        Replaces the counts with a state() dict. Fields whose grid no longer
+        matches (the survey changed) start empty.
+        """
+        with self._lock:
+            for field, hist in self._fields.items():
+                counts = state.get("fields", {}).get(field)
+                hist.counts[:] = counts if counts is not None and len(counts) == len(hist.counts) else 0
+            self._sources = dict(state.get("sources", {}))
+            self._version += 1
+
+
+def save_population(service: PercentileService, path: str = POPULATION_PATH):
+    # Write-then-rename so a concurrent reader never sees a partial file
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(service.state(), f)
+    os.replace(tmp, path)
+
+
+def load_population(path: str = POPULATION_PATH) -> dict | None:
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return state if state.get("format") == POPULATION_FORMAT else None
+
+
+@contextmanager
+def _population_lock(path: str = POPULATION_PATH):
+    """Exclusive lock on `path` between processes, held for a read-modify-write."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+
+
+def add_to_stored_population(scored_paths, path: str = POPULATION_PATH, reset: bool = False) -> PercentileService:
+    """
+    Folds bulk_score output files into the population stored at `path`
+    (an empty one with reset=True) and writes it back. Files already
+    counted are skipped. Returns the updated population.
+    """
+    service = PercentileService()
+    with _population_lock(path):
+        state = None if reset else load_population(path)
+        if state is not None:
+            service.load_state(state)
+        for scored in scored_paths:
+            service.add_scored_file(scored)
+        save_population(service, path)
+    return service
+
+
+def _file_signature(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+# Process-wide population fed by the app's Manual Assessment and seeded
+# from POPULATION_PATH
+POPULATION  = PercentileService()
+_persist    = {"lock": threading.Lock(), "signature": None}
+
+
+def current_population(path: str = POPULATION_PATH) -> PercentileService:
+    """POPULATION, first re-read from `path` if the file changed since this process last read or wrote it."""
+    with _persist["lock"]:
+        signature = _file_signature(path)
+        if signature is not None and signature != _persist["signature"]:
+            state = load_population(path)
+            if state is not None:
+                POPULATION.load_state(state)
+            _persist["signature"] = signature
+    return POPULATION
+
+
+def record_respondent(analysis: dict, path: str = POPULATION_PATH):
+    """
+    Adds one generate_full_survey_analysis result to POPULATION and stores
+    it. The stored population is re-read under the file lock first, so
+    respondents recorded meanwhile by other processes are kept.
+    """
+    with _persist["lock"]:
+        recorded = False
+        try:
+            with _population_lock(path):
+                state = load_population(path)
+                if state is not None:
+                    POPULATION.load_state(state)
+                POPULATION.update(analysis)
+                recorded = True
+                save_population(POPULATION, path)
+                _persist["signature"] = _file_signature(path)
+        except OSError:
+            if not recorded:    # read-only deployment: the population lives in memory only
+                POPULATION.update(analysis)
+
+
+# --------------------------------------------------
+# COMMAND LINE
+#   python percentiles.py add scored.csv …    fold bulk_score output into the stored population
+#   python percentiles.py show                population size and sources
+# --------------------------------------------------
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stored respondent population for percentile ranks")
+    parser.add_argument("--path", default=POPULATION_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="add bulk_score output CSVs (each file is counted once)")
+    add.add_argument("scored", nargs="+")
+    add.add_argument("--reset", action="store_true", help="start from an empty population")
+    sub.add_parser("show", help="population size and the files it was built from")
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        try:
+            service = add_to_stored_population(args.scored, args.path, reset=args.reset)
+        except (ValueError, FileNotFoundError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            sys.exit(2)
+    else:
+        service = PercentileService()
+        state   = load_population(args.path)
+        if state is not None:
+            service.load_state(state)
+
+    print(f"{args.path}: {service.population:,} respondents")
+    for path, source in service.state()["sources"].items():
+        print(f"  {source['rows']:>12,}  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,21 +13,48 @@ Computes:
     4. Diversification score & concentration risk flags
     5. Bias-portfolio connections based on detected dominant bias
 
+Entry points:
+    analyse_portfolio        — one holdings DataFrame
+    analyse_portfolios_batch — many portfolios in one long table
+    analyse_portfolio_stream — holdings CSVs too large to load at once
+    LivePortfolio            — incremental re-valuation from holding deltas / price ticks
+    analyse_portfolio_cached — analyse_portfolio memoised on holdings content
+
 Fully rule-based — no external API or price feed needed.
 """
 
+import hashlib
+import heapq
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
 import pandas as pd
 
 # ── Expected columns ──────────────────────────────────────────────────────────
 REQUIRED_COLS = ["Stock", "Sector", "Quantity", "Buy Price (INR)", "Current Price (INR)"]
+NUMERIC_COLS  = ["Quantity", "Buy Price (INR)", "Current Price (INR)"]
+
+# Long-format batch uploads carry one extra column naming the portfolio
+PORTFOLIO_ID_COL = "Portfolio ID"
+
+# Sectors used across the app (same set as Stock_Sector_Allocation.xlsx)
+KNOWN_SECTORS = [
+    "Technology", "Healthcare", "Finance", "Energy", "Consumer Goods",
+    "Real Estate", "Utilities", "Industrials", "Materials", "Telecom",
+]
 
 # ── Bias → portfolio behaviour mapping ───────────────────────────────────────
 # For each bias, describes what pattern in the portfolio it may explain,
-# and what corrective action to take.
+# and what corrective action to take. Each "flag" rule reads the shared
+# statistics from portfolio_features(), so all rules cost one pass together.
 BIAS_PORTFOLIO_INSIGHTS = {
     "Confirmation Bias": {
         "pattern": "concentrated in sectors you follow closely",
-        "flag": lambda df: df["Sector"].value_counts().iloc[0] / len(df) > 0.5,
+        "flag": lambda f: f["top_sector_share"] > 0.5,
         "insight": (
             "Your portfolio is heavily concentrated in one or two sectors. "
             "Confirmation bias may be causing you to over-invest in sectors you follow "
@@ -37,7 +64,7 @@ BIAS_PORTFOLIO_INSIGHTS = {
     },
     "Anchoring": {
         "pattern": "holdings still held near buy price despite changed fundamentals",
-        "flag": lambda df: ((df["Return (%)"].abs() < 5)).sum() / len(df) > 0.4,
+        "flag": lambda f: f["n_within_5"] / f["n_holdings"] > 0.4,
         "insight": (
             "A significant portion of your holdings show near-zero returns. "
             "Anchoring bias may be causing you to hold positions simply because "
@@ -47,7 +74,7 @@ BIAS_PORTFOLIO_INSIGHTS = {
     },
     "Recency Bias": {
         "pattern": "overweight in recently trending sectors",
-        "flag": lambda df: df["Sector"].value_counts().iloc[0] / len(df) > 0.45,
+        "flag": lambda f: f["top_sector_share"] > 0.45,
         "insight": (
             "Your portfolio may be overweight in sectors that have performed well recently. "
             "Recency bias leads investors to extrapolate short-term trends into long-term expectations."
@@ -56,7 +83,7 @@ BIAS_PORTFOLIO_INSIGHTS = {
     },
     "Loss Aversion": {
         "pattern": "holding losing positions while selling winners",
-        "flag": lambda df: (df["Return (%)"] < -10).sum() >= 1,
+        "flag": lambda f: f["n_below_10"] >= 1,
         "insight": (
             "You have holdings with significant unrealised losses. "
             "Loss aversion often causes investors to hold losers too long to avoid "
@@ -66,7 +93,7 @@ BIAS_PORTFOLIO_INSIGHTS = {
     },
     "Overconfidence": {
         "pattern": "under-diversified portfolio with high concentration",
-        "flag": lambda df: len(df["Sector"].unique()) < 4,
+        "flag": lambda f: f["n_sectors"] < 4,
         "insight": (
             "Your portfolio spans few sectors, suggesting high conviction bets. "
             "Overconfidence bias leads investors to under-diversify, believing their "
@@ -76,7 +103,7 @@ BIAS_PORTFOLIO_INSIGHTS = {
     },
     "Herding": {
         "pattern": "holdings concentrated in widely discussed stocks",
-        "flag": lambda df: df["Sector"].value_counts().iloc[0] / len(df) > 0.4,
+        "flag": lambda f: f["top_sector_share"] > 0.4,
         "insight": (
             "Your portfolio shows sector concentration that may reflect following popular market trends. "
             "Herding bias leads investors to buy what everyone else is buying rather than "
@@ -86,7 +113,7 @@ BIAS_PORTFOLIO_INSIGHTS = {
     },
     "Disposition Effect": {
         "pattern": "selling winners early, holding losers",
-        "flag": lambda df: (df["Return (%)"] < 0).sum() > (df["Return (%)"] > 15).sum(),
+        "flag": lambda f: f["n_negative"] > f["n_above_15"],
         "insight": (
             "Your portfolio has more losing positions than strong gainers, which can indicate "
             "the disposition effect — the tendency to sell winners too quickly to lock in gains "
@@ -96,7 +123,7 @@ BIAS_PORTFOLIO_INSIGHTS = {
     },
     "Status Quo Bias": {
         "pattern": "portfolio unchanged, dominated by old holdings",
-        "flag": lambda df: len(df) < 5,
+        "flag": lambda f: f["n_holdings"] < 5,
         "insight": (
             "A small, potentially unchanged portfolio may reflect status quo bias — "
             "the tendency to keep existing investments simply because changing them feels uncomfortable."
@@ -105,7 +132,7 @@ BIAS_PORTFOLIO_INSIGHTS = {
     },
     "Framing Effect": {
         "pattern": "allocation decisions influenced by how returns are presented",
-        "flag": lambda df: df["Return (%)"].std() > 30,
+        "flag": lambda f: f["return_std"] > 30,
         "insight": (
             "High return variability across your holdings suggests decision-making may be "
             "influenced by how performance is framed — focusing on percentage gains on winners "
@@ -115,7 +142,7 @@ BIAS_PORTFOLIO_INSIGHTS = {
     },
     "Risk Sensitivity": {
         "pattern": "overly conservative allocation despite long time horizon",
-        "flag": lambda df: (df["Return (%)"].between(-5, 5)).sum() / len(df) > 0.5,
+        "flag": lambda f: f["n_between_5"] / f["n_holdings"] > 0.5,
         "insight": (
             "A large proportion of your holdings are near flat, suggesting a very conservative "
             "approach. High risk sensitivity may be causing you to avoid positions with "
@@ -125,7 +152,7 @@ BIAS_PORTFOLIO_INSIGHTS = {
     },
     "Emotional / Overtrading Bias": {
         "pattern": "fragmented portfolio with many small positions",
-        "flag": lambda df: len(df) > 15,
+        "flag": lambda f: f["n_holdings"] > 15,
         "insight": (
             "A very large number of holdings may indicate frequent buying driven by "
             "emotional reactions to market movements rather than a deliberate strategy."
@@ -134,20 +161,168 @@ BIAS_PORTFOLIO_INSIGHTS = {
     },
 }
 
+# ── Shared portfolio features for the bias rules ──────────────────────────────
+def _return_masks(ret) -> dict:
+    """Return-distribution conditions the rules count; shared by every analysis path."""
+    return {
+        "n_within_5":  np.abs(ret) < 5,
+        "n_between_5": (ret >= -5) & (ret <= 5),
+        "n_below_10":  ret < -10,
+        "n_negative":  ret < 0,
+        "n_above_15":  ret > 15,
+    }
+
+
+def portfolio_features(df: pd.DataFrame) -> dict:
+    """
+    Computes every statistic the BIAS_PORTFOLIO_INSIGHTS rules read, once.
+    `df` needs Sector and an unrounded Return (%) column.
+    """
+    return _features(df["Sector"].value_counts().to_numpy(), df["Return (%)"].to_numpy(dtype=float))
+
+
+def _features(sector_counts: np.ndarray, ret: np.ndarray) -> dict:
+    # sector_counts: holdings per sector, any order; zeros (unused categories) are ignored
+    sector_counts = sector_counts[sector_counts > 0]
+    n_holdings    = len(ret)
+
+    features = {
+        "n_holdings":       n_holdings,
+        "n_sectors":        len(sector_counts),
+        "top_sector_share": sector_counts.max() / n_holdings if len(sector_counts) else np.nan,
+        "return_std":       pd.Series(ret).std(),
+    }
+    features.update({name: int(mask.sum()) for name, mask in _return_masks(ret).items()})
+    return features
+
+
+def evaluate_bias_rules(features) -> dict:
+    """
+    Triggered status of every BIAS_PORTFOLIO_INSIGHTS rule in one call.
+
+    `features` is a portfolio_features() dict, or a DataFrame with one row per
+    portfolio and the same columns — then each value is a boolean Series.
+    """
+    triggered = {}
+    for bias, entry in BIAS_PORTFOLIO_INSIGHTS.items():
+        try:
+            hit = entry["flag"](features)
+            triggered[bias] = bool(hit) if np.ndim(hit) == 0 else hit
+        except Exception:
+            triggered[bias] = True  # default to showing insight if flag check fails
+    return triggered
+
+
+def build_bias_insight(dominant_bias: str, bias_matrix: dict) -> dict | None:
+    """Personalised bias-portfolio insight for `dominant_bias`, or None if unknown."""
+    if not dominant_bias or dominant_bias not in BIAS_PORTFOLIO_INSIGHTS:
+        return None
+    entry = BIAS_PORTFOLIO_INSIGHTS[dominant_bias]
+    return {
+        "bias":      dominant_bias,
+        "pattern":   entry["pattern"],
+        "triggered": bias_matrix.get(dominant_bias, True),
+        "insight":   entry["insight"],
+        "action":    entry["action"],
+    }
+
+
 # ── Diversification thresholds ────────────────────────────────────────────────
+# (min sectors, min holdings, level, color) — checked top to bottom
+DIVERSIFICATION_LEVELS = [
+    (5, 8, "Well diversified",       "good"),
+    (3, 5, "Moderately diversified", "moderate"),
+]
+CONCENTRATED_LEVEL = ("Concentrated — diversification risk", "poor")
+
+
 def _diversification_score(n_sectors: int, n_holdings: int) -> dict:
-    if n_sectors >= 5 and n_holdings >= 8:
-        level = "Well diversified"
-        color = "good"
-    elif n_sectors >= 3 and n_holdings >= 5:
-        level = "Moderately diversified"
-        color = "moderate"
-    else:
-        level = "Concentrated — diversification risk"
-        color = "poor"
+    level, color = CONCENTRATED_LEVEL
+    for min_sectors, min_holdings, lvl, clr in DIVERSIFICATION_LEVELS:
+        if n_sectors >= min_sectors and n_holdings >= min_holdings:
+            level, color = lvl, clr
+            break
     return {"level": level, "color": color, "n_sectors": n_sectors, "n_holdings": n_holdings}
 
 
+# ── Compact holdings representation ───────────────────────────────────────────
+def _sector_codes(sector: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """Integer sector codes (-1 = missing) and their labels; sorted like a groupby."""
+    if isinstance(sector.dtype, pd.CategoricalDtype):
+        return sector.cat.codes.to_numpy(), sector.cat.categories
+    return pd.factorize(sector, sort=True)
+
+
+def compact_holdings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Narrows a holdings frame's dtypes where it is lossless or bounded:
+    Sector becomes categorical, whole-number quantities the smallest integer
+    type, and the 0–100 weight column float32. Money columns stay float64.
+    Stock is left as a string column — names are nearly always unique, so a
+    categorical would only add a dictionary on top. Returns a new frame.
+
+    Columns that are already compact — as ingest_holdings returns them —
+    are left alone, so on ingested holdings this costs little more than
+    the dtype checks.
+    """
+    compact = {}
+    if not isinstance(df["Sector"].dtype, pd.CategoricalDtype):
+        compact["Sector"] = df["Sector"].astype("category")
+    qty = _compact_quantity(df["Quantity"])
+    if qty is not df["Quantity"]:
+        compact["Quantity"] = qty
+    if "Portfolio Weight (%)" in df.columns and df["Portfolio Weight (%)"].dtype != np.float32:
+        compact["Portfolio Weight (%)"] = df["Portfolio Weight (%)"].astype(np.float32)
+    return df.assign(**compact)
+
+
+def _compact_quantity(qty: pd.Series) -> pd.Series:
+    # Whole-number quantities as the smallest integer type; anything else unchanged
+    if pd.api.types.is_float_dtype(qty) and (qty % 1 == 0).all():
+        return pd.to_numeric(qty.astype("int64"), downcast="integer")
+    if pd.api.types.is_integer_dtype(qty) and qty.dtype.itemsize > 1:
+        narrowed = pd.to_numeric(qty, downcast="integer")
+        return narrowed if narrowed.dtype != qty.dtype else qty
+    return qty
+
+
+def memory_footprint(obj) -> int:
+    """
+    Approximate deep size in bytes of an analysis result, session state
+    mapping or any nested dict / list of DataFrames, Series and scalars.
+    """
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, Mapping):
+        return sys.getsizeof(obj) + sum(memory_footprint(k) + memory_footprint(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(memory_footprint(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+# ── Risk flag messages ────────────────────────────────────────────────────────
+FLAG_CONCENTRATION  = "High concentration: {sector} accounts for {pct:.1f}% of portfolio."
+FLAG_LOSSES         = "Significant losses (>20% down): {stocks}."
+FLAG_FEW_SECTORS    = "Portfolio spans fewer than 3 sectors — consider broader diversification."
+FLAG_SINGLE_HOLDING = "Single holding — extremely concentrated portfolio."
+
+# The loss flag names at most this many stocks, then "and N more"
+MAX_FLAGGED_STOCKS = 20
+
+
+def _losses_flag(stocks: list, n_losers: int = None) -> str:
+    # n_losers: total count when `stocks` holds only the first names
+    n_losers = len(stocks) if n_losers is None else n_losers
+    named    = ", ".join(stocks[:MAX_FLAGGED_STOCKS])
+    if n_losers > MAX_FLAGGED_STOCKS:
+        named += f" and {n_losers - MAX_FLAGGED_STOCKS:,} more"
+    return FLAG_LOSSES.format(stocks=named)
+
+
 # ── Main analysis function ────────────────────────────────────────────────────
 def analyse_portfolio(df: pd.DataFrame, dominant_bias: str = None) -> dict:
     """
@@ -167,38 +342,49 @@ def analyse_portfolio(df: pd.DataFrame, dominant_bias: str = None) -> dict:
         sector_alloc    — sector allocation Series (%)
         diversification — diversification assessment dict
         bias_insight    — personalised bias-portfolio connection (or None)
+        bias_matrix     — {bias: triggered} for every bias in BIAS_PORTFOLIO_INSIGHTS
+        features        — shared statistics the bias rules were evaluated on
         flags           — list of risk flag strings
     """
 
-    df = df.copy()
+    # Only the upload columns are copied; extra columns are left behind
+    df = df[REQUIRED_COLS].copy()
 
     # ── Clean numeric columns ─────────────────────────────────────────────────
-    for col in ["Quantity", "Buy Price (INR)", "Current Price (INR)"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+    # Typed columns (ingest_holdings output) are already numeric
+    for col in NUMERIC_COLS:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    df = df.dropna(subset=["Quantity", "Buy Price (INR)", "Current Price (INR)"])
+    df = df.dropna(subset=NUMERIC_COLS)
 
     # ── Per-holding calculations ──────────────────────────────────────────────
-    df["Invested Value (INR)"]  = df["Quantity"] * df["Buy Price (INR)"]
-    df["Current Value (INR)"]   = df["Quantity"] * df["Current Price (INR)"]
-    df["Gain / Loss (INR)"]     = df["Current Value (INR)"] - df["Invested Value (INR)"]
-    df["Return (%)"]            = ((df["Current Price (INR)"] - df["Buy Price (INR)"]) /
-                                    df["Buy Price (INR)"]) * 100
+    # Derived on plain float64 arrays, in place where possible; the display
+    # frame is assembled once at the end instead of column by column.
+    qty = df["Quantity"].to_numpy(dtype=float)
+    buy = df["Buy Price (INR)"].to_numpy(dtype=float)
+    cur = df["Current Price (INR)"].to_numpy(dtype=float)
+
+    invested = qty * buy
+    current  = qty * cur
+    gain     = np.subtract(current, invested)
+    ret      = np.subtract(cur, buy)
+    ret     /= buy
+    ret     *= 100
 
     # ── Portfolio-level summary ───────────────────────────────────────────────
-    total_invested = df["Invested Value (INR)"].sum()
-    total_current  = df["Current Value (INR)"].sum()
+    total_invested = invested.sum()
+    total_current  = current.sum()
     total_gain     = total_current - total_invested
     total_return   = ((total_current - total_invested) / total_invested * 100) if total_invested > 0 else 0
 
     # Weighted average return
-    df["Weight"]          = df["Current Value (INR)"] / total_current
-    weighted_return       = (df["Return (%)"] * df["Weight"]).sum()
+    weight          = current / total_current
+    weighted_return = (ret * weight).sum()
 
-    best_holding  = df.loc[df["Return (%)"].idxmax(), "Stock"]
-    worst_holding = df.loc[df["Return (%)"].idxmin(), "Stock"]
-    best_return   = df["Return (%)"].max()
-    worst_return  = df["Return (%)"].min()
+    stocks    = df["Stock"]
+    best_pos  = np.nanargmax(ret)
+    worst_pos = np.nanargmin(ret)
 
     summary = {
         "total_invested":  round(total_invested, 2),
@@ -207,20 +393,29 @@ def analyse_portfolio(df: pd.DataFrame, dominant_bias: str = None) -> dict:
         "total_return":    round(total_return, 2),
         "weighted_return": round(weighted_return, 2),
         "n_holdings":      len(df),
-        "best_holding":    best_holding,
-        "best_return":     round(best_return, 2),
-        "worst_holding":   worst_holding,
-        "worst_return":    round(worst_return, 2),
+        "best_holding":    stocks.iloc[best_pos],
+        "best_return":     round(ret[best_pos], 2),
+        "worst_holding":   stocks.iloc[worst_pos],
+        "worst_return":    round(ret[worst_pos], 2),
     }
 
     # ── Sector allocation ─────────────────────────────────────────────────────
-    sector_alloc = (
-        df.groupby("Sector")["Current Value (INR)"].sum() / total_current * 100
+    # Sector is factorised once (a categorical's own codes are reused) and the
+    # codes serve the allocation, the sector count, the rule features and
+    # the compact Sector column alike.
+    codes, sectors = _sector_codes(df["Sector"])
+    sector_count   = np.bincount(codes[codes >= 0], minlength=len(sectors))
+    sector_value   = np.bincount(codes[codes >= 0], weights=current[codes >= 0], minlength=len(sectors))
+    held           = sector_count > 0
+    sector_alloc   = (
+        pd.Series(sector_value[held], index=pd.Index(sectors[held], name="Sector"), name="Current Value (INR)")
+        / total_current * 100
     ).round(2).sort_values(ascending=False)
 
     # ── Diversification ───────────────────────────────────────────────────────
+    n_sectors       = int(held.sum())
     diversification = _diversification_score(
-        n_sectors=df["Sector"].nunique(),
+        n_sectors=n_sectors,
         n_holdings=len(df)
     )
 
@@ -228,31 +423,179 @@ def analyse_portfolio(df: pd.DataFrame, dominant_bias: str = None) -> dict:
     flags = []
     top_sector_pct = sector_alloc.iloc[0] if len(sector_alloc) > 0 else 0
     if top_sector_pct > 50:
-        flags.append(f"High concentration: {sector_alloc.index[0]} accounts for {top_sector_pct:.1f}% of portfolio.")
-    if (df["Return (%)"] < -20).any():
-        bad = df[df["Return (%)"] < -20]["Stock"].tolist()
-        flags.append(f"Significant losses (>20% down): {', '.join(bad)}.")
-    if df["Sector"].nunique() < 3:
-        flags.append("Portfolio spans fewer than 3 sectors — consider broader diversification.")
+        flags.append(FLAG_CONCENTRATION.format(sector=sector_alloc.index[0], pct=top_sector_pct))
+    if (ret < -20).any():
+        bad = stocks[ret < -20].tolist()
+        flags.append(_losses_flag(bad))
+    if n_sectors < 3:
+        flags.append(FLAG_FEW_SECTORS)
     if len(df) == 1:
-        flags.append("Single holding — extremely concentrated portfolio.")
+        flags.append(FLAG_SINGLE_HOLDING)
 
     # ── Bias-portfolio insight ────────────────────────────────────────────────
-    bias_insight = None
-    if dominant_bias and dominant_bias in BIAS_PORTFOLIO_INSIGHTS:
-        entry = BIAS_PORTFOLIO_INSIGHTS[dominant_bias]
-        triggered = False
-        try:
-            triggered = entry["flag"](df)
-        except Exception:
-            triggered = True  # default to showing insight if flag check fails
-        bias_insight = {
-            "bias":      dominant_bias,
-            "pattern":   entry["pattern"],
-            "triggered": triggered,
-            "insight":   entry["insight"],
-            "action":    entry["action"],
-        }
+    # Every rule is evaluated from one shared feature pass, so the full
+    # bias → portfolio matrix costs about as much as a single rule check.
+    features     = _features(sector_count, ret)
+    bias_matrix  = evaluate_bias_rules(features)
+    bias_insight = build_bias_insight(dominant_bias, bias_matrix)
+
+    # ── Round display columns (in place) and assemble the compact frame ───────
+    for values in (invested, current, gain, ret):
+        np.round(values, 2, out=values)
+    weight *= 100
+    np.round(weight, 2, out=weight)
+
+    if not held.all():
+        # Drop sectors nobody holds, as the categorical would list them
+        codes   = np.where(codes >= 0, (np.cumsum(held) - 1)[codes], -1)
+        sectors = sectors[held]
+
+    holdings = compact_holdings(pd.DataFrame({
+        "Stock":                df["Stock"].array,
+        "Sector":               pd.Categorical.from_codes(codes, categories=sectors, validate=False),
+        "Quantity":             df["Quantity"].array,
+        "Buy Price (INR)":      df["Buy Price (INR)"].array,
+        "Current Price (INR)":  df["Current Price (INR)"].array,
+        "Invested Value (INR)": invested,
+        "Current Value (INR)":  current,
+        "Gain / Loss (INR)":    gain,
+        "Return (%)":           ret,
+        "Portfolio Weight (%)": weight.astype(np.float32),
+    }, index=df.index))
+
+    return {
+        "holdings":        holdings,
+        "summary":         summary,
+        "sector_alloc":    sector_alloc,
+        "diversification": diversification,
+        "bias_insight":    bias_insight,
+        "bias_matrix":     bias_matrix,
+        "features":        features,
+        "flags":           flags,
+    }
+
+
+# ── Batch analysis (many portfolios, one pass) ───────────────────────────────
+def analyse_portfolios_batch(df: pd.DataFrame, id_col: str = PORTFOLIO_ID_COL) -> dict:
+    """
+    Vectorised counterpart of analyse_portfolio for a whole client book.
+
+    Every metric is computed with grouped columnar operations over one long
+    holdings table, so the cost per portfolio is a few array slots rather
+    than a full analyse_portfolio call. Numbers match analyse_portfolio run
+    on each portfolio separately.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Long holdings table with REQUIRED_COLS plus `id_col`.
+    id_col : str
+        Column identifying which portfolio each row belongs to.
+
+    Returns
+    -------
+    dict with keys:
+        holdings        — enriched long DataFrame with per-row metrics
+        summary         — DataFrame indexed by portfolio id, one column per summary key
+        sector_alloc    — Series (%) indexed by (portfolio id, Sector), largest first
+        diversification — DataFrame indexed by portfolio id
+        bias_matrix     — boolean DataFrame, portfolio id × bias
+        features        — DataFrame of the shared bias-rule statistics
+        flags           — Series of risk flag lists indexed by portfolio id
+    """
+
+    df = df[[id_col] + REQUIRED_COLS].copy()
+
+    # ── Clean numeric columns ─────────────────────────────────────────────────
+    for col in NUMERIC_COLS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    df = df.dropna(subset=NUMERIC_COLS).reset_index(drop=True)
+
+    # ── Per-holding calculations ──────────────────────────────────────────────
+    df["Invested Value (INR)"]  = df["Quantity"] * df["Buy Price (INR)"]
+    df["Current Value (INR)"]   = df["Quantity"] * df["Current Price (INR)"]
+    df["Gain / Loss (INR)"]     = df["Current Value (INR)"] - df["Invested Value (INR)"]
+    df["Return (%)"]            = ((df["Current Price (INR)"] - df["Buy Price (INR)"]) /
+                                    df["Buy Price (INR)"]) * 100
+
+    # ── Portfolio-level summary ───────────────────────────────────────────────
+    grouped        = df.groupby(id_col, sort=True)
+    total_invested = grouped["Invested Value (INR)"].sum()
+    total_current  = grouped["Current Value (INR)"].sum()
+    total_gain     = total_current - total_invested
+    total_return   = ((total_current - total_invested) / total_invested * 100).where(total_invested > 0, 0)
+
+    df["Weight"]    = df["Current Value (INR)"] / grouped["Current Value (INR)"].transform("sum")
+    weighted_return = (df["Return (%)"] * df["Weight"]).groupby(df[id_col], sort=True).sum()
+
+    best_idx   = grouped["Return (%)"].idxmax()
+    worst_idx  = grouped["Return (%)"].idxmin()
+    n_holdings = grouped.size()
+    n_sectors  = grouped["Sector"].nunique()
+
+    summary = pd.DataFrame({
+        "total_invested":  total_invested.round(2),
+        "total_current":   total_current.round(2),
+        "total_gain":      total_gain.round(2),
+        "total_return":    total_return.round(2),
+        "weighted_return": weighted_return.round(2),
+        "n_holdings":      n_holdings,
+        "best_holding":    df["Stock"].to_numpy()[best_idx.to_numpy()],
+        "best_return":     df["Return (%)"].to_numpy()[best_idx.to_numpy()].round(2),
+        "worst_holding":   df["Stock"].to_numpy()[worst_idx.to_numpy()],
+        "worst_return":    df["Return (%)"].to_numpy()[worst_idx.to_numpy()].round(2),
+    })
+
+    # ── Sector allocation ─────────────────────────────────────────────────────
+    sector_value = df.groupby([id_col, "Sector"], sort=True)["Current Value (INR)"].sum()
+    portfolio_of = sector_value.index.get_level_values(0)
+    sector_alloc = (sector_value / total_current.reindex(portfolio_of).to_numpy() * 100).round(2)
+    # Stable sort: portfolio order first, then allocation descending. Sectors with
+    # exactly equal allocation stay in name order (analyse_portfolio's quicksort
+    # leaves their order unspecified).
+    order        = np.lexsort((-sector_alloc.to_numpy(), sector_value.index.codes[0]))
+    sector_alloc = sector_alloc.iloc[order]
+
+    # ── Diversification ───────────────────────────────────────────────────────
+    conditions = [
+        ((n_sectors >= min_sectors) & (n_holdings >= min_holdings)).to_numpy()
+        for min_sectors, min_holdings, _, _ in DIVERSIFICATION_LEVELS
+    ]
+    diversification = pd.DataFrame({
+        "level":      np.select(conditions, [lvl for _, _, lvl, _ in DIVERSIFICATION_LEVELS], CONCENTRATED_LEVEL[0]),
+        "color":      np.select(conditions, [clr for _, _, _, clr in DIVERSIFICATION_LEVELS], CONCENTRATED_LEVEL[1]),
+        "n_sectors":  n_sectors,
+        "n_holdings": n_holdings,
+    }, index=n_holdings.index)
+
+    # ── Risk flags ────────────────────────────────────────────────────────────
+    # Conditions are evaluated column-wise; only flagged portfolios get a string
+    top_sector = sector_alloc[~sector_alloc.index.get_level_values(0).duplicated()]
+    top_sector = top_sector[top_sector > 50]
+    losers     = df.loc[df["Return (%)"] < -20].groupby(id_col, sort=True)["Stock"].agg(list)
+
+    flags = {pid: [] for pid in n_holdings.index}
+    for (pid, sector), pct in top_sector.items():
+        flags[pid].append(FLAG_CONCENTRATION.format(sector=sector, pct=pct))
+    for pid, bad in losers.items():
+        flags[pid].append(_losses_flag(bad))
+    for pid in n_sectors.index[n_sectors < 3]:
+        flags[pid].append(FLAG_FEW_SECTORS)
+    for pid in n_holdings.index[n_holdings == 1]:
+        flags[pid].append(FLAG_SINGLE_HOLDING)
+    flags = pd.Series(flags, dtype=object).rename_axis(id_col)
+
+    # ── Bias rules, evaluated column-wise for every portfolio ─────────────────
+    top_count = df.groupby([id_col, "Sector"], sort=True).size().groupby(level=0).max()
+    counts    = pd.DataFrame(_return_masks(df["Return (%)"])).groupby(df[id_col], sort=True).sum()
+    features  = pd.DataFrame({
+        "n_holdings":       n_holdings,
+        "n_sectors":        n_sectors,
+        "top_sector_share": top_count.reindex(n_holdings.index) / n_holdings,
+        "return_std":       grouped["Return (%)"].std(),
+    }).join(counts)
+    bias_matrix = pd.DataFrame(evaluate_bias_rules(features), index=features.index)
 
     # ── Round display columns ─────────────────────────────────────────────────
     df["Return (%)"]           = df["Return (%)"].round(2)
@@ -260,27 +603,624 @@ def analyse_portfolio(df: pd.DataFrame, dominant_bias: str = None) -> dict:
     df["Current Value (INR)"]  = df["Current Value (INR)"].round(2)
     df["Gain / Loss (INR)"]    = df["Gain / Loss (INR)"].round(2)
     df["Weight"]               = (df["Weight"] * 100).round(2)
-    df = df.rename(columns={"Weight": "Portfolio Weight (%)"})
+    df = compact_holdings(df.rename(columns={"Weight": "Portfolio Weight (%)"}))
 
     return {
         "holdings":        df,
         "summary":         summary,
         "sector_alloc":    sector_alloc,
         "diversification": diversification,
-        "bias_insight":    bias_insight,
+        "bias_matrix":     bias_matrix,
+        "features":        features,
         "flags":           flags,
     }
 
 
-def validate_upload(df: pd.DataFrame) -> tuple[bool, str]:
+# ── Streaming analysis (holdings files of any size) ──────────────────────────
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def _result_from_aggregates(n_holdings, total_invested, total_current, weighted_sum,
+                            sector_value, sector_count, best, worst, return_std,
+                            return_counts, losers, n_losers, dominant_bias=None) -> dict:
+    """
+    Builds the analyse_portfolio result dict from running totals instead of a
+    holdings frame. Shared by the streaming and incremental paths.
+    `best` / `worst` are (return, stock) pairs; `losers` holds the first
+    MAX_FLAGGED_STOCKS >20% losers in row order and `n_losers` how many there are in all.
+    """
+    total_gain   = total_current - total_invested
+    total_return = ((total_current - total_invested) / total_invested * 100) if total_invested > 0 else 0
+
+    summary = {
+        "total_invested":  round(total_invested, 2),
+        "total_current":   round(total_current, 2),
+        "total_gain":      round(total_gain, 2),
+        "total_return":    round(total_return, 2),
+        "weighted_return": round(weighted_sum / total_current, 2) if total_current > 0 else np.nan,
+        "n_holdings":      n_holdings,
+        "best_holding":    best[1],
+        "best_return":     round(best[0], 2),
+        "worst_holding":   worst[1],
+        "worst_return":    round(worst[0], 2),
+    }
+
+    sector_alloc = (
+        pd.Series(sector_value, dtype=float, name="Current Value (INR)").sort_index()
+        / (total_current if total_current > 0 else np.nan) * 100
+    ).round(2).sort_values(ascending=False).rename_axis("Sector")
+
+    n_sectors       = len(sector_value)
+    diversification = _diversification_score(n_sectors=n_sectors, n_holdings=n_holdings)
+
+    flags = []
+    if len(sector_alloc) > 0 and sector_alloc.iloc[0] > 50:
+        flags.append(FLAG_CONCENTRATION.format(sector=sector_alloc.index[0], pct=sector_alloc.iloc[0]))
+    if n_losers:
+        flags.append(_losses_flag(losers, n_losers))
+    if n_sectors < 3:
+        flags.append(FLAG_FEW_SECTORS)
+    if n_holdings == 1:
+        flags.append(FLAG_SINGLE_HOLDING)
+
+    features = {
+        "n_holdings":       n_holdings,
+        "n_sectors":        n_sectors,
+        "top_sector_share": max(sector_count.values()) / n_holdings if sector_count else np.nan,
+        "return_std":       return_std,
+        **return_counts,
+    }
+    bias_matrix = evaluate_bias_rules(features)
+
+    return {
+        "holdings":        None,
+        "summary":         summary,
+        "sector_alloc":    sector_alloc,
+        "diversification": diversification,
+        "bias_insight":    build_bias_insight(dominant_bias, bias_matrix),
+        "bias_matrix":     bias_matrix,
+        "features":        features,
+        "flags":           flags,
+    }
+
+
+class _RunningAggregates:
+    """
+    Fixed-size running totals that stand in for the full holdings frame.
+    Each chunk is folded in and discarded, so memory does not grow with the file;
+    of the >20% losers only the names the risk flag lists are kept, plus a count.
+    """
+
+    def __init__(self):
+        self.n_holdings     = 0
+        self.total_invested = 0.0
+        self.total_current  = 0.0
+        self.weighted_sum   = 0.0       # Σ return × current value
+        self.sector_value   = {}        # sector → current value
+        self.sector_count   = {}        # sector → number of holdings
+        self.return_counts  = dict.fromkeys(_return_masks(np.array([])), 0)
+        self.best           = (-np.inf, None)
+        self.worst          = (np.inf, None)
+        self.return_mean    = 0.0
+        self.return_m2      = 0.0       # Σ (return − mean)², merged chunk-wise
+        self.losers         = []        # first MAX_FLAGGED_STOCKS >20% losers
+        self.n_losers       = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        qty = pd.to_numeric(chunk["Quantity"], errors="coerce").to_numpy(dtype=float)
+        buy = pd.to_numeric(chunk["Buy Price (INR)"], errors="coerce").to_numpy(dtype=float)
+        cur = pd.to_numeric(chunk["Current Price (INR)"], errors="coerce").to_numpy(dtype=float)
+
+        keep = ~(np.isnan(qty) | np.isnan(buy) | np.isnan(cur))
+        if not keep.any():
+            return
+        qty, buy, cur = qty[keep], buy[keep], cur[keep]
+        stock  = chunk["Stock"].to_numpy()[keep]
+        sector = chunk["Sector"].to_numpy()[keep]
+
+        invested = qty * buy
+        current  = qty * cur
+        ret      = (cur - buy) / buy * 100
+
+        self.total_invested += invested.sum()
+        self.total_current  += current.sum()
+        self.weighted_sum   += (ret * current).sum()
+
+        by_sector = pd.Series(current).groupby(sector, sort=False).agg(["sum", "size"])
+        for sec, value, count in by_sector.itertuples():
+            self.sector_value[sec] = self.sector_value.get(sec, 0.0) + value
+            self.sector_count[sec] = self.sector_count.get(sec, 0) + count
+
+        for name, mask in _return_masks(ret).items():
+            self.return_counts[name] += int(mask.sum())
+
+        # Strict comparison keeps the first occurrence, like idxmax / idxmin
+        if not np.isnan(ret).all():
+            i, j = np.nanargmax(ret), np.nanargmin(ret)
+            if ret[i] > self.best[0]:
+                self.best = (ret[i], stock[i])
+            if ret[j] < self.worst[0]:
+                self.worst = (ret[j], stock[j])
+
+        # Pairwise merge of mean / M2 (Chan, Golub & LeVeque)
+        n_a, n_b = self.n_holdings, len(ret)
+        mean_b   = ret.mean()
+        m2_b     = ((ret - mean_b) ** 2).sum()
+        delta    = mean_b - self.return_mean
+        total_n  = n_a + n_b
+        self.return_mean += delta * n_b / total_n
+        self.return_m2   += m2_b + delta ** 2 * n_a * n_b / total_n
+        self.n_holdings   = total_n
+
+        lost = stock[ret < -20]
+        self.losers.extend(lost[:MAX_FLAGGED_STOCKS - len(self.losers)].tolist())
+        self.n_losers += len(lost)
+
+    def result(self, dominant_bias: str = None) -> dict:
+        if self.n_holdings == 0:
+            raise ValueError("Holdings file has no valid data rows.")
+
+        std    = np.sqrt(self.return_m2 / (self.n_holdings - 1)) if self.n_holdings > 1 else np.nan
+        result = _result_from_aggregates(
+            n_holdings=self.n_holdings,
+            total_invested=self.total_invested,
+            total_current=self.total_current,
+            weighted_sum=self.weighted_sum,
+            sector_value=self.sector_value,
+            sector_count=self.sector_count,
+            best=self.best,
+            worst=self.worst,
+            return_std=std,
+            return_counts=self.return_counts,
+            losers=self.losers,
+            n_losers=self.n_losers,
+            dominant_bias=dominant_bias,
+        )
+        result["return_stats"] = {"count": self.n_holdings, "mean": self.return_mean, "std": std}
+        return result
+
+
+def analyse_portfolio_stream(source, dominant_bias: str = None, chunksize: int = DEFAULT_CHUNKSIZE) -> dict:
+    """
+    Memory-flat variant of analyse_portfolio for holdings files of any size.
+
+    Parameters
+    ----------
+    source : str, path, file-like, or iterable of pd.DataFrame
+        A holdings CSV (read `chunksize` rows at a time) or frames already
+        split into chunks. Only REQUIRED_COLS are read.
+    dominant_bias : str, optional
+        As in analyse_portfolio.
+    chunksize : int
+        Rows per CSV chunk.
+
+    Returns
+    -------
+    dict with the same keys as analyse_portfolio, except:
+        holdings        — None (the per-row table is never materialised)
+        return_stats    — count, mean and sample std of per-holding returns
+    Summary figures, sector allocation, diversification, flags and bias
+    rules match analyse_portfolio on the same rows.
+    """
+    if isinstance(source, (str, os.PathLike)) or hasattr(source, "read"):
+        chunks = pd.read_csv(source, usecols=lambda c: c in REQUIRED_COLS, chunksize=chunksize)
+    else:
+        chunks = source
+
+    agg = _RunningAggregates()
+    for chunk in chunks:
+        missing = [c for c in REQUIRED_COLS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}. Expected: {', '.join(REQUIRED_COLS)}")
+        agg.update(chunk)
+    return agg.result(dominant_bias)
+
+
+# ── Incremental re-valuation (holding deltas and price ticks) ───────────────
+class LivePortfolio:
+    """
+    Stateful portfolio that absorbs deltas instead of being rebuilt.
+
+    Each holding's contribution to the running totals is retracted and
+    re-applied on every change, so add / remove / quantity / price updates
+    cost O(log n) (best/worst heaps) and the summary, sector allocation,
+    diversification, flags and bias rules are read from the totals in time
+    independent of the number of holdings. Per-holding weights are derived
+    on demand. result() matches analyse_portfolio(to_frame()).
+
+    Holdings are lots, one per upload row, so a stock bought in several
+    lots is held (and counted) the way analyse_portfolio counts it. Changes
+    are addressed by Stock name: a price tick reprices every lot of the
+    stock, and quantity changes / removals take lot= when there is more
+    than one. Money totals are maintained by addition and subtraction and
+    are reset to exactly zero whenever no holding has a non-zero quantity,
+    so an emptied portfolio does not carry rounding residue; the return
+    variance uses Welford add / remove updates.
+    """
+
+    def __init__(self):
+        self._holdings      = {}      # lot → {"stock", "sector", "quantity", "buy", "price"}
+        self._lots          = {}      # stock → [lot, ...] in insertion order
+        self._next_lot      = 0       # lots are numbered in insertion order, = row order in to_frame()
+        self._version       = {}      # lot → version of its live heap entries
+        self._best_heap     = []      # (-return, lot, stock, version)
+        self._worst_heap    = []      # (return, lot, stock, version)
+        self._losers        = {}      # lot → stock, for holdings more than 20% down
+        self.total_invested = 0.0
+        self.total_current  = 0.0
+        self._weighted_sum  = 0.0     # Σ return × current value
+        self._return_mean   = 0.0
+        self._return_m2     = 0.0     # Σ (return − mean)², Welford
+        self._n_active      = 0       # holdings with a non-zero quantity
+        self._sector_value  = {}
+        self._sector_count  = {}
+        self._sector_active = {}      # sector → holdings with a non-zero quantity
+        self._return_counts = dict.fromkeys(_return_masks(np.array([])), 0)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "LivePortfolio":
+        """
+        Seeds a LivePortfolio from an upload-format DataFrame (REQUIRED_COLS),
+        one lot per row; repeated Stock names become separate lots.
+        """
+        df = df[REQUIRED_COLS].copy()
+        for col in NUMERIC_COLS:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        df = df.dropna(subset=NUMERIC_COLS)
+
+        portfolio = cls()
+        for stock, sector, qty, buy, cur in df.itertuples(index=False):
+            portfolio.add_holding(stock, sector, qty, buy, cur)
+        return portfolio
+
+    def __len__(self) -> int:
+        return len(self._holdings)
+
+    def __contains__(self, stock) -> bool:
+        return stock in self._lots
+
+    def lots(self, stock) -> list:
+        """Lot ids held for `stock`, oldest first."""
+        return list(self._lots[self._get(stock)])
+
+    # ── Deltas ────────────────────────────────────────────────────────────────
+    def add_holding(self, stock, sector, quantity: float, buy_price: float, current_price: float) -> int:
+        """Adds one lot (a further lot if `stock` is already held) and returns its id."""
+        if buy_price <= 0:
+            raise ValueError(f"Buy price must be positive for {stock}.")
+        lot = self._next_lot
+        self._next_lot += 1
+        self._holdings[lot] = {
+            "stock":    stock,
+            "sector":   sector,
+            "quantity": float(quantity),
+            "buy":      float(buy_price),
+            "price":    float(current_price),
+        }
+        self._lots.setdefault(stock, []).append(lot)
+        self._apply(lot, +1)
+        return lot
+
+    def remove_holding(self, stock, lot: int = None) -> None:
+        """Removes every lot of `stock`, or only `lot`."""
+        for removed in self._select(stock, lot, all_lots=True):
+            self._apply(removed, -1)
+            del self._holdings[removed], self._version[removed]
+            self._lots[stock].remove(removed)
+        if not self._lots[stock]:
+            del self._lots[stock]
+
+    def update_quantity(self, stock, quantity: float, lot: int = None) -> None:
+        (lot,) = self._select(stock, lot, all_lots=False)
+        self._apply(lot, -1)
+        self._holdings[lot]["quantity"] = float(quantity)
+        self._apply(lot, +1)
+
+    def set_price(self, stock, price: float) -> None:
+        """Reprices every lot of `stock`."""
+        for lot in self._lots[self._get(stock)]:
+            self._apply(lot, -1)
+            self._holdings[lot]["price"] = float(price)
+            self._apply(lot, +1)
+
+    def set_prices(self, prices: dict) -> None:
+        """Applies a batch of price ticks, {stock: price}."""
+        for stock, price in prices.items():
+            self.set_price(stock, price)
+
+    def _get(self, stock):
+        if stock not in self._lots:
+            raise KeyError(f"No such holding: {stock}")
+        return stock
+
+    def _select(self, stock, lot, all_lots: bool) -> list:
+        lots = self._lots[self._get(stock)]
+        if lot is not None:
+            if lot not in lots:
+                raise KeyError(f"No lot {lot} for holding: {stock}")
+            return [lot]
+        if not all_lots and len(lots) > 1:
+            raise ValueError(f"{stock} is held in {len(lots)} lots ({lots}); pass lot= to pick one.")
+        return list(lots)
+
+    def _apply(self, lot: int, sign: int) -> None:
+        """Adds (sign=+1) or retracts (sign=-1) one lot's contribution."""
+        h        = self._holdings[lot]
+        invested = h["quantity"] * h["buy"]
+        current  = h["quantity"] * h["price"]
+        ret      = (h["price"] - h["buy"]) / h["buy"] * 100
+        active   = int(h["quantity"] != 0)
+
+        self.total_invested += sign * invested
+        self.total_current  += sign * current
+        self._weighted_sum  += sign * ret * current
+        self._n_active      += sign * active
+        if self._n_active == 0:
+            # Nothing left to value: drop the add / subtract residue
+            self.total_invested = self.total_current = self._weighted_sum = 0.0
+        self._update_return_moments(ret, sign)
+
+        sector = h["sector"]
+        self._sector_count[sector]  = self._sector_count.get(sector, 0) + sign
+        self._sector_active[sector] = self._sector_active.get(sector, 0) + sign * active
+        self._sector_value[sector]  = self._sector_value.get(sector, 0.0) + sign * current
+        if self._sector_active[sector] == 0:
+            self._sector_value[sector] = 0.0
+        if self._sector_count[sector] == 0:
+            del self._sector_count[sector], self._sector_active[sector], self._sector_value[sector]
+
+        for name, hit in _return_masks(ret).items():
+            self._return_counts[name] += sign * int(hit)
+
+        if sign > 0:
+            # New heap entries; older ones for this lot go stale via the version
+            version = self._version.get(lot, 0) + 1
+            self._version[lot] = version
+            heapq.heappush(self._best_heap,  (-ret, lot, h["stock"], version))
+            heapq.heappush(self._worst_heap, (ret,  lot, h["stock"], version))
+            if ret < -20:
+                self._losers[lot] = h["stock"]
+            self._compact_heaps()
+        else:
+            self._losers.pop(lot, None)
+
+    def _update_return_moments(self, ret: float, sign: int) -> None:
+        # Welford: n already counts the lot on add and still counts it on remove
+        n = len(self._holdings) if sign > 0 else len(self._holdings) - 1
+        if n == 0:
+            self._return_mean = self._return_m2 = 0.0
+            return
+        delta = ret - self._return_mean
+        if sign > 0:
+            self._return_mean += delta / n
+            self._return_m2   += delta * (ret - self._return_mean)
+        else:
+            self._return_mean -= delta / n
+            self._return_m2    = max(self._return_m2 - delta * (ret - self._return_mean), 0.0)
+
+    def _live(self, entry) -> bool:
+        _, lot, _, version = entry
+        return self._version.get(lot) == version
+
+    def _peek(self, heap):
+        while heap:
+            if self._live(heap[0]):
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _compact_heaps(self) -> None:
+        # Lazy deletion leaves stale entries behind; rebuild once they dominate
+        if len(self._best_heap) > 2 * len(self._holdings) + 32:
+            for heap in (self._best_heap, self._worst_heap):
+                heap[:] = [e for e in heap if self._live(e)]
+                heapq.heapify(heap)
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+    def weight(self, stock) -> float:
+        """Current portfolio weight (%) of one holding, all of its lots together."""
+        if not self.total_current > 0:
+            return np.nan
+        lots = self._lots[self._get(stock)]
+        return sum(self._holdings[lot]["quantity"] * self._holdings[lot]["price"] for lot in lots) / self.total_current * 100
+
+    def result(self, dominant_bias: str = None, include_holdings: bool = False) -> dict:
+        """
+        Same keys as analyse_portfolio. The per-row holdings table is O(n) to
+        build, so it is only materialised when include_holdings=True.
+        """
+        n = len(self._holdings)
+        if n == 0:
+            raise ValueError("Portfolio has no holdings.")
+
+        best, worst = self._peek(self._best_heap), self._peek(self._worst_heap)
+
+        result = _result_from_aggregates(
+            n_holdings=n,
+            total_invested=self.total_invested,
+            total_current=self.total_current,
+            weighted_sum=self._weighted_sum,
+            sector_value=self._sector_value,
+            sector_count=self._sector_count,
+            best=(-best[0], best[2]),
+            worst=(worst[0], worst[2]),
+            return_std=np.sqrt(self._return_m2 / (n - 1)) if n > 1 else np.nan,
+            return_counts=self._return_counts,
+            losers=[self._losers[lot] for lot in sorted(self._losers)[:MAX_FLAGGED_STOCKS]],
+            n_losers=len(self._losers),
+            dominant_bias=dominant_bias,
+        )
+        if include_holdings:
+            result["holdings"] = analyse_portfolio(self.to_frame())["holdings"]
+        return result
+
+    def to_frame(self) -> pd.DataFrame:
+        """Current holdings in the upload format, one row per lot in insertion order."""
+        # Lot ids only grow, so dict order is already insertion order
+        return pd.DataFrame(
+            [(h["stock"], h["sector"], h["quantity"], h["buy"], h["price"]) for h in self._holdings.values()],
+            columns=REQUIRED_COLS,
+        )
+
+
+# ── Content-hash memoisation ──────────────────────────────────────────────────
+# Process-wide, so identical uploads from different sessions share one entry.
+ANALYSIS_CACHE_SIZE = 128
+
+_analysis_cache       = OrderedDict()
+_analysis_cache_lock  = threading.Lock()
+_analysis_cache_stats = {"hits": 0, "misses": 0}
+
+
+def holdings_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Stable hash of the REQUIRED_COLS content of `df`. Ignores the row index
+    and any extra columns, so re-parsing the same file gives the same key.
+    """
+    cols   = df[REQUIRED_COLS]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("|".join(f"{c}:{t}" for c, t in cols.dtypes.items()).encode())
+    digest.update(pd.util.hash_pandas_object(cols, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def analyse_portfolio_cached(df: pd.DataFrame, fingerprint: str = None) -> dict:
+    """
+    Memoised analyse_portfolio (no dominant bias — apply one afterwards with
+    build_bias_insight), keyed by holdings_fingerprint(df), with LRU eviction
+    beyond ANALYSIS_CACHE_SIZE entries. Pass `fingerprint` when the caller
+    already holds it for this content, to skip re-hashing the frame.
+    The returned dict is shared between callers — treat it as read-only.
+    """
+    key = fingerprint or holdings_fingerprint(df)
+    with _analysis_cache_lock:
+        if key in _analysis_cache:
+            _analysis_cache.move_to_end(key)
+            _analysis_cache_stats["hits"] += 1
+            return _analysis_cache[key]
+        _analysis_cache_stats["misses"] += 1
+
+    # Computed outside the lock; a concurrent miss on the same key just recomputes
+    result = analyse_portfolio(df)
+
+    with _analysis_cache_lock:
+        _analysis_cache[key] = result
+        _analysis_cache.move_to_end(key)
+        while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+    return result
+
+
+def analysis_cache_info() -> dict:
+    """Hit/miss counters and current size of the analyse_portfolio_cached LRU."""
+    with _analysis_cache_lock:
+        return {**_analysis_cache_stats, "size": len(_analysis_cache), "maxsize": ANALYSIS_CACHE_SIZE}
+
+
+def analysis_cache_clear() -> None:
+    with _analysis_cache_lock:
+        _analysis_cache.clear()
+        _analysis_cache_stats.update(hits=0, misses=0)
+
+
+# ── Upload validation ─────────────────────────────────────────────────────────
+MAX_HOLDINGS = 100
+
+# (column, reason) for each row-level check in ingest_holdings, in report order
+_INGEST_CHECKS = [
+    ("Stock",               "missing stock name"),
+    ("Sector",              "unknown sector"),
+    ("Quantity",            "not a number"),
+    ("Quantity",            "must be zero or more"),
+    ("Buy Price (INR)",     "not a number"),
+    ("Buy Price (INR)",     "must be greater than zero"),
+    ("Current Price (INR)", "not a number"),
+    ("Current Price (INR)", "must be greater than zero"),
+]
+
+
+def _to_number(col: pd.Series) -> pd.Series:
+    # Accept "1,500", "₹ 2400" and similar spreadsheet formatting
+    if not pd.api.types.is_numeric_dtype(col):
+        col = col.astype(str).str.replace(r"[,₹\s]", "", regex=True)
+    return pd.to_numeric(col, errors="coerce")
+
+
+def ingest_holdings(df: pd.DataFrame, known_sectors=KNOWN_SECTORS) -> tuple[pd.DataFrame, list[dict]]:
+    """
+    Typed ingest stage: parses, coerces and validates every row in one
+    vectorised pass.
+
+    Checks: non-empty Stock, Sector in `known_sectors` (matched ignoring case
+    and surrounding spaces, then written in canonical form), numeric
+    Quantity ≥ 0, numeric Buy / Current Price > 0.
+
+    Returns (clean, rejected):
+        clean    — REQUIRED_COLS only, already compact (see compact_holdings):
+                   prices float64, whole-number quantities the smallest integer
+                   type, Sector categorical over `known_sectors`; bad rows removed
+        rejected — one dict per bad row: {"row": 1-based data row, "errors":
+                   [{"column", "value", "reason"}, ...]}
+    Raises ValueError if a required column is missing (see validate_upload).
+    """
+    missing = [c for c in REQUIRED_COLS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}. Expected: {', '.join(REQUIRED_COLS)}")
+
+    stock   = df["Stock"].astype(str).str.strip().where(df["Stock"].notna(), "")
+    numbers = {col: _to_number(df[col]) for col in NUMERIC_COLS}
+    qty, buy, cur = numbers["Quantity"], numbers["Buy Price (INR)"], numbers["Current Price (INR)"]
+
+    # Sectors repeat heavily: normalise the distinct values only, then broadcast
+    # the result back as categorical codes (-1 = unknown / missing)
+    known_sectors = list(known_sectors)
+    canon         = {str(s).strip().lower(): i for i, s in enumerate(known_sectors)}
+    codes, values = pd.factorize(df["Sector"])
+    lookup        = np.array([canon.get(str(v).strip().lower(), -1) for v in values] + [-1])
+    sector_codes  = lookup[codes]
+
+    failed = np.column_stack([
+        (stock == "").to_numpy(),
+        sector_codes < 0,
+        qty.isna().to_numpy(),
+        (qty < 0).to_numpy(),
+        buy.isna().to_numpy(),
+        (buy <= 0).to_numpy(),
+        cur.isna().to_numpy(),
+        (cur <= 0).to_numpy(),
+    ])
+    bad_rows = failed.any(axis=1)
+
+    # Python-level work only for rejected rows
+    rejected = []
+    for pos in np.flatnonzero(bad_rows):
+        errors = []
+        for check in np.flatnonzero(failed[pos]):
+            column, reason = _INGEST_CHECKS[check]
+            errors.append({"column": column, "value": df[column].iloc[pos], "reason": reason})
+        rejected.append({"row": int(pos) + 1, "errors": errors})
+
+    keep  = ~bad_rows
+    clean = pd.DataFrame({
+        "Stock":               stock[keep].reset_index(drop=True),
+        "Sector":              pd.Categorical.from_codes(sector_codes[keep], categories=known_sectors),
+        "Quantity":            _compact_quantity(pd.Series(qty.to_numpy(dtype=float)[keep])),
+        "Buy Price (INR)":     buy.to_numpy(dtype=float)[keep],
+        "Current Price (INR)": cur.to_numpy(dtype=float)[keep],
+    })
+    return clean, rejected
+
+
+def validate_upload(df: pd.DataFrame, max_rows: int | None = MAX_HOLDINGS) -> tuple[bool, str]:
     """
     Returns (True, "") if valid, (False, error_message) if not.
+    Pass max_rows=None to lift the holdings cap (e.g. before analyse_portfolio_stream).
     """
     missing = [c for c in REQUIRED_COLS if c not in df.columns]
     if missing:
         return False, f"Missing columns: {', '.join(missing)}. Expected: {', '.join(REQUIRED_COLS)}"
     if len(df) == 0:
         return False, "Uploaded file has no data rows."
-    if len(df) > 100:
-        return False, "Maximum 100 holdings supported."
+    if max_rows is not None and len(df) > max_rows:
+        return False, f"Maximum {max_rows} holdings supported."
     return True, ""
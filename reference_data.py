@@ -0,0 +1,179 @@
+"""
+reference_data.py
+
+Sector Allocation Reference Data
+--------------------------------
+Single loader for Stock_Sector_Allocation.xlsx, shared by sector_analysis
+and ml_model. The workbook is parsed once per process and its columns are
+normalised the same way for every caller:
+
+    Client ID | Gender | Age | Technology | Healthcare | … | Telecom
+
+(sector headers lose their "\\n(%)" suffix; "Age Group" becomes "Age").
+
+Parsing the workbook with openpyxl is by far the slowest step of a cold
+start, so the normalised frame is also written to a Parquet cache at
+CACHE_PATH, tagged with the workbook's mtime, size and SHA-256:
+
+    • mtime and size match   → read the cache
+    • either changed          → hash the workbook; same hash (e.g. a copy
+                                or touch) → read the cache and re-tag it,
+                                different → parse the workbook and rewrite it
+
+Without pyarrow, or on a read-only disk, the workbook is simply parsed.
+pandas is imported on first load, not at module import.
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+SOURCE_FILE = "Stock_Sector_Allocation.xlsx"
+CACHE_DIR   = "artifacts"
+CACHE_PATH  = os.path.join(CACHE_DIR, "sector_allocation.parquet")
+
+# Workbook layout: two title rows above the header
+HEADER_ROW = 2
+
+ID_COLUMN      = "Client ID"
+GENDER_COLUMN  = "Gender"
+AGE_COLUMN     = "Age"
+KEY_COLUMNS    = [ID_COLUMN, GENDER_COLUMN, AGE_COLUMN]
+
+# Bump when normalisation changes so old caches are re-parsed
+CACHE_FORMAT   = 1
+_METADATA_KEY  = b"reference_data"
+
+
+# ── Source identity ───────────────────────────────────────────────────────────
+def source_signature(path: str = SOURCE_FILE) -> tuple | None:
+    """(mtime_ns, size) of the workbook, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def source_hash(path: str = SOURCE_FILE) -> str | None:
+    """Short SHA-256 of the workbook, or None if it is missing."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()[:12]
+    except FileNotFoundError:
+        return None
+
+
+# ── Normalisation ─────────────────────────────────────────────────────────────
+def normalise_column(name) -> str:
+    """"Technology\\n(%)" → "Technology", "Age Group" → "Age"."""
+    name = str(name).replace("(%)", "").replace("%", "").replace("()", "")
+    name = " ".join(name.split())
+    return AGE_COLUMN if name == "Age Group" else name
+
+
+def sector_columns(df) -> list:
+    """Every column after the key columns, in workbook order."""
+    return [c for c in df.columns if c not in KEY_COLUMNS]
+
+
+def parse_workbook(path: str = SOURCE_FILE):
+    import pandas as pd
+
+    df = pd.read_excel(path, header=HEADER_ROW)
+    df.columns = [normalise_column(c) for c in df.columns]
+    df[GENDER_COLUMN] = df[GENDER_COLUMN].astype(str).str.strip()
+    df[AGE_COLUMN]    = df[AGE_COLUMN].astype(str).str.strip()
+    return df
+
+
+# ── Parquet cache ─────────────────────────────────────────────────────────────
+def _read_cache_tags(path: str) -> dict | None:
+    try:
+        import pyarrow.parquet as pq
+        metadata = pq.read_schema(path).metadata or {}
+        return json.loads(metadata[_METADATA_KEY])
+    except (ImportError, OSError, KeyError, ValueError):
+        return None
+
+
+def _read_cache(path: str):
+    try:
+        import pyarrow.parquet as pq
+        return pq.read_table(path).to_pandas()
+    except (ImportError, OSError, ValueError):
+        return None
+
+
+def _write_cache(df, tags: dict, path: str):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        _METADATA_KEY: json.dumps(tags).encode(),
+    })
+    # Write-then-rename so a concurrent reader never sees a partial file
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+    except OSError:
+        pass    # read-only deployment: keep serving from memory
+
+
+def load(path: str = SOURCE_FILE, cache_path: str = CACHE_PATH):
+    """
+    Normalised workbook, from the Parquet cache when it is current.
+
+    Returns
+    -------
+    pandas.DataFrame with KEY_COLUMNS followed by the sector columns.
+
+    Raises
+    ------
+    FileNotFoundError if neither the workbook nor a cache exists.
+    """
+    signature = source_signature(path)
+    tags      = _read_cache_tags(cache_path)
+    current   = tags is not None and tags.get("format") == CACHE_FORMAT
+
+    if signature is None:
+        # No workbook (e.g. a slim deployment): the cache is all there is
+        df = _read_cache(cache_path) if current else None
+        if df is None:
+            raise FileNotFoundError(path)
+        return df
+
+    mtime_ns, size = signature
+    if current and tags.get("mtime_ns") == mtime_ns and tags.get("size") == size:
+        df = _read_cache(cache_path)
+        if df is not None:
+            return df
+
+    digest = source_hash(path)
+    fresh  = {"format": CACHE_FORMAT, "mtime_ns": mtime_ns, "size": size, "sha256": digest}
+    df     = _read_cache(cache_path) if current and tags.get("sha256") == digest else None
+    if df is None:
+        df = parse_workbook(path)
+    _write_cache(df, fresh, cache_path)
+    return df
+
+
+@lru_cache(maxsize=1)
+def load_sector_allocation():
+    """
+    Process-wide copy of load(). Shared between callers — treat it as
+    read-only and .copy() before adding columns.
+    """
+    return load()
+
+
+def clear_cache():
+    """Forget the in-memory copy so the next call re-checks the workbook."""
+    load_sector_allocation.cache_clear()
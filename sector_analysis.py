@@ -1,5 +1,4 @@
-import pandas as pd
-import streamlit as st
+from reference_data import AGE_COLUMN, GENDER_COLUMN, load_sector_allocation, sector_columns
 
 # --------------------------------------------------
 # AGE LABEL MAPPING
@@ -16,35 +15,109 @@ AGE_MAP = {
 }
 
 # --------------------------------------------------
-# LOAD & CACHE DATASET
+# DEMOGRAPHIC INDEX
+# The dataset only has |ages| × |genders| cohorts, so every
+# cohort's mean allocation (and its most / least sector) is
+# computed once into an array:
+#
+#     means[age, gender, sector]
+#
+# A single lookup is two dict hits; "all genders for an age"
+# or "every cohort" are slices of the same array.
+# Rebuilt when reference_data hands out a new frame.
+# numpy / pandas are imported on first build, not at module import
 # --------------------------------------------------
-@st.cache_data
-def _load_sector_data():
-    df = pd.read_excel("Stock_Sector_Allocation.xlsx", header=2)
-    df.columns = df.columns.str.replace("%", "", regex=False)
-    df.columns = df.columns.str.replace("()", "", regex=False)
-    df.columns = df.columns.str.strip()
-    df = df.rename(columns={"Age Group": "Age"})
-    return df
+class SectorIndex:
+    """
+    (age, gender) → mean allocation vector over the sector columns.
+    Cohorts with no rows hold NaN and a count of 0.
+    """
 
-# --------------------------------------------------
-# SECTOR ANALYSIS FUNCTION
-# --------------------------------------------------
-def sector_analysis(age, gender):
-    df = _load_sector_data()
+    def __init__(self, df):
+        import numpy as np
+        import pandas as pd
+
+        self.sectors = sector_columns(df)
+        self.ages    = sorted(df[AGE_COLUMN].unique())
+        self.genders = sorted(df[GENDER_COLUMN].unique())
+        self._age_pos    = {a: i for i, a in enumerate(self.ages)}
+        self._gender_pos = {g: i for i, g in enumerate(self.genders)}
+
+        shape       = (len(self.ages), len(self.genders), len(self.sectors))
+        self.means  = np.full(shape, np.nan)
+        self.counts = np.zeros(shape[:2], dtype=np.int64)
+
+        # One pass over the rows; same per-cohort .mean() the scan used to do
+        for (age, gender), rows in df.groupby([AGE_COLUMN, GENDER_COLUMN], sort=False):
+            i, j = self._age_pos[age], self._gender_pos[gender]
+            self.means[i, j]  = rows[self.sectors].mean().to_numpy()
+            self.counts[i, j] = len(rows)
+
+        # Scalar answers, ready to hand out
+        self._results = {}
+        for age, i in self._age_pos.items():
+            for gender, j in self._gender_pos.items():
+                if self.counts[i, j]:
+                    avg = pd.Series(self.means[i, j], index=self.sectors)
+                    self._results[(age, gender)] = (avg.idxmax(), avg.idxmin(), avg)
+
+    def lookup(self, age, gender):
+        """(most_sector, least_sector, sector_avg) or (None, None, None)."""
+        return self._results.get((AGE_MAP.get(age, age), gender), (None, None, None))
+
+    def _positions(self, keys, positions):
+        if keys is None:
+            return slice(None)
+        return [positions[k] for k in keys if k in positions]
 
-    # Convert "18-25 years" → "18-25" to match the Excel values
-    age_key = AGE_MAP.get(age, age)
+    def vectors(self, ages=None, genders=None):
+        """
+        Mean allocation array for many cohorts at once.
 
-    sector_columns = df.columns[3:]
+        Parameters
+        ----------
+        ages : list, optional
+            App or short age labels (default: every age group).
+        genders : list, optional
+            Default: every gender.
 
-    filtered = df[(df["Age"] == age_key) & (df["Gender"] == gender)]
+        Returns
+        -------
+        ndarray (ages, genders, sectors) — a view when both are None;
+        unknown labels are skipped.
+        """
+        import numpy as np
 
-    if filtered.empty:
-        return None, None, None
+        a = self._positions(None if ages is None else [AGE_MAP.get(x, x) for x in ages], self._age_pos)
+        g = self._positions(genders, self._gender_pos)
+        if isinstance(a, list) and isinstance(g, list):
+            return self.means[np.ix_(a, g)]
+        return self.means[a][:, g]
 
-    sector_avg = filtered[sector_columns].mean()
-    most_sector = sector_avg.idxmax()
-    least_sector = sector_avg.idxmin()
+    def frame(self, ages=None, genders=None):
+        """vectors() as a DataFrame indexed by (age, gender), empty cohorts dropped."""
+        import pandas as pd
 
-    return most_sector, least_sector, sector_avg
+        age_keys    = self.ages if ages is None else [k for k in (AGE_MAP.get(x, x) for x in ages) if k in self._age_pos]
+        gender_keys = self.genders if genders is None else [k for k in genders if k in self._gender_pos]
+        block = self.vectors(age_keys, gender_keys).reshape(-1, len(self.sectors))
+        index = pd.MultiIndex.from_product([age_keys, gender_keys], names=[AGE_COLUMN, GENDER_COLUMN])
+        return pd.DataFrame(block, index=index, columns=self.sectors).dropna(how="all")
+
+
+_index = {"frame": None, "index": None}
+
+
+def sector_index() -> SectorIndex:
+    df = load_sector_allocation()
+    if _index["frame"] is not df:
+        _index["index"] = SectorIndex(df)
+        _index["frame"] = df
+    return _index["index"]
+
+# --------------------------------------------------
+# SECTOR ANALYSIS FUNCTION
+# --------------------------------------------------
+def sector_analysis(age, gender):
+    # Precomputed per (age, gender); the returned Series is shared — treat it as read-only
+    return sector_index().lookup(age, gender)
@@ -0,0 +1,150 @@
+"""
+sector_returns.py
+
+Sector Return Reference Data
+----------------------------
+Long-run performance of the Indian sector index that stands in for each
+app sector, from Sectorwise Return Data.xlsx:
+
+    #  | index name | start value | end value | CAGR (workbook formula)
+
+The workbook is read once and every mapped sector's total return, CAGR
+and performance tier are computed up front, so the Portfolio section can
+look up any number of held sectors for the cost of a dict hit:
+
+    sector_return("Finance")
+    → {"sector": "Finance", "index_name": "Nifty Financial Services",
+       "start": 7699.5, "end": 23521.8, "years": 11,
+       "total_return": 205.5, "cagr": 10.7, "tier": "moderate"}
+
+The period the start / end values cover is read off the workbook's own
+CAGR column when it has one (DEFAULT_SPAN_YEARS otherwise). The table is
+reloaded when the file's mtime / size changes. pandas is imported on
+first load, not at module import.
+"""
+
+import math
+import os
+import statistics
+from functools import lru_cache
+
+SOURCE_FILE = "Sectorwise Return Data.xlsx"
+
+# App sector name → index row name in SOURCE_FILE (matched case- and whitespace-insensitively)
+SECTOR_NAME_MAP = {
+    "Finance":        "Nifty financial services",
+    "Consumer Goods": "BSE Consumer discretionary",
+    "Healthcare":     "Nifty healthcare",
+    "Technology":     "Nifty it",
+    "Materials":      "Nifty metal",
+    "Energy":         "Nifty oil and Gas",
+    "Real Estate":    "Nifty realty",
+    "Utilities":      "bse utilities",
+    "Telecom":        "bse telecom",
+    "Industrials":    "BSE industrials",
+}
+
+# Years between the start and end values when the workbook has no CAGR column
+DEFAULT_SPAN_YEARS = 11
+
+# CAGR (%) thresholds for the performance tiers
+STRONG_CAGR   = 12.0
+MODERATE_CAGR = 7.0
+
+TIERS = {
+    "strong":        "strong long-term performer",
+    "moderate":      "moderate long-term performer",
+    "below-average": "below-average long-term performer",
+}
+
+
+def performance_tier(cagr: float) -> str:
+    if cagr >= STRONG_CAGR:
+        return "strong"
+    if cagr >= MODERATE_CAGR:
+        return "moderate"
+    return "below-average"
+
+
+def _key(name) -> str:
+    return " ".join(str(name).split()).lower()
+
+
+def _implied_span(rows) -> int:
+    # (end / start) ** (1 / years) - 1 = cagr  →  years = ln(end / start) / ln(1 + cagr)
+    spans = [
+        math.log(end / start) / math.log1p(cagr)
+        for _, start, end, cagr in rows
+        if cagr is not None and cagr > 0 and end > start > 0
+    ]
+    return round(statistics.median(spans)) if spans else DEFAULT_SPAN_YEARS
+
+
+def _read_rows(path: str) -> list:
+    import pandas as pd
+
+    df = pd.read_excel(path, header=None)
+    rows = []
+    for values in df.itertuples(index=False):
+        name, start, end = values[1], values[2], values[3]
+        cagr = values[4] if len(values) > 4 else None
+        if pd.isna(name) or pd.isna(start) or pd.isna(end):
+            continue
+        rows.append((" ".join(str(name).split()), float(start), float(end),
+                     None if pd.isna(cagr) else float(cagr)))
+    return rows
+
+
+@lru_cache(maxsize=1)
+def _returns_table(path: str, signature) -> dict:
+    rows  = _read_rows(path)
+    years = _implied_span(rows)
+    by_index = {_key(name): (name, start, end) for name, start, end, _ in rows}
+
+    table = {}
+    for sector, index in SECTOR_NAME_MAP.items():
+        match = by_index.get(_key(index))
+        if match is None or match[1] <= 0:
+            continue
+        name, start, end = match
+        cagr = ((end / start) ** (1 / years) - 1) * 100
+        table[sector] = {
+            "sector":       sector,
+            "index_name":   name.title(),
+            "start":        start,
+            "end":          end,
+            "years":        years,
+            "total_return": (end - start) / start * 100,
+            "cagr":         cagr,
+            "tier":         performance_tier(cagr),
+        }
+    return table
+
+
+def returns_table(path: str = SOURCE_FILE) -> dict:
+    """
+    Returns
+    -------
+    {sector: entry} for every SECTOR_NAME_MAP sector found in the workbook;
+    empty if the workbook is missing. Entries are shared — treat as read-only.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    return _returns_table(path, (st.st_mtime_ns, st.st_size))
+
+
+def sector_return(sector: str) -> dict | None:
+    """Precomputed entry for one app sector, or None if it has no index data."""
+    return returns_table().get(sector)
+
+
+def sector_returns(sectors) -> list:
+    """Entries for many sectors in the given order, skipping those without data."""
+    table = returns_table()
+    return [table[s] for s in sectors if s in table]
+
+
+def clear_cache():
+    _returns_table.cache_clear()
@@ -10,6 +10,8 @@ Purpose
 2. Analyze Risk Appetite Questions (Q15–Q22)
    - Compute Risk Appetite Score
    - Classify Risk Profile
+3. Score many respondents at once (score_survey_batch)
+   - Same results as generate_full_survey_analysis, one row per respondent
 
 This module:
 - Does NOT handle UI
@@ -18,6 +20,14 @@ This module:
 """
 
 from collections import defaultdict
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+# pandas is only needed by the batch scorer and is imported there, so the
+# per-respondent path stays cheap to import
+if TYPE_CHECKING:
+    import pandas as pd
 
 # ==================================================
 # SECTION 1 — BEHAVIORAL BIAS LOGIC (Q3–Q14)
@@ -93,20 +103,22 @@ def compute_bfs_score(responses: dict) -> dict:
     max_score = len(bfs_questions) * 5
     bfs_percentage = round((bfs_score / max_score) * 100, 2)
 
-    if bfs_score <= 28:
-        category = "Low Bias-Prone"
-    elif bfs_score <= 44:
-        category = "Moderately Bias-Prone"
-    else:
-        category = "Highly Bias-Prone"
-
     return {
         "bfs_score": bfs_score,
         "max_score": max_score,
         "bfs_percentage": bfs_percentage,
-        "category": category
+        "category": classify_bfs(bfs_score)
     }
 
+
+def classify_bfs(bfs_score: int) -> str:
+    if bfs_score <= 28:
+        return "Low Bias-Prone"
+    elif bfs_score <= 44:
+        return "Moderately Bias-Prone"
+    else:
+        return "Highly Bias-Prone"
+
 # ==================================================
 # SECTION 2 — RISK APPETITE LOGIC (Q15–Q22)
 # ==================================================
@@ -124,32 +136,35 @@ def compute_risk_appetite_score(responses: dict) -> dict:
         raise ValueError("No risk appetite responses provided")
 
     average_score = round(sum(scores) / len(scores), 2)
+    category, interpretation = classify_risk_appetite(average_score)
 
+    return {
+        "average_score": average_score,
+        "category": category,
+        "interpretation": interpretation
+    }
+
+
+def classify_risk_appetite(average_score: float) -> tuple:
+    """
+    Returns (category, interpretation) for an average Q15–Q22 score
+    """
     if average_score <= 2.0:
-        category = "Low Risk Appetite"
-        interpretation = (
+        return "Low Risk Appetite", (
             "Prefers stability and capital protection, "
             "with limited tolerance for volatility."
         )
     elif average_score <= 3.5:
-        category = "Moderate Risk Appetite"
-        interpretation = (
+        return "Moderate Risk Appetite", (
             "Willing to accept moderate volatility for balanced growth, "
             "with some focus on long-term appreciation."
         )
     else:
-        category = "Moderate to High Risk Appetite"
-        interpretation = (
+        return "Moderate to High Risk Appetite", (
             "Comfortable with volatility for long-term growth and "
             "prioritizes capital appreciation over short-term income."
         )
 
-    return {
-        "average_score": average_score,
-        "category": category,
-        "interpretation": interpretation
-    }
-
 # ==================================================
 # SECTION 3 — FULL SURVEY ANALYSIS (ONE CALL)
 # ==================================================
@@ -169,3 +184,158 @@ def generate_full_survey_analysis(responses: dict) -> dict:
         },
         "risk_appetite_analysis": compute_risk_appetite_score(responses)
     }
+
+# ==================================================
+# SECTION 4 — BATCH SCORING (MANY RESPONDENTS)
+# ==================================================
+# Every number above is a function of an integer answer sum (per bias,
+# over Q3–Q14, over Q15–Q22). The batch path gets all of those sums from
+# one integer product with a question × bias projection matrix, then maps
+# them through lookup tables built with the scalar rules, so the output
+# (including Python's round()) is identical to the per-respondent path.
+
+SURVEY_QUESTIONS = [f"Q{i}" for i in range(3, 23)]
+BFS_QUESTIONS    = SURVEY_QUESTIONS[:12]      # Q3–Q14
+RISK_QUESTIONS   = SURVEY_QUESTIONS[12:]      # Q15–Q22
+BIASES           = list(dict.fromkeys(QUESTION_BIAS_MAP.values()))
+
+# answers (N × 20) @ BIAS_PROJECTION (20 × n_biases) → per-bias answer sums
+BIAS_PROJECTION = np.array(
+    [[QUESTION_BIAS_MAP.get(q) == bias for bias in BIASES] for q in SURVEY_QUESTIONS],
+    dtype=np.int64,
+)
+
+INTENSITY_LEVELS = ["Low", "Moderate", "High"]
+BFS_CATEGORIES   = ["Low Bias-Prone", "Moderately Bias-Prone", "Highly Bias-Prone"]
+RISK_CATEGORIES  = ["Low Risk Appetite", "Moderate Risk Appetite", "Moderate to High Risk Appetite"]
+RISK_INTERPRETATIONS = dict(classify_risk_appetite(avg) for avg in (1.0, 3.0, 5.0))
+
+BFS_MAX_SCORE = 5 * len(BFS_QUESTIONS)
+
+# Output columns of score_survey_batch
+BFS_COLS  = ["BFS Score", "BFS Max Score", "BFS %", "BFS Category"]
+RISK_COLS = ["Risk Average Score", "Risk Category"]
+
+
+def _bias_tables(n_questions: int) -> tuple:
+    # Indexed by answer sum − n_questions; the normalised values are exact
+    # multiples of 1/4, so their sum equals (total − n) / 4 exactly
+    scores = [round((total - n_questions) / 4 / n_questions, 3)
+              for total in range(n_questions, 5 * n_questions + 1)]
+    levels = [INTENSITY_LEVELS.index(classify_bias_intensity(v)) for v in scores]
+    return np.array(scores), np.array(levels, dtype=np.int8)
+
+
+_BIAS_COUNTS = BIAS_PROJECTION.sum(axis=0)
+_BIAS_TABLES = [_bias_tables(int(n)) for n in _BIAS_COUNTS]
+
+# Indexed directly by the answer sum
+_BFS_PCT   = np.array([round((total / BFS_MAX_SCORE) * 100, 2) for total in range(BFS_MAX_SCORE + 1)])
+_BFS_CAT   = np.array([BFS_CATEGORIES.index(classify_bfs(t)) for t in range(BFS_MAX_SCORE + 1)], dtype=np.int8)
+_RISK_AVG  = np.array([round(total / len(RISK_QUESTIONS), 2) for total in range(5 * len(RISK_QUESTIONS) + 1)])
+_RISK_CAT  = np.array([RISK_CATEGORIES.index(classify_risk_appetite(avg)[0]) for avg in _RISK_AVG], dtype=np.int8)
+
+
+def _answer_matrix(answers) -> tuple:
+    """
+    DataFrame with Q3–Q22 columns (any order, extras ignored) or an
+    N × 20 array in SURVEY_QUESTIONS order → (int64 matrix, index).
+    """
+    import pandas as pd
+
+    if isinstance(answers, pd.DataFrame):
+        missing = [q for q in SURVEY_QUESTIONS if q not in answers.columns]
+        if missing:
+            raise ValueError(f"Missing answer columns: {', '.join(missing)}")
+        index  = answers.index
+        values = answers[SURVEY_QUESTIONS].to_numpy(dtype=float, na_value=np.nan)
+    else:
+        values = np.asarray(answers, dtype=float)
+        index  = None
+        if values.ndim != 2 or values.shape[1] != len(SURVEY_QUESTIONS):
+            raise ValueError(f"Expected an N × {len(SURVEY_QUESTIONS)} answer matrix (Q3–Q22), got shape {values.shape}")
+
+    # Same contract as normalize_score: every answer is a whole number in 1–5
+    bad = ~np.isin(values, (1, 2, 3, 4, 5))
+    if bad.any():
+        row, col = np.argwhere(bad)[0]
+        raise ValueError(
+            f"Scores must be between 1 and 5 ({int(bad.any(axis=1).sum())} respondent(s); "
+            f"first: row {row}, {SURVEY_QUESTIONS[col]} = {values[row, col]})"
+        )
+    return values.astype(np.int64), index
+
+
+def score_survey_batch(answers) -> "pd.DataFrame":
+    """
+    Parameters
+    ----------
+    answers : pd.DataFrame with columns Q3–Q22, or array-like of shape
+              (N, 20) with columns in SURVEY_QUESTIONS order. Answers are
+              the numeric 1–5 scores fed to generate_full_survey_analysis.
+
+    Returns
+    -------
+    pd.DataFrame, one row per respondent (index kept from a DataFrame input):
+        "<bias> Score" / "<bias> Level"   for every bias in BIASES
+        BFS Score, BFS Max Score, BFS %, BFS Category
+        Risk Average Score, Risk Category
+    Text columns are categoricals. Raises ValueError on a missing column
+    or an answer outside 1–5.
+    """
+    import pandas as pd
+
+    X, index = _answer_matrix(answers)
+
+    bias_sums = X @ BIAS_PROJECTION
+    bfs_sums  = X[:, :len(BFS_QUESTIONS)].sum(axis=1)
+    risk_sums = X[:, len(BFS_QUESTIONS):].sum(axis=1)
+
+    columns = {}
+    for j, bias in enumerate(BIASES):
+        scores, levels = _BIAS_TABLES[j]
+        offset = bias_sums[:, j] - _BIAS_COUNTS[j]
+        columns[f"{bias} Score"] = scores[offset]
+        columns[f"{bias} Level"] = pd.Categorical.from_codes(levels[offset], INTENSITY_LEVELS)
+
+    columns["BFS Score"]          = bfs_sums
+    columns["BFS Max Score"]      = np.full(len(X), BFS_MAX_SCORE)
+    columns["BFS %"]              = _BFS_PCT[bfs_sums]
+    columns["BFS Category"]       = pd.Categorical.from_codes(_BFS_CAT[bfs_sums], BFS_CATEGORIES)
+    columns["Risk Average Score"] = _RISK_AVG[risk_sums]
+    columns["Risk Category"]      = pd.Categorical.from_codes(_RISK_CAT[risk_sums], RISK_CATEGORIES)
+
+    return pd.DataFrame(columns, index=index)
+
+
+def survey_analysis_records(scored: "pd.DataFrame") -> list:
+    """
+    Expands score_survey_batch output into generate_full_survey_analysis
+    dicts, one per row.
+    """
+    bias_cols = [(bias, scored[f"{bias} Score"].tolist(), scored[f"{bias} Level"].tolist()) for bias in BIASES]
+    bfs       = zip(*(scored[c].tolist() for c in BFS_COLS))
+    risk      = zip(*(scored[c].tolist() for c in RISK_COLS))
+
+    records = []
+    for i, ((bfs_score, max_score, bfs_pct, bfs_cat), (risk_avg, risk_cat)) in enumerate(zip(bfs, risk)):
+        records.append({
+            "behavioral_bias_analysis": {
+                "bias_profile": {
+                    bias: {"score": scores[i], "level": levels[i]}
+                    for bias, scores, levels in bias_cols
+                },
+                "bfs_summary": {
+                    "bfs_score": bfs_score,
+                    "max_score": max_score,
+                    "bfs_percentage": bfs_pct,
+                    "category": bfs_cat
+                }
+            },
+            "risk_appetite_analysis": {
+                "average_score": risk_avg,
+                "category": risk_cat,
+                "interpretation": RISK_INTERPRETATIONS[risk_cat]
+            }
+        })
+    return records